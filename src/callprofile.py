@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Call Profile
+Opcionális profilozás: hívásszám és idő szabályonként, rendezett jelentés és flamegraph-verem fájl
+"""
+
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class CallProfile:
+    """Call counts and times per call stack of grammar rules and callbacks
+
+    Times are kept per stack (a tuple of frame names from the outermost),
+    exclusive of the frames below, which is what flamegraph tools expect.
+    ``report()`` derives each name's calls, self time and cumulative time
+    from them.
+    """
+
+    def __init__(self):
+        # stack -> [calls, self seconds]
+        self.stacks = defaultdict(lambda: [0, 0.0])
+        self._stack = []
+        # Time spent in the children of each open frame
+        self._children = []
+
+    def add(self, frames, seconds, calls=1):
+        """Record a completed call below the currently open frames"""
+        entry = self.stacks[tuple(self._stack) + tuple(frames)]
+        entry[0] += calls
+        entry[1] += seconds
+        if self._children:
+            self._children[-1] += seconds
+
+    @contextmanager
+    def frame(self, name):
+        """Time a block as a frame of its own"""
+        self._stack.append(name)
+        self._children.append(0.0)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            children = self._children.pop()
+            entry = self.stacks[tuple(self._stack)]
+            self._stack.pop()
+            entry[0] += 1
+            entry[1] += elapsed - children
+            if self._children:
+                self._children[-1] += elapsed
+
+    def wrap(self, name, function):
+        """``function`` timed as frame ``name`` on every call"""
+        stack, children, stacks = self._stack, self._children, self.stacks
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            stack.append(name)
+            children.append(0.0)
+            started = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = clock() - started
+                entry = stacks[tuple(stack)]
+                stack.pop()
+                entry[0] += 1
+                entry[1] += elapsed - children.pop()
+                if children:
+                    children[-1] += elapsed
+
+        timed.__wrapped__ = function
+        return timed
+
+    def report(self):
+        """Per-name ``{'calls', 'self_seconds', 'cumulative_seconds'}``, costliest first
+
+        Cumulative time counts each stack once per name in it, so recursive
+        rules are not counted twice.
+        """
+        names = defaultdict(lambda: {'calls': 0, 'self_seconds': 0.0, 'cumulative_seconds': 0.0})
+        for stack, (calls, seconds) in self.stacks.items():
+            leaf = names[stack[-1]]
+            leaf['calls'] += calls
+            leaf['self_seconds'] += seconds
+            for name in set(stack):
+                names[name]['cumulative_seconds'] += seconds
+        return dict(sorted(names.items(), key=lambda item: item[1]['cumulative_seconds'], reverse=True))
+
+    def total_seconds(self):
+        return sum(seconds for _, seconds in self.stacks.values())
+
+    def format_report(self, top=None):
+        """Sorted text table of the report"""
+        total = self.total_seconds() or 1.0
+        lines = [f"{'frame':<28}{'calls':>9}{'cum ms':>11}{'self ms':>11}{'self %':>8}"]
+        for name, stats in list(self.report().items())[:top]:
+            lines.append(f"{name:<28}{stats['calls']:>9}{stats['cumulative_seconds'] * 1000:>11.2f}"
+                         f"{stats['self_seconds'] * 1000:>11.2f}{stats['self_seconds'] / total * 100:>8.1f}")
+        return '\n'.join(lines)
+
+    def write_folded(self, stream):
+        """Folded stacks (``a;b;c <microseconds>`` per line) for flamegraph.pl, speedscope or inferno"""
+        for stack, (_, seconds) in sorted(self.stacks.items()):
+            microseconds = round(seconds * 1_000_000)
+            if microseconds > 0:
+                stream.write(f"{';'.join(stack)} {microseconds}\n")
+
+
+def instrument(obj, profile, names=None):
+    """Wrap the methods of ``obj`` (all of its class's own methods by default) as frames
+
+    Frames are named after the methods without leading underscores, so the
+    fast parser's ``_campaign_body`` shows up as ``campaign_body``.  Only the
+    instance is changed; other instances of the class are not profiled.
+    """
+    if names is None:
+        names = [name for name, value in vars(type(obj)).items()
+                 if callable(value) and not name.startswith('__')]
+    for name in names:
+        setattr(obj, name, profile.wrap(name.lstrip('_'), getattr(obj, name)))
+    return obj
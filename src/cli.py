@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Fast-start Command Line Interface
+Gyorsan induló parancssori ellenőrző git hookokhoz és szkriptekhez
+"""
+
+import sys
+
+# Only the standard modules the common path needs are imported up front;
+# lark, the JSON writer and the semantic checks are loaded when a run asks for them.
+
+
+def _date(value):
+    from datetime import date
+    return date.fromisoformat(value)
+
+
+def _arguments(argv):
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Parse and check campaign files (.smp)")
+    arg_parser.add_argument('files', nargs='+', help="Campaign files to check")
+    arg_parser.add_argument('--backend', choices=('fast', 'lark'), default='fast',
+                            help="Parser backend (default: fast; --tree implies lark)")
+    arg_parser.add_argument('--module', action='store_true',
+                            help="Parse importable modules (campaign optional)")
+    arg_parser.add_argument('--tree', action='store_true', help="Pretty-print the Lark parse tree")
+    arg_parser.add_argument('--ast', action='store_true', help="Print the AST as JSON")
+    arg_parser.add_argument('--jsonl', metavar='FILE',
+                            help="Also write one JSON record per file (AST, errors) to FILE as files finish")
+    arg_parser.add_argument('--validate', action='store_true', help="Run semantic validation")
+    arg_parser.add_argument('--start', type=_date, metavar='YYYY-MM-DD',
+                            help="Campaign start date for --validate; date rules (F201) are skipped without it")
+    arg_parser.add_argument('--no-interrupt', action='store_true',
+                            help="Check the time and memory budgets only after each parse, without a SIGALRM timer")
+    arg_parser.add_argument('--verbose', action='store_true', help="Show parser progress messages")
+    arg_parser.add_argument('--profile', action='store_true',
+                            help="Print call counts and times per grammar rule to stderr")
+    arg_parser.add_argument('--profile-stacks', metavar='FILE',
+                            help="Write folded rule stacks for flamegraph tools to FILE (implies --profile)")
+    return arg_parser.parse_args(argv)
+
+
+def _check_files(args, parser, start, records):
+    """Parse (and validate) every file, printing one report per file
+
+    Returns the status so far, the FeasibilityBatch of the validated
+    campaigns (or None) and their paths.  ``records`` is the JSON Lines
+    writer of ``--jsonl``, or None.
+    """
+    from parser import print_failure
+    status = 0
+    if records is not None:
+        from jsonstream import result_record
+    # Feasibility columns (a few values per campaign and content item) and
+    # paths of the validated campaigns; these grow with the batch, but the
+    # ASTs and parse trees are dropped after each file
+    batch = None
+    validated = []
+    for path, result in parser.parse_files(args.files, start=start):
+        if not result['success']:
+            if records is not None:
+                records.write(result_record(path, result))
+            print_failure(path, result)
+            status = 1
+            continue
+
+        print(f"[OK] {path}")
+        if args.tree:
+            print(result['parse_tree'].pretty())
+        if args.ast:
+            from jsonstream import write_json
+            write_json(result['ast'], sys.stdout)
+            print()
+        semantic_errors = None
+        if args.validate:
+            ast = result['ast']['campaign'] if args.module else result['ast']
+            semantic_errors = parser.validate_semantic(ast) if ast else []
+            for error in semantic_errors:
+                print(f"  [WARNING] {error}")
+            if semantic_errors:
+                status = 1
+            if ast:
+                if batch is None:
+                    from feasibility import FeasibilityBatch
+                    batch = FeasibilityBatch()
+                batch.add(ast, args.start)
+                validated.append(path)
+        if records is not None:
+            records.write(result_record(path, result, semantic_errors))
+    return status, batch, validated
+
+
+def main(argv=None):
+    """Check every file; return 0 if all parse (and validate), 1 otherwise"""
+    args = _arguments(argv)
+    from limits import ResourceLimits
+    from parser import SocialMediaContentParser
+
+    backend = 'lark' if args.tree else args.backend
+    start = 'module' if args.module else 'start'
+    profile = None
+    if args.profile or args.profile_stacks:
+        from callprofile import CallProfile
+        profile = CallProfile()
+    # One parser for the whole run; the Lark backend compiles its grammar once.
+    # The CLI owns its process, so a file over its budget is interrupted mid-parse.
+    limits = ResourceLimits(interrupt=not args.no_interrupt)
+    parser = SocialMediaContentParser(backend=backend, limits=limits, profile=profile, verbose=args.verbose)
+
+    if args.jsonl:
+        from jsonstream import JSONStreamWriter
+        with open(args.jsonl, 'w', encoding='utf-8') as stream, JSONStreamWriter(stream, lines=True) as records:
+            status, batch, validated = _check_files(args, parser, start, records)
+    else:
+        status, batch, validated = _check_files(args, parser, start, None)
+
+    if batch is not None:
+        from feasibility import check_feasibility
+        for finding in check_feasibility(batch):
+            where = validated[finding['index']]
+            if finding['item']:
+                where += f" ({finding['item']})"
+            print(f"  [{finding['severity'].upper()}] {where}: {finding['code']} {finding['message']}")
+            if finding['severity'] == 'error':
+                status = 1
+    if profile is not None:
+        print(profile.format_report(), file=sys.stderr)
+        if args.profile_stacks:
+            with open(args.profile_stacks, 'w', encoding='utf-8') as stream:
+                profile.write_folded(stream)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
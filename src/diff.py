@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Campaign Structural Diff
+Kampányverziók összehasonlítása Merkle-stílusú részfa hash-ekkel
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from decimal import Decimal
+
+
+class MerkleNode:
+    """AST subtree with a hash over its value and the hashes of its children"""
+
+    __slots__ = ('digest', 'value', 'children')
+
+    def __init__(self, digest, value, children=None):
+        self.digest = digest
+        self.value = value
+        self.children = children
+
+
+def _digest(*parts):
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part)
+        h.update(b'\0')
+    return h.digest()
+
+
+def _plain(value):
+    """JSON fallback for leaf values; equal amounts ($12.5, $12.50) hash alike"""
+    if isinstance(value, Decimal):
+        return str(value.normalize())
+    return str(value)
+
+
+def _keyed_items(items):
+    """Content lists are matched by item name, everything else is a leaf"""
+    if items and all(isinstance(item, dict) and 'name' in item for item in items):
+        keyed = {}
+        for item in items:
+            keyed.setdefault(item['name'], item)
+        if len(keyed) == len(items):
+            return keyed
+    return None
+
+
+def build_tree(node):
+    """Build the Merkle tree of an AST (campaign dict or any subtree)"""
+    if isinstance(node, list):
+        keyed = _keyed_items(node)
+        if keyed is not None:
+            node = keyed
+    if isinstance(node, dict):
+        children = {key: build_tree(value) for key, value in node.items()}
+        parts = [b'{']
+        for key in sorted(children):
+            parts.append(str(key).encode('utf-8'))
+            parts.append(children[key].digest)
+        return MerkleNode(_digest(*parts), node, children)
+    leaf = json.dumps(node, sort_keys=True, default=_plain, ensure_ascii=False)
+    return MerkleNode(_digest(type(node).__name__.encode(), leaf.encode('utf-8')), node)
+
+
+def diff_trees(old, new, path=()):
+    """Yield changes between two Merkle trees
+
+    Each change is a dict with ``op`` ('added', 'removed' or 'changed'), the
+    ``path`` of keys leading to the subtree and its ``old``/``new`` values.
+    Subtrees with equal hashes are skipped without being visited.
+    """
+    if old.digest == new.digest:
+        return
+    if old.children is None or new.children is None:
+        yield {'op': 'changed', 'path': path, 'old': old.value, 'new': new.value}
+        return
+    for key, child in old.children.items():
+        if key not in new.children:
+            yield {'op': 'removed', 'path': path + (key,), 'old': child.value, 'new': None}
+        else:
+            yield from diff_trees(child, new.children[key], path + (key,))
+    for key, child in new.children.items():
+        if key not in old.children:
+            yield {'op': 'added', 'path': path + (key,), 'old': None, 'new': child.value}
+
+
+def diff_campaigns(old_ast, new_ast):
+    """List of structural changes between two campaign ASTs"""
+    return list(diff_trees(build_tree(old_ast), build_tree(new_ast)))
+
+
+def format_change(change):
+    """One-line human readable description of a change"""
+    path = "/".join(str(key) for key in change['path']) or "<root>"
+    if change['op'] == 'added':
+        return f"+ {path}"
+    if change['op'] == 'removed':
+        return f"- {path}"
+    old = json.dumps(change['old'], ensure_ascii=False, default=str)
+    new = json.dumps(change['new'], ensure_ascii=False, default=str)
+    return f"~ {path}: {old} -> {new}"
+
+
+def main(argv=None):
+    """Command line interface: diff two campaign files"""
+    from modules import ModuleLoader
+    from parser import SocialMediaContentParser, print_failure
+
+    arg_parser = argparse.ArgumentParser(description="Structural diff of two campaign files")
+    arg_parser.add_argument('old', help="Old version (.smp)")
+    arg_parser.add_argument('new', help="New version (.smp)")
+    arg_parser.add_argument('--json', action='store_true', help="Print changes as JSON")
+    args = arg_parser.parse_args(argv)
+
+    loader = ModuleLoader(SocialMediaContentParser(verbose=False))
+    results = [loader.load(args.old), loader.load(args.new)]
+    for path, result in zip((args.old, args.new), results):
+        if not result['success']:
+            print_failure(path, result, file=sys.stderr)
+            return 2
+
+    changes = diff_campaigns(results[0]['ast'], results[1]['ast'])
+    if args.json:
+        print(json.dumps([dict(change, path=list(change['path'])) for change in changes],
+                         indent=2, ensure_ascii=False, default=str))
+    else:
+        for change in changes:
+            print(format_change(change))
+    return 1 if changes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Dispatch Scheduler
+Több kampány időrendi publikálási sora platformonkénti rate limittel
+"""
+
+import heapq
+from abc import ABC, abstractmethod
+import time
+from datetime import timedelta
+from itertools import count
+
+from schedule import campaign_window, expand_schedule
+
+
+class TokenBucket:
+    """Token bucket measured against schedule time
+
+    ``rate`` tokens are added per second up to ``capacity``; every post
+    consumes one token.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("Rate limit must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = None
+
+    def _refill(self, moment):
+        if self.updated is not None and moment > self.updated:
+            elapsed = (moment - self.updated).total_seconds()
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        if self.updated is None or moment > self.updated:
+            self.updated = moment
+
+    def acquire(self, moment):
+        """Take a token at ``moment``; return None on success or the retry time"""
+        self._refill(moment)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return None
+        return self.updated + timedelta(seconds=(1 - self.tokens) / self.rate)
+
+
+class Publisher(ABC):
+    """Interface of the objects posts are handed to
+
+    Subclasses must implement ``publish``; one that does not cannot be
+    instantiated.
+    """
+
+    @abstractmethod
+    def publish(self, post):
+        """Hand one post dict over to the platform"""
+
+
+class InMemoryPublisher(Publisher):
+    """Publisher stand-in that keeps every post in a list"""
+
+    def __init__(self):
+        self.posts = []
+
+    def publish(self, post):
+        self.posts.append(post)
+
+
+class Dispatcher:
+    """Merges the schedules of many campaigns into one time-ordered publish queue
+
+    Each content item contributes a lazy occurrence stream; the heap only
+    holds the next occurrence of every stream plus the posts of occurrences
+    being fanned out or deferred by a rate limit, so memory does not grow
+    with the number of occurrences.
+
+    ``rate_limits`` maps platform names to a rate in posts per second or to
+    a ``(rate, burst)`` pair.  Without a ``clock`` the dispatcher runs in
+    schedule time (useful for simulation and tests); with a ``clock``
+    returning the current datetime it sleeps until each post is due.
+    """
+
+    def __init__(self, publisher, rate_limits=None, clock=None, sleep=time.sleep):
+        self.publisher = publisher
+        self.buckets = {}
+        for platform, limit in (rate_limits or {}).items():
+            rate, burst = limit if isinstance(limit, tuple) else (limit, None)
+            self.buckets[platform] = TokenBucket(rate, burst)
+        self.clock = clock
+        self.sleep = sleep
+        self.failed = []
+        self.dispatched = 0
+        self.deferred = 0
+        self._heap = []
+        self._seq = count()
+
+    def __len__(self):
+        """Number of entries currently waiting in the heap"""
+        return len(self._heap)
+
+    def add_campaign(self, ast, start):
+        """Queue every scheduled content item of a campaign starting at ``start``"""
+        window_start, window_end = campaign_window(ast, start)
+        for item in ast['body']['content']:
+            schedule = item['properties'].get('schedule')
+            if not schedule:
+                continue
+            stream = expand_schedule(schedule, window_start, window_end)
+            self._advance(stream, ast, item)
+
+    def _advance(self, stream, campaign, item):
+        moment = next(stream, None)
+        if moment is not None:
+            heapq.heappush(self._heap, (moment, next(self._seq), campaign, item, stream))
+
+    def next_post(self, until=None):
+        """Pop the next post in dispatch order, or None when nothing is due"""
+        while self._heap:
+            moment = self._heap[0][0]
+            if until is not None and moment > until:
+                return None
+            moment, _, campaign, item, stream = heapq.heappop(self._heap)
+            if stream is not None:
+                # Fan the occurrence out to one post per platform
+                self._advance(stream, campaign, item)
+                for platform in campaign['body']['platforms']:
+                    post = {
+                        'campaign': campaign['name'],
+                        'content': item['name'],
+                        'type': item['type'],
+                        'platform': platform,
+                        'scheduled_at': moment,
+                        'dispatch_at': moment,
+                        'properties': item['properties']
+                    }
+                    heapq.heappush(self._heap, (moment, next(self._seq), campaign, post, None))
+                continue
+            post = item
+            bucket = self.buckets.get(post['platform'])
+            retry = bucket.acquire(moment) if bucket else None
+            if retry is not None:
+                # Held back by the platform's rate limit
+                self.deferred += 1
+                heapq.heappush(self._heap, (retry, next(self._seq), campaign, post, None))
+                continue
+            post['dispatch_at'] = moment
+            return post
+        return None
+
+    def posts(self, until=None):
+        """Yield posts in dispatch order without publishing them"""
+        while True:
+            post = self.next_post(until)
+            if post is None:
+                return
+            yield post
+
+    def run(self, until=None, limit=None):
+        """Publish due posts (all of them, or those up to ``until``); return the count"""
+        published = 0
+        handled = 0
+        while limit is None or handled < limit:
+            post = self.next_post(until)
+            if post is None:
+                break
+            if self.clock is not None:
+                wait = (post['dispatch_at'] - self.clock()).total_seconds()
+                if wait > 0:
+                    self.sleep(wait)
+            try:
+                self.publisher.publish(post)
+            except Exception as e:
+                self.failed.append((post, e))
+            else:
+                published += 1
+            handled += 1
+            self.dispatched += 1
+        return published
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Schedule Cardinality Estimator
+Posztszámok zárt alakú kiszámítása ütemezésenként és posztonkénti költség a teljes költségvetésből
+"""
+
+import argparse
+import sys
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from schedule import MINUTES_PER_DAY, UNIT_SECONDS, campaign_window, duration_delta, weekday_number
+
+MINUTE_US = 60_000_000
+
+
+def _microseconds(moment):
+    return ((moment.toordinal() * 86400 + moment.hour * 3600 + moment.minute * 60 + moment.second)
+            * 1_000_000 + moment.microsecond)
+
+
+def _floor_sum(n, m, a, b):
+    """sum(floor((a * i + b) / m) for i in range(n)) in O(log m), for a, b >= 0"""
+    total = 0
+    while True:
+        if a >= m:
+            total += n * (n - 1) // 2 * (a // m)
+            a %= m
+        if b >= m:
+            total += n * (b // m)
+            b %= m
+        y_max = a * n + b
+        if y_max < m:
+            return total
+        n, b = divmod(y_max, m)
+        m, a = a, m
+
+
+def _count_grid(times, first, last, step=1, phase=0, first_day=None, last_day=None):
+    """Occurrences of the minutes-of-day ``times`` (sorted, unique) on every
+    ``step``-th day (day ordinals ``d % step == phase``) within the absolute
+    minutes [first, last] and the days [first_day, last_day]
+
+    Every time counts once per matching day, less the times before the
+    start on the first day and after the end on the last day.
+    """
+    if last < first:
+        return 0
+    first_ord, first_tod = divmod(first, MINUTES_PER_DAY)
+    last_ord, last_tod = divmod(last, MINUTES_PER_DAY)
+    low = first_ord if first_day is None or first_day < first_ord else first_day
+    high = last_ord if last_day is None or last_day > last_ord else last_day
+    if high < low:
+        return 0
+    start_day = low + (phase - low) % step
+    if start_day > high:
+        return 0
+    count = len(times) * ((high - start_day) // step + 1)
+    if low == first_ord and start_day == first_ord:
+        count -= bisect_left(times, first_tod)
+    if high == last_ord and (last_ord - phase) % step == 0:
+        count -= len(times) - bisect_right(times, last_tod)
+    return count
+
+
+def _count_continuous(schedule, start, end):
+    """every(N minutes/hours) without anchors: start, start + N, ... before the end"""
+    step = schedule['every']['value'] * UNIT_SECONDS[schedule['every']['unit']] // 60
+    until = schedule.get('until')
+    if isinstance(until, date):
+        end = min(end, datetime.combine(until + timedelta(days=1), datetime.min.time(), start.tzinfo))
+    span = _microseconds(end) - _microseconds(start)
+    if span <= 0:
+        return 0
+    count = -(-span // (step * MINUTE_US))
+    if not isinstance(until, int):
+        return count
+    # Only moments whose time of day is at most ``until``: (m0 + k * step) % 1440 <= until,
+    # i.e. floor((m0 + k * step) / 1440) - floor((m0 + k * step - until - 1) / 1440)
+    m0 = (_microseconds(start) // MINUTE_US) % MINUTES_PER_DAY
+    shifted = m0 - until - 1 + MINUTES_PER_DAY
+    return (_floor_sum(count, MINUTES_PER_DAY, step, m0)
+            - (_floor_sum(count, MINUTES_PER_DAY, step, shifted) - count))
+
+
+def _window(start, end):
+    """First whole minute at or after ``start`` and last one before ``end``"""
+    return -(-_microseconds(start) // MINUTE_US), -(-_microseconds(end) // MINUTE_US) - 1
+
+
+def count_posts(schedule, start, end):
+    """Number of datetimes expand_schedule(schedule, start, end) yields, in closed form
+
+    The cost depends on the number of "HH:MM" times, not on the length of
+    the window.
+    """
+    if end <= start:
+        return 0
+    return _count(schedule, start, end, *_window(start, end))
+
+
+def _count(schedule, start, end, first, last):
+    kind = schedule['type']
+    times = sorted(set(schedule['times']))
+    if kind == 'daily':
+        return _count_grid(times, first, last)
+    if kind == 'weekly':
+        # Ordinal 1 (0001-01-01) is a Monday
+        return _count_grid(times, first, last, 7, (weekday_number(schedule['day']) + 1) % 7)
+    if kind == 'at':
+        # Each time once, on the start day or, if already past, the day after
+        day = start.toordinal() * MINUTES_PER_DAY
+        count = 0
+        for minutes in times:
+            moment = day + minutes if day + minutes >= first else day + minutes + MINUTES_PER_DAY
+            count += moment <= last
+        return count
+    if kind != 'interval':
+        raise ValueError(f"Unknown schedule type: {kind}")
+
+    until = schedule.get('until')
+    last_day = until.toordinal() if isinstance(until, date) else None
+    if schedule['every']['unit'] not in ('minutes', 'hours'):
+        step = duration_delta(schedule['every']).days
+        if step <= 0:
+            return 0
+        times = times or [start.hour * 60 + start.minute]
+        if isinstance(until, int):
+            times = [t for t in times if t <= until]
+        return _count_grid(times, first, last, step, start.toordinal() % step, start.toordinal(), last_day)
+    step = schedule['every']['value'] * UNIT_SECONDS[schedule['every']['unit']] // 60
+    if step <= 0:
+        return 0
+    if not times:
+        return _count_continuous(schedule, start, end)
+    # Anchored: every day from each anchor in steps of N up to the until time
+    cutoff = until if isinstance(until, int) else MINUTES_PER_DAY - 1
+    minutes = set()
+    for anchor in times:
+        minutes.update(range(anchor, cutoff + 1, step))
+    return _count_grid(sorted(minutes), first, last, last_day=last_day)
+
+
+def _start(start):
+    if isinstance(start, datetime):
+        return start
+    return datetime.combine(start, datetime.min.time())
+
+
+def estimate_campaign(ast, start):
+    """Post counts and cost per post of a campaign starting at ``start``
+
+    Returns a dict with the campaign ``name``, ``items`` (post count per
+    content item), ``posts`` (their sum), ``publications`` (posts times
+    platforms, as every post goes to each platform), the budget ``total``
+    and ``cost_per_post`` / ``cost_per_publication`` rounded to cents
+    (None without a literal budget or without posts).  Items taken from
+    unresolved ``use`` references have no schedule and count 0.
+    """
+    window_start, window_end = campaign_window(ast, _start(start))
+    first, last = _window(window_start, window_end)
+    body = ast['body']
+    items = {}
+    for item in body['content']:
+        schedule = item.get('properties', {}).get('schedule')
+        count = _count(schedule, window_start, window_end, first, last) if schedule else 0
+        items[item['name']] = items.get(item['name'], 0) + count
+    posts = sum(items.values())
+    publications = posts * len(body['platforms'])
+    total = (body.get('budget') or {}).get('total')
+    cent = Decimal('0.01')
+    return {
+        'name': ast['name'],
+        'items': items,
+        'posts': posts,
+        'publications': publications,
+        'total': total,
+        'cost_per_post': (total / posts).quantize(cent) if total is not None and posts else None,
+        'cost_per_publication': (total / publications).quantize(cent) if total is not None and publications else None
+    }
+
+
+def estimate_campaigns(asts, start):
+    """Lazily estimate many campaigns (``start``: one date/datetime or one per campaign)"""
+    starts = start if isinstance(start, (list, tuple)) else None
+    for index, ast in enumerate(asts):
+        yield estimate_campaign(ast, starts[index] if starts is not None else start)
+
+
+def main(argv=None):
+    """Command line interface: post counts and cost per post of campaign files"""
+    arg_parser = argparse.ArgumentParser(description="Estimate post counts and cost per post")
+    arg_parser.add_argument('files', nargs='+', help="Campaign files (.smp)")
+    arg_parser.add_argument('--start', type=date.fromisoformat, default=date.today(),
+                            help="Campaign start date, YYYY-MM-DD (default: today)")
+    arg_parser.add_argument('--items', action='store_true', help="List the post count of every content item")
+    args = arg_parser.parse_args(argv)
+
+    from parser import SocialMediaContentParser, print_failure
+
+    parser = SocialMediaContentParser(backend='fast', verbose=False)
+    status = 0
+    for path, result in parser.parse_files(args.files):
+        if not result['success']:
+            print_failure(path, result, file=sys.stderr)
+            status = 1
+            continue
+        estimate = estimate_campaign(result['ast'], args.start)
+        cost = f"${estimate['cost_per_post']}/post" if estimate['cost_per_post'] is not None else "no budget"
+        print(f"{estimate['name']}: {estimate['posts']} posts, {estimate['publications']} publications, {cost}")
+        if args.items:
+            for name, count in estimate['items'].items():
+                print(f"  {name}: {count}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Fast Recursive-Descent Parser
+Kézzel írt tokenizáló és rekurzív leszálló parser a grammar.lark nyelvtanhoz
+"""
+
+import re
+from datetime import date
+from decimal import Decimal
+
+# Terminals of grammar.lark; keep these in sync with the grammar file
+_IGNORE = re.compile(r'(?:[ \t\f\r\n]+|//[^\n]*)*')
+_STRING = re.compile(r'"[^"]*"')
+_NUMBER = re.compile(r'\d+')
+_TIME = re.compile(r'"([01]\d|2[0-3]):[0-5]\d"')
+_DATE = re.compile(r'"\d{4}-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])"')
+_MONEY = re.compile(r'\$\d+(\.\d{1,2})?')
+_HASHTAG = re.compile(r'"#[^"\s#,]+"')
+
+PLATFORMS = ('instagram', 'facebook', 'twitter', 'tiktok', 'linkedin', 'youtube')
+CONTENT_TYPES = ('post', 'story', 'reel', 'video', 'image')
+TIME_UNITS = ('days', 'hours', 'minutes', 'weeks', 'months')
+CONTENT_PROPERTIES = ('text', 'media', 'hashtags', 'schedule')
+
+
+class FastSyntaxError(Exception):
+    """Syntax error raised by the fast parser
+
+    ``kind`` mirrors the Lark exception family the Earley parser raises for
+    the same input: 'LexError' when no terminal matches at a position and
+    'ParseError' for an unexpected end of input (line and column are -1).
+    """
+
+    def __init__(self, kind, message, line, column):
+        super().__init__(message)
+        self.kind = kind
+        self.line = line
+        self.column = column
+
+
+class FastParser:
+    """Hand-written parser producing the same AST as the Lark backend
+
+    Like Lark's dynamic Earley lexer it matches terminals on demand at the
+    current position, so keywords are plain prefixes and an error is
+    reported at the first character where no expected terminal matches.
+    """
+
+    def __init__(self, string_pool=None):
+        self.string_pool = string_pool
+        self.text = ''
+        self.pos = 0
+        self._value_error = None
+
+    # ===== ENTRY POINT =====
+
+    def parse(self, text, start='start'):
+        """Parse ``text`` and return the AST (start symbol 'start' or 'module')"""
+        self.text = text
+        self.pos = 0
+        self._value_error = None
+        if start == 'start':
+            result = self._start()
+        elif start == 'module':
+            result = self._module()
+        else:
+            raise ValueError(f"Unknown start symbol: {start}")
+        if self._skip() < len(text):
+            self._fail(['end of input'])
+        if self._value_error is not None:
+            # Lark converts values after parsing, so syntax errors win
+            raise self._value_error
+        return result
+
+    # ===== SCANNING =====
+
+    def _skip(self):
+        self.pos = _IGNORE.match(self.text, self.pos).end()
+        return self.pos
+
+    def _fail(self, expected):
+        pos = self.pos
+        text = self.text
+        expected_list = "".join(f"\n\t* {name}" for name in expected)
+        if pos >= len(text):
+            raise FastSyntaxError(
+                'ParseError', f"Unexpected end-of-input. Expected one of: {expected_list}\n", -1, -1)
+        line = text.count('\n', 0, pos) + 1
+        column = pos - text.rfind('\n', 0, pos)
+        before = text[max(pos - 40, 0):pos].rsplit('\n', 1)[-1]
+        after = text[pos:pos + 40].split('\n', 1)[0]
+        context = before + after + '\n' + ' ' * len(before.expandtabs()) + '^\n'
+        raise FastSyntaxError(
+            'LexError',
+            f"No terminal matches '{text[pos]}' in the current parser context, "
+            f"at line {line} col {column}\n\n{context}\nExpected one of: {expected_list}\n",
+            line, column)
+
+    def _peek(self, keyword):
+        """True if ``keyword`` starts at the next significant position"""
+        return self.text.startswith(keyword, self._skip())
+
+    def _accept(self, keyword):
+        if self.text.startswith(keyword, self._skip()):
+            self.pos += len(keyword)
+            return True
+        return False
+
+    def _expect(self, keyword):
+        if not self._accept(keyword):
+            self._fail([repr(keyword)])
+
+    def _choice(self, keywords):
+        """Consume and return the first of ``keywords`` found next"""
+        pos = self._skip()
+        for keyword in keywords:
+            if self.text.startswith(keyword, pos):
+                self.pos = pos + len(keyword)
+                return keyword
+        self._fail([repr(keyword) for keyword in keywords])
+
+    def _match(self, pattern, name):
+        m = pattern.match(self.text, self._skip())
+        if m is None:
+            self._fail([name])
+        self.pos = m.end()
+        return m
+
+    def _terminal(self, pattern, name):
+        return self._match(pattern, name).group()
+
+    def _string(self):
+        return self._terminal(_STRING, 'STRING')[1:-1]
+
+    def _intern(self, value):
+        if self.string_pool is None:
+            return value
+        return self.string_pool.intern(value)
+
+    def _minutes(self, token):
+        return int(token[1:3]) * 60 + int(token[4:6])
+
+    # ===== TOP LEVEL =====
+
+    def _preamble(self):
+        imports = []
+        definitions = []
+        while self._accept('import'):
+            imports.append(self._string())
+        while self._accept('define'):
+            definitions.append(self._block_definition())
+        return imports, definitions
+
+    def _start(self):
+        imports, definitions = self._preamble()
+        if not self._peek('campaign'):
+            self._fail(["'import'", "'define'", "'campaign'"])
+        campaign = self._campaign_definition()
+        if imports or definitions:
+            campaign['imports'] = imports
+            campaign['definitions'] = definitions
+        return campaign
+
+    def _module(self):
+        imports, definitions = self._preamble()
+        campaign = None
+        if self._peek('campaign'):
+            campaign = self._campaign_definition()
+        return {
+            'type': 'module',
+            'imports': imports,
+            'definitions': definitions,
+            'campaign': campaign
+        }
+
+    def _block_definition(self):
+        if self._accept('targeting'):
+            name = self._string()
+            self._expect('{')
+            return {'kind': 'targeting', 'name': name, 'value': self._targeting_rules()}
+        if self._accept('budget'):
+            name = self._string()
+            self._expect('{')
+            return {'kind': 'budget', 'name': name, 'value': self._budget_rules()}
+        content_type = self._intern(self._choice(('targeting', 'budget') + CONTENT_TYPES))
+        item = self._content_body(content_type)
+        return {'kind': 'content', 'name': item['name'], 'value': item}
+
+    # ===== CAMPAIGN =====
+
+    def _campaign_definition(self):
+        self._expect('campaign')
+        name = self._string()
+        self._expect('duration')
+        self._expect('(')
+        duration = self._duration_value()
+        self._expect(')')
+        self._expect('{')
+        body = self._campaign_body()
+        self._expect('}')
+        return {
+            'type': 'campaign',
+            'name': name,
+            'duration': duration,
+            'body': body
+        }
+
+    def _campaign_body(self):
+        self._expect('platforms')
+        self._expect(':')
+        self._expect('[')
+        platforms = [self._intern(self._choice(PLATFORMS))]
+        while self._accept(','):
+            platforms.append(self._intern(self._choice(PLATFORMS)))
+        self._expect(']')
+
+        self._expect('content_types')
+        self._expect('{')
+        content = [self._content_item()]
+        while not self._accept('}'):
+            content.append(self._content_item())
+
+        targeting = None
+        budget = None
+        if self._accept('targeting'):
+            self._expect('{')
+            targeting = self._targeting_rules()
+            targeting['optional'] = self._accept('optional')
+        elif self._peek('use'):
+            # "use targeting" or "use budget": decide after the keyword
+            saved = self.pos
+            self.pos += len('use')
+            if self._accept('targeting'):
+                targeting = {'use': self._string(), 'optional': self._accept('optional')}
+            else:
+                self.pos = saved
+        if self._accept('budget'):
+            self._expect('{')
+            budget = self._budget_rules()
+            budget['optional'] = self._accept('optional')
+        elif self._accept('use'):
+            if not self._accept('budget'):
+                self._fail(["'budget'"] if targeting is not None else ["'targeting'", "'budget'"])
+            budget = {'use': self._string(), 'optional': self._accept('optional')}
+
+        result = {
+            'platforms': platforms,
+            'content': content
+        }
+        if targeting:
+            result['targeting'] = targeting
+        if budget:
+            result['budget'] = budget
+        return result
+
+    # ===== CONTENT =====
+
+    def _content_item(self):
+        if self._accept('use'):
+            template = self._string()
+            name = self._string() if self._accept('as') else template
+            return {'type': 'use', 'template': template, 'name': name}
+        content_type = self._intern(self._choice(CONTENT_TYPES + ('use',)))
+        return self._content_body(content_type)
+
+    def _content_body(self, content_type):
+        name = self._string()
+        self._expect('{')
+        properties = {}
+        properties.update(self._content_property())
+        while not self._accept('}'):
+            properties.update(self._content_property())
+        return {
+            'type': content_type,
+            'name': name,
+            'properties': properties
+        }
+
+    def _content_property(self):
+        prop = self._choice(CONTENT_PROPERTIES)
+        self._expect(':')
+        if prop == 'text':
+            return {'text': self._string()}
+        if prop == 'media':
+            return {'media': self._string(), 'optional': self._accept('optional')}
+        if prop == 'hashtags':
+            self._expect('[')
+            hashtags = [self._intern(self._terminal(_HASHTAG, 'HASHTAG')[1:-1])]
+            while self._accept(','):
+                hashtags.append(self._intern(self._terminal(_HASHTAG, 'HASHTAG')[1:-1]))
+            self._expect(']')
+            return {'hashtags': hashtags}
+        return {'schedule': self._schedule_expression()}
+
+    # ===== SCHEDULES =====
+
+    def _schedule_expression(self):
+        kind = self._choice(('daily', 'every_day', 'weekly', 'every', 'at'))
+        if kind in ('daily', 'every_day'):
+            self._expect('at')
+            return {'type': 'daily', 'times': self._time_list()}
+        if kind == 'weekly':
+            self._expect('on')
+            self._expect('(')
+            day = self._intern(self._string())
+            self._expect(')')
+            self._expect('at')
+            return {'type': 'weekly', 'day': day, 'times': self._time_list()}
+        if kind == 'at':
+            return {'type': 'at', 'times': self._time_list()}
+
+        self._expect('(')
+        value = int(self._terminal(_NUMBER, 'NUMBER'))
+        unit = self._intern(self._choice(TIME_UNITS))
+        self._expect(')')
+        times = []
+        until = None
+        if self._accept('at'):
+            times = self._time_list()
+        if self._accept('until'):
+            self._expect('(')
+            until = self._until_value()
+            self._expect(')')
+        return {
+            'type': 'interval',
+            'every': {'value': value, 'unit': unit},
+            'times': times,
+            'until': until
+        }
+
+    def _time_list(self):
+        self._expect('(')
+        times = [self._minutes(self._terminal(_TIME, 'TIME'))]
+        while self._accept(','):
+            times.append(self._minutes(self._terminal(_TIME, 'TIME')))
+        self._expect(')')
+        return times
+
+    def _until_value(self):
+        pos = self._skip()
+        m = _DATE.match(self.text, pos)
+        if m is None:
+            return self._minutes(self._terminal(_TIME, 'TIME'))
+        self.pos = m.end()
+        token = m.group()
+        try:
+            return date.fromisoformat(token[1:-1])
+        except ValueError as e:
+            if self._value_error is None:
+                line = self.text.count('\n', 0, pos) + 1
+                column = pos - self.text.rfind('\n', 0, pos)
+                self._value_error = ValueError(
+                    f"Invalid date {token} at line {line}, column {column}: {e}")
+                self._value_error.line = line
+                self._value_error.column = column
+            return None
+
+    # ===== TARGETING AND BUDGET =====
+
+    def _string_list(self):
+        self._expect('[')
+        values = [self._intern(self._string())]
+        while self._accept(','):
+            values.append(self._intern(self._string()))
+        self._expect(']')
+        return values
+
+    def _targeting_rules(self):
+        rules = {}
+        while True:
+            rule = self._choice(('age_range', 'interests', 'location'))
+            self._expect(':')
+            if rule == 'age_range':
+                min_age = int(self._terminal(_NUMBER, 'NUMBER'))
+                self._expect('to')
+                max_age = int(self._terminal(_NUMBER, 'NUMBER'))
+                rules.update({'age_range': {'min': min_age, 'max': max_age}})
+            elif rule == 'interests':
+                rules.update({'interests': self._string_list()})
+            else:
+                locations = self._string_list()
+                rules.update({'location': locations, 'location_optional': self._accept('optional')})
+            if self._accept('}'):
+                return rules
+
+    def _budget_rules(self):
+        rules = {}
+        while True:
+            rule = self._choice(('total', 'daily_limit', 'auto_optimize'))
+            self._expect(':')
+            if rule == 'total':
+                rules.update({'total': self._money()})
+            elif rule == 'daily_limit':
+                amount = self._money()
+                rules.update({'daily_limit': amount, 'daily_limit_optional': self._accept('optional')})
+            else:
+                rules.update({'auto_optimize': self._choice(('true', 'false')) == 'true'})
+            if self._accept('}'):
+                return rules
+
+    def _money(self):
+        return Decimal(self._terminal(_MONEY, 'MONEY')[1:])
+
+    def _duration_value(self):
+        value = int(self._terminal(_NUMBER, 'NUMBER'))
+        return {'value': value, 'unit': self._intern(self._choice(TIME_UNITS))}
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Feasibility Rules
+Mezők közötti megvalósíthatósági szabályok kampánykötegekre, oszlopos kiértékeléssel
+"""
+
+import math
+from datetime import date, datetime, timedelta
+
+from schedule import UNIT_SECONDS
+from timezones import resolve_locations
+
+SECONDS_PER_DAY = 86400
+
+RULES = []
+
+
+def rule(code, name, severity, scope='schedule'):
+    """Register a batch rule
+
+    The function yields ``(row, message)`` or ``(row, message, severity)``
+    where ``row`` indexes the campaign columns (``scope='campaign'``) or
+    the schedule columns (``scope='schedule'``).
+    """
+    def register(function):
+        RULES.append({'code': code, 'name': name, 'severity': severity, 'scope': scope, 'check': function})
+        return function
+    return register
+
+
+def _seconds(duration):
+    if not isinstance(duration, dict) or duration.get('unit') not in UNIT_SECONDS:
+        return None
+    return duration['value'] * UNIT_SECONDS[duration['unit']]
+
+
+class FeasibilityBatch:
+    """Columns of the fields the rules look at, for a whole batch of campaigns
+
+    Campaign-level values are one list per field indexed by campaign; every
+    scheduled content item is a row of the schedule columns pointing back to
+    its campaign.  Rules run once per batch over these columns instead of
+    walking each AST.  Missing or unresolved fields (``use`` references)
+    are None and the rules skip them.
+    """
+
+    def __init__(self, asts=(), start=None):
+        asts = list(asts)
+        starts = start if isinstance(start, (list, tuple)) else [start] * len(asts)
+        if len(starts) != len(asts):
+            raise ValueError("Need one start per campaign")
+        self.names = []
+        self.duration = []
+        self.end_day = []
+        self.total = []
+        self.daily_limit = []
+        self.daily_limit_optional = []
+        self.locations = []
+        self.location_optional = []
+        # One row per scheduled content item
+        self.campaign = []
+        self.item = []
+        self.kind = []
+        self.every = []
+        self.until_date = []
+        for ast, begin in zip(asts, starts):
+            self.add(ast, begin)
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, ast, start=None):
+        """Append a campaign's columns (the AST itself is not kept); returns its index"""
+        index = len(self.names)
+        body = ast.get('body', {})
+        seconds = _seconds(ast.get('duration'))
+        self.names.append(ast.get('name'))
+        self.duration.append(seconds)
+        if start is not None and seconds is not None:
+            if not isinstance(start, datetime):
+                start = datetime.combine(start, datetime.min.time())
+            # The window end is exclusive
+            self.end_day.append((start + timedelta(seconds=seconds, microseconds=-1)).date())
+        else:
+            self.end_day.append(None)
+        budget = body.get('budget') or {}
+        self.total.append(budget.get('total'))
+        self.daily_limit.append(budget.get('daily_limit'))
+        self.daily_limit_optional.append(budget.get('daily_limit_optional', False))
+        targeting = body.get('targeting') or {}
+        self.locations.append(targeting.get('location'))
+        self.location_optional.append(targeting.get('location_optional', False))
+        for item in body.get('content', []):
+            schedule = item.get('properties', {}).get('schedule')
+            if not schedule:
+                continue
+            until = schedule.get('until')
+            self.campaign.append(index)
+            self.item.append(item.get('name'))
+            self.kind.append(schedule.get('type'))
+            self.every.append(_seconds(schedule.get('every')))
+            self.until_date.append(until if isinstance(until, date) else None)
+        return index
+
+
+# ===== RULES =====
+
+@rule('F101', 'daily-limit-shortfall', 'error', scope='campaign')
+def daily_limit_shortfall(batch):
+    """daily_limit times the campaign's days cannot reach the total budget"""
+    for index, (total, limit, seconds, optional) in enumerate(zip(
+            batch.total, batch.daily_limit, batch.duration, batch.daily_limit_optional)):
+        if total is None or limit is None or seconds is None:
+            continue
+        days = math.ceil(seconds / SECONDS_PER_DAY)
+        if limit * days < total:
+            message = (f"daily_limit ${limit} over {days} day(s) spends at most "
+                       f"${limit * days}, below the total ${total}")
+            # An optional daily limit may be dropped, so the total stays reachable
+            yield index, message, 'warning' if optional else None
+
+
+@rule('F102', 'unknown-location', 'error', scope='campaign')
+def unknown_location(batch):
+    """targeting location that is neither a country code nor a time zone name"""
+    for index, (locations, optional) in enumerate(zip(batch.locations, batch.location_optional)):
+        for location in resolve_locations(locations or ())[1]:
+            message = f"location {location!r} has no known time zone, so local-time scheduling skips it"
+            # Optional locations may be dropped, like an optional daily limit
+            yield index, message, 'warning' if optional else None
+
+
+@rule('F201', 'until-after-end', 'warning')
+def until_after_end(batch):
+    """until("YYYY-MM-DD") falls after the campaign's last day"""
+    for row, (index, until) in enumerate(zip(batch.campaign, batch.until_date)):
+        end_day = batch.end_day[index]
+        if until is not None and end_day is not None and until > end_day:
+            yield row, f"until({until.isoformat()}) is after the campaign ends on {end_day.isoformat()}"
+
+
+@rule('F202', 'weekly-short-campaign', 'warning')
+def weekly_short_campaign(batch):
+    """weekly schedule on a campaign shorter than a week"""
+    week = UNIT_SECONDS['weeks']
+    for row, (index, kind) in enumerate(zip(batch.campaign, batch.kind)):
+        seconds = batch.duration[index]
+        if kind == 'weekly' and seconds is not None and seconds < week:
+            yield row, "weekly schedule on a campaign shorter than a week may never post"
+
+
+@rule('F203', 'interval-exceeds-duration', 'warning')
+def interval_exceeds_duration(batch):
+    """every(N unit) interval longer than the whole campaign"""
+    for row, (index, every) in enumerate(zip(batch.campaign, batch.every)):
+        seconds = batch.duration[index]
+        if every is not None and seconds is not None and every > seconds:
+            yield row, "every(...) interval is longer than the campaign, so it posts at most once"
+
+
+# ===== ENGINE =====
+
+def check_feasibility(asts, start=None, rules=None):
+    """Evaluate the feasibility rules over a batch of campaign ASTs
+
+    ``start`` is the campaign start (a date or datetime, or one per
+    campaign); rules about calendar dates are skipped without it.  Returns
+    findings ordered by campaign, each a dict with the rule ``code``,
+    ``name`` and ``severity``, the campaign ``index`` and ``campaign``
+    name, the content ``item`` (None for campaign-level rules) and a
+    ``message``.
+    """
+    batch = asts if isinstance(asts, FeasibilityBatch) else FeasibilityBatch(asts, start)
+    findings = []
+    for entry in rules if rules is not None else RULES:
+        item_rule = entry['scope'] == 'schedule'
+        for hit in entry['check'](batch):
+            row, message = hit[0], hit[1]
+            severity = hit[2] if len(hit) > 2 and hit[2] else entry['severity']
+            index = batch.campaign[row] if item_rule else row
+            findings.append({
+                'code': entry['code'],
+                'name': entry['name'],
+                'severity': severity,
+                'index': index,
+                'campaign': batch.names[index],
+                'item': batch.item[row] if item_rule else None,
+                'message': message
+            })
+    findings.sort(key=lambda finding: finding['index'])
+    return findings
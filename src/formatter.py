@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Canonical Formatter
+AST visszaalakítása DSL szöveggé, kanonikus alak és tartalom-hash a duplikátumszűréshez
+"""
+
+import argparse
+import hashlib
+import sys
+from decimal import Decimal
+
+from parser import minutes_to_time
+
+INDENT = "    "
+
+PROPERTY_ORDER = ('text', 'media', 'hashtags', 'schedule')
+
+
+def _quoted(value):
+    return f'"{value}"'
+
+
+def _list(values, quote=True):
+    return ", ".join(_quoted(value) if quote else str(value) for value in values)
+
+
+def _times(times):
+    return ", ".join(_quoted(minutes_to_time(minutes)) for minutes in times)
+
+
+def _money(amount):
+    # Decimal('1000') prints as $1000 and Decimal('12.50') as $12.50
+    return f"${amount}"
+
+
+def _optional(flag):
+    return " optional" if flag else ""
+
+
+def _schedule(schedule):
+    kind = schedule['type']
+    times = schedule.get('times') or []
+    if kind == 'daily':
+        return f"daily at({_times(times)})"
+    if kind == 'weekly':
+        return f"weekly on({_quoted(schedule['day'])}) at({_times(times)})"
+    if kind == 'at':
+        return f"at({_times(times)})"
+    every = schedule['every']
+    text = f"every({every['value']} {every['unit']})"
+    if times:
+        text += f" at({_times(times)})"
+    until = schedule.get('until')
+    if isinstance(until, int):
+        text += f" until({_quoted(minutes_to_time(until))})"
+    elif until is not None:
+        text += f" until({_quoted(until.isoformat())})"
+    return text
+
+
+def _properties(properties, out, depth):
+    pad = INDENT * depth
+    for key in PROPERTY_ORDER:
+        if key not in properties:
+            continue
+        value = properties[key]
+        if key == 'text':
+            out.append(f"{pad}text: {_quoted(value)}")
+        elif key == 'media':
+            out.append(f"{pad}media: {_quoted(value)}{_optional(properties.get('optional'))}")
+        elif key == 'hashtags':
+            out.append(f"{pad}hashtags: [{_list(value)}]")
+        else:
+            out.append(f"{pad}schedule: {_schedule(value)}")
+
+
+def _targeting_rules(rules, out, depth):
+    pad = INDENT * depth
+    if 'age_range' in rules:
+        out.append(f"{pad}age_range: {rules['age_range']['min']} to {rules['age_range']['max']}")
+    if 'interests' in rules:
+        out.append(f"{pad}interests: [{_list(rules['interests'])}]")
+    if 'location' in rules:
+        out.append(f"{pad}location: [{_list(rules['location'])}]{_optional(rules.get('location_optional'))}")
+
+
+def _budget_rules(rules, out, depth):
+    pad = INDENT * depth
+    if 'total' in rules:
+        out.append(f"{pad}total: {_money(rules['total'])}")
+    if 'daily_limit' in rules:
+        out.append(f"{pad}daily_limit: {_money(rules['daily_limit'])}{_optional(rules.get('daily_limit_optional'))}")
+    if 'auto_optimize' in rules:
+        out.append(f"{pad}auto_optimize: {'true' if rules['auto_optimize'] else 'false'}")
+
+
+def _content_item(item, out, depth):
+    pad = INDENT * depth
+    if item['type'] == 'use':
+        alias = f" as {_quoted(item['name'])}" if item['name'] != item['template'] else ""
+        out.append(f"{pad}use {_quoted(item['template'])}{alias}")
+        return
+    out.append(f"{pad}{item['type']} {_quoted(item['name'])} {{")
+    _properties(item['properties'], out, depth + 1)
+    out.append(f"{pad}}}")
+
+
+def _block(kind, block, write_rules, out, depth):
+    pad = INDENT * depth
+    if 'use' in block:
+        out.append(f"{pad}use {kind} {_quoted(block['use'])}{_optional(block.get('optional'))}")
+        return
+    out.append(f"{pad}{kind} {{")
+    write_rules(block, out, depth + 1)
+    out.append(f"{pad}}}{_optional(block.get('optional'))}")
+
+
+def _definition(definition, out):
+    kind, name, value = definition['kind'], _quoted(definition['name']), definition['value']
+    if kind == 'content':
+        out.append(f"define {value['type']} {name} {{")
+        _properties(value['properties'], out, 1)
+    else:
+        out.append(f"define {kind} {name} {{")
+        (_targeting_rules if kind == 'targeting' else _budget_rules)(value, out, 1)
+    out.append("}")
+
+
+def _preamble(imports, definitions, out):
+    for path in imports:
+        out.append(f"import {_quoted(path)}")
+    if imports:
+        out.append("")
+    for definition in definitions:
+        _definition(definition, out)
+        out.append("")
+
+
+def _campaign(ast, out):
+    body = ast['body']
+    duration = ast['duration']
+    out.append(f"campaign {_quoted(ast['name'])} duration({duration['value']} {duration['unit']}) {{")
+    out.append(f"{INDENT}platforms: [{_list(body['platforms'], quote=False)}]")
+    out.append("")
+    out.append(f"{INDENT}content_types {{")
+    for index, item in enumerate(body['content']):
+        if index and item['type'] != 'use':
+            out.append("")
+        _content_item(item, out, 2)
+    out.append(f"{INDENT}}}")
+    if 'targeting' in body:
+        out.append("")
+        _block('targeting', body['targeting'], _targeting_rules, out, 1)
+    if 'budget' in body:
+        out.append("")
+        _block('budget', body['budget'], _budget_rules, out, 1)
+    out.append("}")
+
+
+def format_ast(ast):
+    """DSL source of a campaign AST (or a module dict), parsing back to the same AST
+
+    Comments are not part of the AST and are not reproduced; ``every_day``
+    is written as ``daily``.
+    """
+    out = []
+    if ast.get('type') == 'module':
+        _preamble(ast['imports'], ast['definitions'], out)
+        if ast['campaign'] is not None:
+            _campaign(ast['campaign'], out)
+        elif out:
+            out.pop()
+    else:
+        _preamble(ast.get('imports', ()), ast.get('definitions', ()), out)
+        _campaign(ast, out)
+    return "\n".join(out) + "\n"
+
+
+# ===== CANONICAL FORM =====
+
+def _unique_sorted(values, key=None):
+    return sorted(set(values if key is None else map(key, values)))
+
+
+def _canonical_properties(properties):
+    result = dict(properties)
+    if 'hashtags' in result:
+        # Platforms treat hashtags case-insensitively
+        result['hashtags'] = _unique_sorted(result['hashtags'], str.casefold)
+    schedule = result.get('schedule')
+    if schedule:
+        schedule = dict(schedule, times=_unique_sorted(schedule.get('times') or []))
+        if schedule['type'] == 'weekly':
+            schedule['day'] = schedule['day'].strip().casefold()
+        result['schedule'] = schedule
+    return result
+
+
+def _canonical_item(item):
+    if item['type'] == 'use':
+        return dict(item)
+    return dict(item, properties=_canonical_properties(item['properties']))
+
+
+def _canonical_targeting(rules):
+    rules = dict(rules)
+    for key in ('interests', 'location'):
+        if key in rules:
+            rules[key] = _unique_sorted(rules[key])
+    return rules
+
+
+def _canonical_money(amount):
+    # $12.5 and $12.50 are the same amount
+    return amount.quantize(Decimal(1) if amount == amount.to_integral_value() else Decimal('0.01'))
+
+
+def _canonical_budget(rules):
+    rules = dict(rules)
+    for key in ('total', 'daily_limit'):
+        if key in rules:
+            rules[key] = _canonical_money(rules[key])
+    return rules
+
+
+def _canonical_definition(definition):
+    value = definition['value']
+    if definition['kind'] == 'content':
+        value = _canonical_item(value)
+    elif definition['kind'] == 'targeting':
+        value = _canonical_targeting(value)
+    else:
+        value = _canonical_budget(value)
+    return dict(definition, value=value)
+
+
+def _canonical_campaign(ast):
+    body = dict(ast['body'])
+    body['platforms'] = _unique_sorted(body['platforms'])
+    body['content'] = sorted((_canonical_item(item) for item in body['content']),
+                             key=lambda item: item['name'])
+    if 'targeting' in body and 'use' not in body['targeting']:
+        body['targeting'] = _canonical_targeting(body['targeting'])
+    if 'budget' in body and 'use' not in body['budget']:
+        body['budget'] = _canonical_budget(body['budget'])
+    result = dict(ast, body=body)
+    if 'definitions' in result:
+        result['definitions'] = _canonical_definitions(result['definitions'])
+    return result
+
+
+def _canonical_definitions(definitions):
+    # A stable sort keeps the later of two same-named definitions last, so it still wins
+    return sorted((_canonical_definition(definition) for definition in definitions),
+                  key=lambda definition: (definition['kind'], definition['name']))
+
+
+def canonical_ast(ast):
+    """Copy of an AST with order-insensitive parts normalized
+
+    Platforms, interests, locations and schedule times are deduplicated and
+    sorted, hashtags are case-folded as well, weekdays are lower case, money
+    amounts have no trailing zeros beyond cents, and content items and shared
+    blocks are ordered by name.  Imports keep their
+    order, since later imports override earlier ones.
+    """
+    if ast.get('type') == 'module':
+        campaign = ast['campaign']
+        return dict(ast, definitions=_canonical_definitions(ast['definitions']),
+                    campaign=_canonical_campaign(campaign) if campaign is not None else None)
+    return _canonical_campaign(ast)
+
+
+def canonical_source(ast):
+    """Canonical DSL text: equal for campaigns differing only in layout, comments and order"""
+    return format_ast(canonical_ast(ast))
+
+
+def canonical_hash(ast):
+    """Stable hex content hash of the canonical form"""
+    return hashlib.blake2b(canonical_source(ast).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class Deduplicator:
+    """Content-addressed set of campaigns: one hash lookup per campaign
+
+    ``add`` returns the key of the first campaign with the same canonical
+    form, or None if the campaign is new.  Without a ``key`` a campaign is
+    keyed by its position in the sequence of ``add`` calls (0, 1, ...), so a
+    duplicate is never reported as None.
+    """
+
+    def __init__(self):
+        self.first = {}
+        self.added = 0
+
+    def __len__(self):
+        return len(self.first)
+
+    def __contains__(self, ast):
+        return canonical_hash(ast) in self.first
+
+    def add(self, ast, key=None):
+        if key is None:
+            key = self.added
+        self.added += 1
+        size = len(self.first)
+        original = self.first.setdefault(canonical_hash(ast), key)
+        return None if len(self.first) > size else original
+
+
+def deduplicate(asts):
+    """(unique ASTs, {index of a duplicate: index of its first copy})"""
+    seen = Deduplicator()
+    unique = []
+    duplicates = {}
+    for index, ast in enumerate(asts):
+        original = seen.add(ast)
+        if original is None:
+            unique.append(ast)
+        else:
+            duplicates[index] = original
+    return unique, duplicates
+
+
+def main(argv=None):
+    """Command line interface: print canonical forms or find duplicate campaigns"""
+    arg_parser = argparse.ArgumentParser(description="Format campaign files and find duplicates")
+    arg_parser.add_argument('files', nargs='+', help="Campaign files (.smp)")
+    arg_parser.add_argument('--canonical', action='store_true', help="Print the canonical form")
+    arg_parser.add_argument('--hash', action='store_true', help="Print the content hash of each file")
+    arg_parser.add_argument('--dedupe', action='store_true', help="List files duplicating an earlier one")
+    arg_parser.add_argument('--module', action='store_true', help="Parse importable modules (campaign optional)")
+    args = arg_parser.parse_args(argv)
+
+    from parser import SocialMediaContentParser, print_failure
+
+    parser = SocialMediaContentParser(backend='fast', verbose=False)
+    start = 'module' if args.module else 'start'
+    seen = Deduplicator()
+    status = 0
+    for path, result in parser.parse_files(args.files, start=start):
+        if not result['success']:
+            print_failure(path, result, file=sys.stderr)
+            status = 2
+            continue
+        ast = result['ast']
+        if args.hash:
+            print(f"{canonical_hash(ast)}  {path}")
+        elif args.dedupe:
+            original = seen.add(ast, path)
+            if original is not None:
+                print(f"{path} duplicates {original}")
+                status = max(status, 1)
+        else:
+            print(canonical_source(ast) if args.canonical else format_ast(ast), end="")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
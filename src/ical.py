@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+iCalendar Export
+Kampány-idővonal folyamatos iCalendar-exportja: RRULE-alapú ismétlődő események, ahol lehet, egyébként kibontva
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+from datetime import date, datetime, time, timedelta, timezone
+
+from formatter import canonical_hash
+from schedule import MINUTES_PER_DAY, UNIT_SECONDS, campaign_window, expand_schedule, weekday_number
+
+PRODID = "-//Social Media Content Planner//SMP Calendar Export//EN"
+# Right-hand side of every UID; pass a domain you own to publish calendars
+UID_DOMAIN = "social-media-planner.invalid"
+
+_BYDAY = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+
+
+def _start(start):
+    if isinstance(start, datetime):
+        return start
+    return datetime.combine(start, datetime.min.time())
+
+
+def _escape(text):
+    """TEXT value escaping (RFC 5545, 3.3.11)"""
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line):
+    """Content line folded at 75 octets, without splitting UTF-8 sequences"""
+    if len(line) <= 75 and line.isascii():
+        return line + '\r\n'
+    parts = []
+    current = []
+    size = 0
+    limit = 75
+    for char in line:
+        width = len(char.encode('utf-8'))
+        if size + width > limit:
+            parts.append(''.join(current))
+            current, size, limit = [], 0, 74
+        current.append(char)
+        size += width
+    parts.append(''.join(current))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _datetime(name, moment):
+    """DTSTART-style property: floating for naive times, TZID for zoneinfo zones, else UTC"""
+    if moment.tzinfo is None:
+        return f"{name}:{moment:%Y%m%dT%H%M%S}"
+    key = getattr(moment.tzinfo, 'key', None)
+    if key:
+        return f"{name};TZID={key}:{moment:%Y%m%dT%H%M%S}"
+    return f"{name}:{moment.astimezone(timezone.utc):%Y%m%dT%H%M%SZ}"
+
+
+def _at(day, minutes, tzinfo):
+    return datetime.combine(day, time(minutes // 60, minutes % 60), tzinfo)
+
+
+def _daily_series(first_day, step, minutes, start, end, until=None):
+    """(first datetime, count) of ``minutes`` on every ``step``-th day from
+    ``first_day`` that falls in [start, end) and on or before ``until``"""
+    first = _at(first_day, minutes, start.tzinfo)
+    if first < start:
+        first_day += timedelta(days=step)
+        first = _at(first_day, minutes, start.tzinfo)
+    # Last day whose occurrence is still before the end
+    last_day = end.date() if _at(end.date(), minutes, start.tzinfo) < end else end.date() - timedelta(days=1)
+    if isinstance(until, date) and until < last_day:
+        last_day = until
+    if last_day < first_day:
+        return first, 0
+    return first, (last_day - first_day).days // step + 1
+
+
+def recurrences(schedule, start, end):
+    """RRULE series of a schedule in the window [start, end), or None
+
+    Returns a list of ``(dtstart, rrule, label)``, one per series, whose
+    occurrences together are exactly those of ``expand_schedule``; or None
+    when the form has no clean RRULE (one-shot ``at`` times and continuous
+    sub-day intervals cut off by an ``until`` time), so it is expanded.
+    """
+    kind = schedule['type']
+    series = []
+    if kind in ('daily', 'weekly'):
+        step, first_day, byday = 1, start.date(), ''
+        if kind == 'weekly':
+            weekday = weekday_number(schedule['day'])
+            step, byday = 7, f";BYDAY={_BYDAY[weekday]}"
+            first_day += timedelta(days=(weekday - start.weekday()) % 7)
+        for minutes in sorted(set(schedule['times'])):
+            first, count = _daily_series(first_day, step, minutes, start, end)
+            freq = 'WEEKLY' if step == 7 else 'DAILY'
+            series.append((first, count, f"FREQ={freq}{byday};COUNT={count}", f"{minutes:04d}"))
+    elif kind == 'interval':
+        every = schedule['every']['value'] * UNIT_SECONDS[schedule['every']['unit']]
+        until = schedule.get('until')
+        if every <= 0:
+            return []
+        if schedule['every']['unit'] not in ('minutes', 'hours'):
+            step = every // UNIT_SECONDS['days']
+            times = sorted(set(schedule['times'])) or [start.hour * 60 + start.minute]
+            if isinstance(until, int):
+                times = [t for t in times if t <= until]
+            freq = f"FREQ=WEEKLY;INTERVAL={step // 7}" if step % 7 == 0 else f"FREQ=DAILY;INTERVAL={step}"
+            for minutes in times:
+                first, count = _daily_series(start.date(), step, minutes, start, end, until)
+                series.append((first, count, f"{freq};COUNT={count}", f"{minutes:04d}"))
+        elif schedule['times']:
+            # Every day repeats the same minutes, from each anchor to the cut-off
+            step = every // 60
+            last = until if isinstance(until, int) else MINUTES_PER_DAY - 1
+            minutes = set()
+            for anchor in schedule['times']:
+                minutes.update(range(anchor, last + 1, step))
+            for m in sorted(minutes):
+                first, count = _daily_series(start.date(), 1, m, start, end, until)
+                series.append((first, count, f"FREQ=DAILY;COUNT={count}", f"{m:04d}"))
+        elif isinstance(until, int):
+            return None
+        else:
+            # Continuous from the campaign start
+            step = timedelta(seconds=every)
+            limit = end
+            if isinstance(until, date):
+                limit = min(end, datetime.combine(until + timedelta(days=1), time(), start.tzinfo))
+            count = (limit - start - timedelta(microseconds=1)) // step + 1 if limit > start else 0
+            if every % 3600 == 0:
+                rule = f"FREQ=HOURLY;INTERVAL={every // 3600}"
+            else:
+                rule = f"FREQ=MINUTELY;INTERVAL={every // 60}"
+            series.append((start, count, f"{rule};COUNT={count}", 'every'))
+    elif kind == 'at':
+        return None
+    else:
+        raise ValueError(f"Unknown schedule type: {kind}")
+    return [(first, rule, label) for first, count, rule, label in series if count > 0]
+
+
+def _uid_key(ast, source):
+    """Campaign part of the UIDs: a hash of the source path, else of the canonical form"""
+    if source is None:
+        return canonical_hash(ast)[:16]
+    return hashlib.blake2b(str(source).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _details(ast, item, platforms):
+    """Folded lines shared by every event of a content item"""
+    lines = [f"SUMMARY:{_escape(ast['name'] + ': ' + item['name'])}"]
+    text = item['properties'].get('text')
+    if text:
+        lines.append(f"DESCRIPTION:{_escape(text)}")
+    lines.append(f"CATEGORIES:{','.join(_escape(value) for value in [item['type']] + platforms)}")
+    lines.append('END:VEVENT')
+    return tuple(map(_fold, lines))
+
+
+def calendar_lines(asts, start, stamp=None, name=None, expand=False, sources=None, domain=UID_DOMAIN):
+    """Lazily yield the folded, CRLF-terminated lines of an iCalendar file
+
+    Every scheduled content item of every campaign becomes RRULE events
+    where its schedule maps onto one (see ``recurrences``), or one event per
+    post otherwise or with ``expand=True``.  ``asts`` may be any iterable,
+    e.g. a generator parsing files one by one; only one campaign and one
+    event are held at a time.  Times are written to the second.
+
+    UIDs are ``campaign/item/label/key@domain``, where ``key`` hashes the
+    campaign's source path from ``sources`` (an iterable in step with
+    ``asts``) or, without one, the campaign's canonical form; so equally
+    named campaigns from different files get different UIDs.
+    """
+    stamp = (stamp or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    begin = _fold('BEGIN:VEVENT')
+    dtstamp = _fold(f"DTSTAMP:{stamp:%Y%m%dT%H%M%SZ}")
+    yield from map(_fold, ['BEGIN:VCALENDAR', 'VERSION:2.0', f"PRODID:{PRODID}", 'CALSCALE:GREGORIAN',
+                           'METHOD:PUBLISH'])
+    if name:
+        yield _fold(f"X-WR-CALNAME:{_escape(name)}")
+    sources = iter(sources) if sources is not None else None
+    for ast in asts:
+        key = _uid_key(ast, next(sources) if sources is not None else None)
+        window_start, window_end = campaign_window(ast, _start(start))
+        platforms = list(ast['body'].get('platforms') or [])
+        for item in ast['body']['content']:
+            schedule = item.get('properties', {}).get('schedule')
+            if not schedule:
+                continue
+            # Only the UID, DTSTART and RRULE differ between the events of an item
+            details = _details(ast, item, platforms)
+            uid = f"{ast['name']}/{item['name']}"
+            series = None if expand else recurrences(schedule, window_start, window_end)
+            if series is not None:
+                for first, rrule, label in series:
+                    yield begin
+                    yield _fold(f"UID:{_escape(f'{uid}/{label}/{key}@{domain}')}")
+                    yield dtstamp
+                    yield _fold(_datetime('DTSTART', first))
+                    yield _fold(f"RRULE:{rrule}")
+                    yield from details
+                continue
+            for moment in expand_schedule(schedule, window_start, window_end):
+                yield begin
+                yield _fold(f"UID:{_escape(f'{uid}/{moment:%Y%m%dT%H%M%S}/{key}@{domain}')}")
+                yield dtstamp
+                yield _fold(_datetime('DTSTART', moment))
+                yield from details
+    yield _fold('END:VCALENDAR')
+
+
+def write_calendar(asts, start, stream, stamp=None, name=None, expand=False, sources=None, domain=UID_DOMAIN):
+    """Write an iCalendar file to a text stream as it is generated; returns the line count"""
+    lines = 0
+    for line in calendar_lines(asts, start, stamp, name, expand, sources, domain):
+        stream.write(line)
+        lines += 1
+    return lines
+
+
+def main(argv=None):
+    """Command line interface: export campaign files as one iCalendar file"""
+    arg_parser = argparse.ArgumentParser(description="Export campaign schedules as iCalendar (.ics)")
+    arg_parser.add_argument('files', nargs='+', help="Campaign files (.smp)")
+    arg_parser.add_argument('--start', type=date.fromisoformat, default=date.today(),
+                            help="Campaign start date, YYYY-MM-DD (default: today)")
+    arg_parser.add_argument('--output', '-o', help="Output file (default: standard output)")
+    arg_parser.add_argument('--expand', action='store_true',
+                            help="One event per post instead of recurring events")
+    arg_parser.add_argument('--name', help="Calendar name shown by calendar apps")
+    arg_parser.add_argument('--domain', default=UID_DOMAIN,
+                            help=f"Domain of the event UIDs (default: {UID_DOMAIN})")
+    args = arg_parser.parse_args(argv)
+
+    from parser import SocialMediaContentParser, print_failure
+
+    parser = SocialMediaContentParser(backend='fast', verbose=False)
+    failed = []
+    parsed = []
+
+    def campaigns():
+        for path, result in parser.parse_files(args.files):
+            if not result['success']:
+                print_failure(path, result, file=sys.stderr)
+                failed.append(path)
+                continue
+            parsed.append(os.path.abspath(path))
+            yield result['ast']
+
+    # The list iterator sees each path appended just before its campaign is yielded
+    options = dict(name=args.name, expand=args.expand, sources=iter(parsed), domain=args.domain)
+    if args.output:
+        # newline='' keeps the CRLF line ends iCalendar requires
+        with open(args.output, 'w', encoding='utf-8', newline='') as stream:
+            write_calendar(campaigns(), args.start, stream, **options)
+    else:
+        write_calendar(campaigns(), args.start, sys.stdout, **options)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Streaming JSON Writer
+AST-k és ellenőrzési eredmények folyamatos kiírása JSON tömbként vagy JSON Lines formában
+"""
+
+import json
+
+
+def _encoder(indent):
+    # Decimal amounts and dates are written as strings, like json.dumps(default=str)
+    separators = (',', ': ') if indent is not None else None
+    return json.JSONEncoder(ensure_ascii=False, default=str, indent=indent, separators=separators)
+
+
+class JSONStreamWriter:
+    """Writes values one by one as a JSON array or as JSON Lines
+
+    Each value is encoded in chunks straight into ``stream`` (any object
+    with ``write(str)``: a file, ``sys.stdout``, or a socket's
+    ``makefile('w', encoding='utf-8')``), so memory does not grow with the
+    number of values.  The array form is byte-for-byte what
+    ``json.dumps(values, indent=indent, ensure_ascii=False, default=str)``
+    would produce; it is closed by ``close()`` or by leaving the ``with``
+    block.  With ``flush`` set the stream is flushed after every value, so
+    a reader on the other end sees each campaign as soon as it is written.
+    """
+
+    def __init__(self, stream, lines=False, indent=2, flush=False):
+        self.stream = stream
+        self.lines = lines
+        self._flush = flush
+        self.count = 0
+        self.closed = False
+        self._encoder = _encoder(None if lines else indent)
+        self._newline = "\n" + " " * indent if indent is not None else ""
+        self._separator = "," if indent is not None else ", "
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, value):
+        """Append one value"""
+        if self.closed:
+            raise ValueError("Writer is closed")
+        write = self.stream.write
+        if self.lines:
+            for chunk in self._encoder.iterencode(value):
+                write(chunk)
+            write("\n")
+        else:
+            write((self._separator if self.count else "[") + self._newline)
+            newline = self._newline
+            # Newlines only occur in indentation (strings escape them), so
+            # each chunk can be shifted one level in
+            for chunk in self._encoder.iterencode(value):
+                write(chunk.replace("\n", newline) if newline else chunk)
+        self.count += 1
+        if self._flush:
+            self.stream.flush()
+
+    def write_all(self, values):
+        """Append every value of an iterable, consuming it lazily; returns the count written"""
+        written = self.count
+        for value in values:
+            self.write(value)
+        return self.count - written
+
+    def close(self):
+        """End the array (JSON Lines need no closing); the stream stays open"""
+        if self.closed:
+            return
+        self.closed = True
+        if not self.lines:
+            self.stream.write("[]" if not self.count else self._newline[:1] + "]")
+        if self._flush:
+            self.stream.flush()
+
+
+def write_json(value, stream, indent=2):
+    """json.dump() of one value, encoded in chunks"""
+    for chunk in _encoder(indent).iterencode(value):
+        stream.write(chunk)
+
+
+def result_record(path, result, warnings=None):
+    """JSON-ready record of a parse result (the Lark parse tree is left out)"""
+    record = {'path': str(path), 'success': result['success'], 'errors': result['errors'],
+              'ast': result.get('ast')}
+    if warnings is not None:
+        record['warnings'] = warnings
+    return record
+
+
+def parse_records(parser, paths, start='start', validate=False):
+    """Lazily parse files and yield their records, one file in memory at a time"""
+    for path, result in parser.parse_files(paths, start=start):
+        warnings = None
+        if validate and result['success']:
+            ast = result['ast']['campaign'] if start == 'module' else result['ast']
+            warnings = parser.validate_semantic(ast) if ast else []
+        yield result_record(path, result, warnings)
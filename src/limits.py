@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Resource Limits
+Bemeneti méret-, elemszám-, idő- és memóriakorlátok a parse hívásokhoz
+"""
+
+import math
+import re
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+# Strings and comments are skipped so brackets and keywords inside them do not count
+_SCAN = re.compile(r'"[^"]*"|//[^\n]*|[\[\](),]|\b(?:post|story|reel|video|image)\b|\buse(?=\s*")')
+
+# How often the wall-clock and memory budgets are checked during a parse
+TICK_SECONDS = 0.05
+
+
+class ResourceLimitExceeded(Exception):
+    """A parse went over one of its ResourceLimits"""
+
+    def __init__(self, limit, value, maximum):
+        super().__init__(f"{limit} limit exceeded: {value} > {maximum}")
+        self.limit = limit
+        self.value = value
+        self.maximum = maximum
+
+    def to_error(self):
+        """Entry for the ``errors`` list of a parse result"""
+        return {
+            'type': 'ResourceLimitExceeded',
+            'message': str(self),
+            'limit': self.limit,
+            'value': self.value,
+            'maximum': self.maximum
+        }
+
+
+class ResourceLimits:
+    """Per-parse budgets; ``None`` disables a limit
+
+    Input size, content item count and list lengths are checked with a
+    linear scan before parsing starts.  The wall-clock and memory budgets
+    are checked once the parse returns.  With ``interrupt=True`` they are
+    also enforced while the parser runs: on the main thread of a POSIX
+    process an interval timer (a process-wide SIGALRM handler) interrupts
+    the parse as soon as a budget is spent; cli.py and shard workers turn
+    this on by default.  Measuring memory needs tracemalloc, which slows
+    parsing down, so it is off by default.
+    """
+
+    def __init__(self, max_input_bytes=1_000_000, max_content_items=1_000,
+                 max_list_length=1_000, max_parse_seconds=10.0, max_memory_bytes=None,
+                 interrupt=False):
+        self.max_input_bytes = max_input_bytes
+        self.max_content_items = max_content_items
+        self.max_list_length = max_list_length
+        self.max_parse_seconds = max_parse_seconds
+        self.max_memory_bytes = max_memory_bytes
+        self.interrupt = interrupt
+
+    @classmethod
+    def unlimited(cls):
+        return cls(None, None, None, None, None)
+
+    def check_input(self, content):
+        """Raise ResourceLimitExceeded if ``content`` is too big to parse"""
+        if self.max_input_bytes is not None:
+            size = len(content.encode('utf-8'))
+            if size > self.max_input_bytes:
+                raise ResourceLimitExceeded('max_input_bytes', size, self.max_input_bytes)
+        if self.max_content_items is None and self.max_list_length is None:
+            return
+        items = 0
+        longest = 0
+        # Element counts of the open (...) and [...] groups
+        open_lists = []
+        for match in _SCAN.finditer(content):
+            token = match.group()
+            if token in '([':
+                open_lists.append(1)
+            elif token in ')]':
+                if open_lists:
+                    longest = max(longest, open_lists.pop())
+            elif token == ',':
+                if open_lists:
+                    open_lists[-1] += 1
+                    longest = max(longest, open_lists[-1])
+            elif token[0] not in '"/':
+                items += 1
+        if self.max_content_items is not None and items > self.max_content_items:
+            raise ResourceLimitExceeded('max_content_items', items, self.max_content_items)
+        if self.max_list_length is not None and longest > self.max_list_length:
+            raise ResourceLimitExceeded('max_list_length', longest, self.max_list_length)
+
+
+def _can_interrupt():
+    return (hasattr(signal, 'setitimer')
+            and threading.current_thread() is threading.main_thread()
+            and signal.getitimer(signal.ITIMER_REAL)[0] == 0)
+
+
+@contextmanager
+def resource_guard(limits):
+    """Enforce the time and memory budgets of ``limits`` on the enclosed block
+
+    The budgets are checked when the block ends; the block is only
+    interrupted early when ``limits.interrupt`` is set.
+    """
+    seconds = limits.max_parse_seconds
+    memory = limits.max_memory_bytes
+    if seconds is None and memory is None:
+        yield
+        return
+    if memory is not None:
+        import tracemalloc
+    started = time.perf_counter()
+    traced = memory is not None and not tracemalloc.is_tracing()
+    if traced:
+        tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0] if memory is not None else 0
+
+    def check(peak=False):
+        if seconds is not None:
+            elapsed = time.perf_counter() - started
+            if elapsed > seconds:
+                raise ResourceLimitExceeded('max_parse_seconds', math.ceil(elapsed * 1000) / 1000, seconds)
+        if memory is not None:
+            current, highest = tracemalloc.get_traced_memory()
+            used = (highest if peak and traced else current) - baseline
+            if used > memory:
+                raise ResourceLimitExceeded('max_memory_bytes', used, memory)
+
+    armed = [True]
+
+    def on_tick(signum, frame):
+        if armed[0]:
+            check()
+
+    interrupt = limits.interrupt and _can_interrupt()
+    if interrupt:
+        tick = min(TICK_SECONDS, seconds) if seconds is not None else TICK_SECONDS
+        previous = signal.signal(signal.SIGALRM, on_tick)
+        signal.setitimer(signal.ITIMER_REAL, tick, tick)
+    try:
+        yield
+        check(peak=True)
+    finally:
+        armed[0] = False
+        if interrupt:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+        if traced:
+            tracemalloc.stop()
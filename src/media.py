@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Media Verification
+Médiahivatkozások ellenőrzése egy eszközkönyvtárban: hiányzó és túl nagy fájlok, párhuzamos stat-gyorsítótárral
+"""
+
+import argparse
+import os
+import stat
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MB = 1024 * 1024
+
+IMAGE_EXTENSIONS = frozenset(('.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic'))
+VIDEO_EXTENSIONS = frozenset(('.mp4', '.mov', '.m4v', '.webm', '.avi'))
+
+# Upload size limits per platform and media kind, in bytes
+MEDIA_LIMITS = {
+    'instagram': {'image': 8 * MB, 'video': 650 * MB},
+    'facebook': {'image': 30 * MB, 'video': 4096 * MB},
+    'twitter': {'image': 5 * MB, 'video': 512 * MB},
+    'tiktok': {'image': 20 * MB, 'video': 287 * MB},
+    'linkedin': {'image': 8 * MB, 'video': 5120 * MB},
+    'youtube': {'image': 2 * MB, 'video': 256 * 1024 * MB},
+}
+
+MISSING = 'M101'
+OVERSIZED = 'M102'
+OUTSIDE_ROOT = 'M103'
+UNKNOWN_TYPE = 'M104'
+
+_NAMES = {
+    MISSING: 'media-missing',
+    OVERSIZED: 'media-oversized',
+    OUTSIDE_ROOT: 'media-outside-root',
+    UNKNOWN_TYPE: 'media-unknown-type',
+}
+
+
+def media_kind(reference):
+    """'image', 'video' or None, from the file extension"""
+    extension = os.path.splitext(reference)[1].lower()
+    if extension in IMAGE_EXTENSIONS:
+        return 'image'
+    if extension in VIDEO_EXTENSIONS:
+        return 'video'
+    return None
+
+
+class StatCache:
+    """File sizes by absolute path, shared across campaigns and runs
+
+    A missing path (or one that is not a regular file) is cached as None.
+    Assets are assumed not to change while the cache is in use; call
+    ``clear()`` to see changes.
+    """
+
+    def __init__(self, workers=16):
+        self.workers = workers
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.stats = 0
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def __contains__(self, path):
+        return path in self._sizes
+
+    def size(self, path):
+        """Size in bytes of ``path``, or None if it is not a file"""
+        try:
+            return self._sizes[path]
+        except KeyError:
+            pass
+        size = _stat_size(path)
+        with self._lock:
+            self._sizes[path] = size
+            self.stats += 1
+        return size
+
+    def prefetch(self, paths):
+        """Stat the paths that are not cached yet, ``workers`` at a time
+
+        The lock is only held to pick the pending paths and to store their
+        sizes, so other threads can read the cache while files are looked up.
+        """
+        with self._lock:
+            pending = [path for path in dict.fromkeys(paths) if path not in self._sizes]
+        if not pending:
+            return
+        if len(pending) == 1 or self.workers <= 1:
+            sizes = list(map(_stat_size, pending))
+        else:
+            # stat() releases the GIL, so threads overlap slow (network) file systems
+            with ThreadPoolExecutor(min(self.workers, len(pending))) as pool:
+                sizes = list(pool.map(_stat_size, pending, chunksize=64))
+        with self._lock:
+            self._sizes.update(zip(pending, sizes))
+            self.stats += len(pending)
+
+    def clear(self):
+        with self._lock:
+            self._sizes.clear()
+
+
+def _stat_size(path):
+    try:
+        result = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(result.st_mode):
+        return None
+    return result.st_size
+
+
+class MediaVerifier:
+    """Checks the ``media`` references of campaigns against an asset root
+
+    References are resolved relative to ``root``, following symbolic links;
+    ones that escape it are reported instead of being looked up.  Sizes are checked against the
+    limits of every platform the campaign publishes on.  Findings for
+    ``media: "..." optional`` are warnings, since the post can go out
+    without the asset; otherwise they are errors.
+    """
+
+    def __init__(self, root, limits=None, cache=None, workers=16):
+        self.root = os.path.realpath(root)
+        self.limits = MEDIA_LIMITS if limits is None else limits
+        self.cache = cache if cache is not None else StatCache(workers)
+
+    def resolve(self, reference):
+        """Absolute path of a reference, or None if it (or a link it goes through) leads outside the root"""
+        path = os.path.realpath(os.path.join(self.root, reference))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            return None
+        return path
+
+    def verify(self, asts):
+        """Findings for a batch of campaign ASTs, ordered by campaign
+
+        Each finding is a dict with ``code``, ``name``, ``severity``, the
+        campaign ``index`` and ``campaign`` name, the content ``item``, the
+        ``media`` reference and a ``message``, like feasibility findings.
+        """
+        references = []
+        for index, ast in enumerate(asts):
+            body = ast.get('body') or {}
+            platforms = body.get('platforms') or []
+            for item in body.get('content') or []:
+                media = (item.get('properties') or {}).get('media')
+                if media is not None:
+                    references.append((index, ast.get('name'), item.get('name'), media,
+                                       bool(item['properties'].get('optional')), platforms))
+        paths = {media: self.resolve(media) for *_, media, _, _ in references}
+        self.cache.prefetch(path for path in paths.values() if path is not None)
+
+        findings = []
+        for index, campaign, item, media, optional, platforms in references:
+            finding = self._check(media, paths[media], platforms)
+            if finding is None:
+                continue
+            code, message = finding
+            findings.append({
+                'code': code,
+                'name': _NAMES[code],
+                'severity': 'warning' if optional or code == UNKNOWN_TYPE else 'error',
+                'index': index,
+                'campaign': campaign,
+                'item': item,
+                'media': media,
+                'message': message
+            })
+        return findings
+
+    def _check(self, media, path, platforms):
+        if path is None:
+            return OUTSIDE_ROOT, f"media {media!r} is outside the asset root"
+        size = self.cache.size(path)
+        if size is None:
+            return MISSING, f"media {media!r} not found under {self.root}"
+        kind = media_kind(media)
+        if kind is None:
+            return UNKNOWN_TYPE, f"media {media!r} has an unknown file type; size not checked"
+        over = [platform for platform in platforms
+                if platform in self.limits and size > self.limits[platform][kind]]
+        if over:
+            limits = ', '.join(f"{platform} ({self.limits[platform][kind] / MB:g} MB)" for platform in over)
+            return OVERSIZED, f"{kind} {media!r} is {size / MB:.1f} MB, over the limit of {limits}"
+        return None
+
+
+def main(argv=None):
+    """Command line interface: verify the media of campaign files against an asset root"""
+    arg_parser = argparse.ArgumentParser(description="Check that referenced media exist and fit platform limits")
+    arg_parser.add_argument('root', help="Asset root directory the media paths are relative to")
+    arg_parser.add_argument('files', nargs='+', help="Campaign files (.smp)")
+    arg_parser.add_argument('--module', action='store_true', help="Parse importable modules (campaign optional)")
+    arg_parser.add_argument('--workers', type=int, default=16, help="Threads for file lookups (default: 16)")
+    args = arg_parser.parse_args(argv)
+
+    from parser import SocialMediaContentParser, print_failure
+
+    parser = SocialMediaContentParser(backend='fast', verbose=False)
+    start = 'module' if args.module else 'start'
+    status = 0
+    asts = []
+    paths = []
+    for path, result in parser.parse_files(args.files, start=start):
+        if not result['success']:
+            print_failure(path, result, file=sys.stderr)
+            status = 1
+            continue
+        ast = result['ast']['campaign'] if args.module else result['ast']
+        if ast:
+            asts.append(ast)
+            paths.append(path)
+
+    verifier = MediaVerifier(args.root, workers=args.workers)
+    for finding in verifier.verify(asts):
+        print(f"  [{finding['severity'].upper()}] {paths[finding['index']]} ({finding['item']}): "
+              f"{finding['code']} {finding['message']}")
+        if finding['severity'] == 'error':
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Module Loader
+Import és template rendszer függőség-alapú gyorsítótárazással
+"""
+
+import copy
+import os
+from pathlib import Path
+
+from parser import SocialMediaContentParser
+
+
+class ModuleLoader:
+    """Loads .smp files, resolves ``import``/``use`` and caches parsed modules.
+
+    Every file is parsed once with the ``module`` start symbol and cached
+    together with its file stamp (mtime and size).  The loader keeps the
+    import graph in both directions, so when a file changes only that file is
+    re-parsed and only the campaigns depending on it are re-resolved; all
+    other cached results are reused as they are.
+    """
+
+    def __init__(self, parser=None):
+        self.parser = parser or SocialMediaContentParser()
+        # path -> {'stamp', 'ast', 'parse_tree', 'errors', 'imports'}
+        self._modules = {}
+        # path -> resolved campaign result
+        self._resolved = {}
+        # path -> set of paths importing it
+        self._dependents = {}
+        self.parse_count = 0
+
+    # ===== CACHE AND DEPENDENCY GRAPH =====
+
+    def _stamp(self, path):
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _module(self, path):
+        """Cached parse of one file, re-parsed only when its stamp changed"""
+        stamp = self._stamp(path)
+        entry = self._modules.get(path)
+        if entry is not None and entry['stamp'] == stamp:
+            return entry
+
+        result = self.parser.parse_file(path, start='module')
+        self.parse_count += 1
+        ast = result['ast'] or {'imports': [], 'definitions': [], 'campaign': None}
+        imports = [str((Path(path).parent / name).resolve()) for name in ast['imports']]
+
+        if entry is not None:
+            for dependency in entry['imports']:
+                self._dependents.get(dependency, set()).discard(path)
+        for dependency in imports:
+            self._dependents.setdefault(dependency, set()).add(path)
+        self._drop_resolved(path)
+
+        entry = {
+            'stamp': stamp,
+            'ast': ast,
+            'parse_tree': result['parse_tree'],
+            'errors': result['errors'],
+            'imports': imports
+        }
+        self._modules[path] = entry
+        return entry
+
+    def _drop_resolved(self, path):
+        """Forget resolved results of ``path`` and everything depending on it"""
+        for affected in {path} | self.dependents(path):
+            self._resolved.pop(affected, None)
+
+    def dependents(self, path):
+        """All files that import ``path`` directly or transitively"""
+        path = str(Path(path).resolve())
+        seen = set()
+        pending = [path]
+        while pending:
+            for importer in self._dependents.get(pending.pop(), ()):
+                if importer not in seen:
+                    seen.add(importer)
+                    pending.append(importer)
+        return seen
+
+    def dependencies(self, path):
+        """All files ``path`` imports directly or transitively"""
+        path = str(Path(path).resolve())
+        seen = set()
+        pending = [path]
+        while pending:
+            entry = self._modules.get(pending.pop())
+            for dependency in entry['imports'] if entry else ():
+                if dependency not in seen:
+                    seen.add(dependency)
+                    pending.append(dependency)
+        return seen
+
+    def invalidate(self, path):
+        """Drop a file from the cache so the next load re-parses it
+
+        Its own import edges go with it; the edges of the files importing
+        it stay, as those files still import it.
+        """
+        path = str(Path(path).resolve())
+        self._drop_resolved(path)
+        entry = self._modules.pop(path, None)
+        if entry is not None:
+            for dependency in entry['imports']:
+                self._dependents.get(dependency, set()).discard(path)
+
+    def refresh(self):
+        """Re-parse changed files; return the campaign files that were affected"""
+        changed = set()
+        for path, entry in list(self._modules.items()):
+            try:
+                stamp = self._stamp(path)
+            except FileNotFoundError:
+                stamp = None
+            if stamp != entry['stamp']:
+                changed.add(path)
+        # Collect the dependents before invalidating drops any import edges
+        affected = set()
+        for path in changed:
+            affected |= {path} | self.dependents(path)
+        for path in changed:
+            self.invalidate(path)
+        return sorted(affected)
+
+    # ===== RESOLUTION =====
+
+    def load(self, path):
+        """Parse a campaign file and resolve its imports and ``use`` references
+
+        Returns a dict shaped like ``SocialMediaContentParser.parse_string``
+        results, plus the list of files the campaign depends on.
+        """
+        path = str(Path(path).resolve())
+        try:
+            self._module(path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Input file not found: {path}")
+
+        # Re-parse changed imports; this drops the affected resolved results
+        for dependency in self.dependencies(path):
+            try:
+                self._module(dependency)
+            except FileNotFoundError:
+                self.invalidate(dependency)
+
+        cached = self._resolved.get(path)
+        if cached is not None:
+            return cached
+
+        errors = []
+        definitions = self._collect(path, [], errors, {})
+        entry = self._modules[path]
+        campaign = entry['ast']['campaign']
+        if campaign is None and not errors:
+            errors.append({'type': 'ImportError', 'message': f"No campaign defined in {path}"})
+        if campaign is not None and not errors:
+            campaign = self._expand(campaign, definitions, errors)
+
+        result = {
+            'success': not errors,
+            'parse_tree': entry['parse_tree'],
+            'ast': campaign if not errors else None,
+            'errors': errors,
+            'dependencies': sorted(self.dependencies(path))
+        }
+        self._resolved[path] = result
+        return result
+
+    def _collect(self, path, stack, errors, memo):
+        """Shared blocks visible from ``path``: imports first, own definitions last
+
+        ``memo`` holds the blocks of the files already collected in this
+        load, so a module imported along several paths is walked once.
+        """
+        if path in memo:
+            return memo[path]
+        if path in stack:
+            cycle = " -> ".join(stack[stack.index(path):] + [path])
+            errors.append({'type': 'ImportError', 'message': f"Import cycle: {cycle}"})
+            return {}
+        try:
+            entry = self._module(path)
+        except FileNotFoundError:
+            importer = stack[-1] if stack else path
+            errors.append({'type': 'ImportError',
+                           'message': f"Imported file not found: {path} (from {importer})"})
+            return {}
+        for error in entry['errors']:
+            errors.append(dict(error, file=path))
+
+        definitions = {}
+        for dependency in entry['imports']:
+            definitions.update(self._collect(dependency, stack + [path], errors, memo))
+        for definition in entry['ast']['definitions']:
+            definitions[(definition['kind'], definition['name'])] = definition['value']
+        memo[path] = definitions
+        return definitions
+
+    def _lookup(self, definitions, kind, name, errors):
+        value = definitions.get((kind, name))
+        if value is None:
+            errors.append({'type': 'ImportError', 'message': f"Unknown {kind} block: {name}"})
+            return None
+        return copy.deepcopy(value)
+
+    def _expand(self, campaign, definitions, errors):
+        """Copy of ``campaign`` with every ``use`` replaced by its shared block"""
+        campaign = copy.deepcopy(campaign)
+        campaign.pop('imports', None)
+        campaign.pop('definitions', None)
+        body = campaign['body']
+
+        content = []
+        for item in body['content']:
+            if item['type'] == 'use':
+                template = self._lookup(definitions, 'content', item['template'], errors)
+                if template is None:
+                    continue
+                template['name'] = item['name']
+                item = template
+            content.append(item)
+        body['content'] = content
+
+        for kind in ('targeting', 'budget'):
+            block = body.get(kind)
+            if block and 'use' in block:
+                shared = self._lookup(definitions, kind, block['use'], errors)
+                if shared is not None:
+                    shared['optional'] = block['optional']
+                    body[kind] = shared
+        return campaign
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Audience Overlap Engine
+Kampányok célközönség-átfedésének számítása bitsetekkel
+"""
+
+import heapq
+
+# Age values covered when a campaign has no age_range rule
+MIN_AGE = 0
+MAX_AGE = 130
+
+
+def _bit_count(value):
+    """Number of set bits in an integer bitset (int.bit_count needs 3.10+)"""
+    return bin(value).count('1')
+
+
+class AudienceOverlapIndex:
+    """Bitset-encoded targeting of many campaigns with pairwise overlap queries.
+
+    Every campaign is encoded as an inclusive age interval plus one integer
+    bitset for its interests and one for its locations (bit ``k`` is set when
+    the ``k``-th vocabulary entry is targeted).  Inverted indexes map each
+    interest, location and age to a bitset of campaign indices, so the set of
+    campaigns that can overlap with a given one is found with a handful of
+    OR/AND operations instead of a scan over all campaigns.
+
+    The overlap of two campaigns is the product of per-dimension overlap
+    coefficients ``|A & B| / min(|A|, |B|)``.  A dimension that a campaign does
+    not restrict counts as the whole universe, so it never reduces the score.
+
+    Scores are computed for all candidates of a campaign at once: the shared
+    value counts are summed from the postings into bit-sliced counters, and
+    campaigns are grouped by age range and by the size of their interest and
+    location sets.  Every group of campaigns with the same coefficients is
+    then one bitset with one score, so no Python code runs per pair.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.age_ranges = []
+        self.interest_bits = []
+        self.location_bits = []
+        self.interest_vocab = {}
+        self.location_vocab = {}
+        # value id -> bitset of campaign indices
+        self._interest_postings = []
+        self._location_postings = []
+        self._age_postings = [0] * (MAX_AGE - MIN_AGE + 1)
+        # campaigns that do not restrict the dimension
+        self._open_interests = 0
+        self._open_locations = 0
+        # (low, high) -> campaigns with that age range; set size -> campaigns
+        self._age_groups = {}
+        self._interest_sizes = {}
+        self._location_sizes = {}
+
+    @classmethod
+    def from_asts(cls, asts):
+        """Build an index from an iterable of campaign ASTs"""
+        index = cls()
+        for ast in asts:
+            index.add(ast)
+        return index
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, ast):
+        """Encode the targeting block of a campaign AST, return its index"""
+        idx = len(self.names)
+        bit = 1 << idx
+        targeting = ast.get('body', {}).get('targeting') or {}
+
+        age_range = targeting.get('age_range')
+        if age_range:
+            low, high = age_range['min'], age_range['max']
+            if not MIN_AGE <= low <= high <= MAX_AGE:
+                raise ValueError(f"Invalid age_range {low} to {high} in campaign {ast.get('name')!r}: "
+                                 f"ages must be ascending and within {MIN_AGE} to {MAX_AGE}")
+        else:
+            low, high = MIN_AGE, MAX_AGE
+        for age in range(low - MIN_AGE, high - MIN_AGE + 1):
+            self._age_postings[age] |= bit
+        self._age_groups[low, high] = self._age_groups.get((low, high), 0) | bit
+
+        interests = self._encode(targeting.get('interests'), self.interest_vocab,
+                                 self._interest_postings, bit)
+        if interests is None:
+            self._open_interests |= bit
+        else:
+            size = _bit_count(interests)
+            self._interest_sizes[size] = self._interest_sizes.get(size, 0) | bit
+        locations = self._encode(targeting.get('location'), self.location_vocab,
+                                 self._location_postings, bit)
+        if locations is None:
+            self._open_locations |= bit
+        else:
+            size = _bit_count(locations)
+            self._location_sizes[size] = self._location_sizes.get(size, 0) | bit
+
+        self.names.append(ast.get('name'))
+        self.age_ranges.append((low, high))
+        self.interest_bits.append(interests)
+        self.location_bits.append(locations)
+        return idx
+
+    def _encode(self, values, vocab, postings, bit):
+        """Turn a string list into a vocabulary bitset (None = unrestricted)"""
+        if not values:
+            return None
+        bits = 0
+        for value in values:
+            key = value.strip().casefold()
+            value_id = vocab.get(key)
+            if value_id is None:
+                value_id = vocab[key] = len(postings)
+                postings.append(0)
+            postings[value_id] |= bit
+            bits |= 1 << value_id
+        return bits
+
+    def _matching(self, bits, postings, open_campaigns):
+        """Campaigns sharing at least one value with ``bits``"""
+        if bits is None:
+            return (1 << len(self.names)) - 1
+        result = open_campaigns
+        while bits:
+            low_bit = bits & -bits
+            result |= postings[low_bit.bit_length() - 1]
+            bits ^= low_bit
+        return result
+
+    def candidates(self, idx):
+        """Bitset of campaigns whose targeting can overlap with campaign ``idx``"""
+        low, high = self.age_ranges[idx]
+        by_age = 0
+        for age in range(low - MIN_AGE, high - MIN_AGE + 1):
+            by_age |= self._age_postings[age]
+        by_interest = self._matching(self.interest_bits[idx], self._interest_postings,
+                                     self._open_interests)
+        by_location = self._matching(self.location_bits[idx], self._location_postings,
+                                     self._open_locations)
+        return by_age & by_interest & by_location & ~(1 << idx)
+
+    def overlap(self, i, j):
+        """Overlap score of two campaigns in [0, 1]"""
+        (low_i, high_i), (low_j, high_j) = self.age_ranges[i], self.age_ranges[j]
+        common = min(high_i, high_j) - max(low_i, low_j) + 1
+        if common <= 0:
+            return 0.0
+        score = common / min(high_i - low_i + 1, high_j - low_j + 1)
+        for a, b in ((self.interest_bits[i], self.interest_bits[j]),
+                     (self.location_bits[i], self.location_bits[j])):
+            if a is None or b is None:
+                continue
+            shared = _bit_count(a & b)
+            if not shared:
+                return 0.0
+            score *= shared / min(_bit_count(a), _bit_count(b))
+        return score
+
+    def _factors(self, bits, postings, sizes, open_campaigns, mask):
+        """(coefficient, campaigns) groups of one dimension among ``mask``"""
+        if bits is None:
+            return [(1.0, mask)]
+        # Bit-sliced counters: bit k of every campaign's shared value count
+        counter = []
+        values = bits
+        while values:
+            low_bit = values & -values
+            values ^= low_bit
+            carry = postings[low_bit.bit_length() - 1] & mask
+            for k, column in enumerate(counter):
+                if not carry:
+                    break
+                counter[k], carry = column ^ carry, column & carry
+            if carry:
+                counter.append(carry)
+        size = _bit_count(bits)
+        factors = [(1.0, open_campaigns & mask)] if open_campaigns & mask else []
+        for shared in range(1, size + 1):
+            having = mask
+            for k, column in enumerate(counter):
+                having &= column if shared >> k & 1 else ~column
+            if shared >> len(counter):
+                having = 0
+            if not having:
+                continue
+            for other_size, members in sizes.items():
+                group = having & members
+                if group:
+                    factors.append((shared / min(size, other_size), group))
+        return factors
+
+    def _scored(self, idx, mask):
+        """{score: bitset} of the campaigns in ``mask`` overlapping with ``idx``"""
+        low_i, high_i = self.age_ranges[idx]
+        groups = []
+        for (low, high), members in self._age_groups.items():
+            group = members & mask
+            if group:
+                common = min(high_i, high) - max(low_i, low) + 1
+                if common > 0:
+                    groups.append((common / min(high_i - low_i + 1, high - low + 1), group))
+        for bits, postings, sizes, open_campaigns in (
+                (self.interest_bits[idx], self._interest_postings, self._interest_sizes, self._open_interests),
+                (self.location_bits[idx], self._location_postings, self._location_sizes, self._open_locations)):
+            if not groups:
+                break
+            mask = 0
+            for _, group in groups:
+                mask |= group
+            factors = self._factors(bits, postings, sizes, open_campaigns, mask)
+            groups = [(score * factor, group & members)
+                      for score, group in groups for factor, members in factors if group & members]
+        scored = {}
+        for score, group in groups:
+            if score > 0:
+                scored[score] = scored.get(score, 0) | group
+        return scored
+
+    def _mask(self, idx, after):
+        mask = ((1 << len(self.names)) - 1) & ~(1 << idx)
+        if after:
+            mask = mask >> (idx + 1) << (idx + 1)
+        return mask
+
+    def neighbours(self, idx, after=False):
+        """Yield (other_index, score) for every campaign overlapping with ``idx``
+
+        With ``after`` only campaigns added later than ``idx`` are considered.
+        """
+        found = [(other, score) for score, group in self._scored(idx, self._mask(idx, after)).items()
+                 for other in _indices(group)]
+        found.sort()
+        yield from found
+
+    def pairs(self, min_score=0.0):
+        """Yield (i, j, score) with i < j for every overlapping pair above ``min_score``"""
+        for i in range(len(self.names)):
+            for j, score in self.neighbours(i, after=True):
+                if score > min_score:
+                    yield i, j, score
+
+    def matrix(self):
+        """Dense symmetric overlap matrix (1.0 on the diagonal)"""
+        size = len(self.names)
+        result = [[0.0] * size for _ in range(size)]
+        for i in range(size):
+            result[i][i] = 1.0
+            row = result[i]
+            for score, group in self._scored(i, self._mask(i, True)).items():
+                for j in _indices(group):
+                    row[j] = result[j][i] = score
+        return result
+
+    def top_k(self, k, idx=None):
+        """Most overlapping campaigns.
+
+        With ``idx`` the ``k`` strongest competitors of that campaign are
+        returned as (other_index, score) pairs, otherwise the ``k`` strongest
+        pairs of the whole index as (i, j, score) triples.  Ties go to the
+        lower indices.
+        """
+        if k <= 0:
+            return []
+        if idx is not None:
+            result = []
+            for score, group in sorted(self._scored(idx, self._mask(idx, False)).items(), reverse=True):
+                for other in _indices(group):
+                    result.append((other, score))
+                    if len(result) == k:
+                        return result
+            return result
+        # Min-heap of the best (score, -i, -j) so far; whole score groups
+        # below its weakest entry are skipped without visiting their pairs
+        heap = []
+        for i in range(len(self.names)):
+            for score, group in sorted(self._scored(i, self._mask(i, True)).items(), reverse=True):
+                if len(heap) == k and score < heap[0][0]:
+                    break
+                for j in _indices(group):
+                    entry = (score, -i, -j)
+                    if len(heap) < k:
+                        heapq.heappush(heap, entry)
+                    elif entry > heap[0]:
+                        heapq.heapreplace(heap, entry)
+                    else:
+                        break
+        return [(-i, -j, score) for score, i, j in sorted(heap, reverse=True)]
+
+
+def _indices(bits):
+    """Positions of the set bits, in ascending order"""
+    digits = bin(bits)[:1:-1]
+    position = digits.find('1')
+    while position != -1:
+        yield position
+        position = digits.find('1', position + 1)
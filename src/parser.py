@@ -6,160 +6,225 @@ Lark-based parser implementáció a DSL nyelvhez
 
 import sys
 import os
+from contextlib import nullcontext
 from pathlib import Path
-from lark import Lark, LarkError, Transformer, v_args
-from lark.exceptions import ParseError, LexError
 
-class SocialMediaContentTransformer(Transformer):
-    """AST transformer a parse tree struktúrált adattá alakításához"""
-    
-    @v_args(inline=True)
-    def campaign_definition(self, name, duration, body):
-        return {
-            'type': 'campaign',
-            'name': name,
-            'duration': duration,
-            'body': body
-        }
-    
-    @v_args(inline=True) 
-    def campaign_body(self, platforms, content, targeting=None, budget=None):
-        result = {
-            'platforms': platforms,
-            'content': content
-        }
-        if targeting:
-            result['targeting'] = targeting
-        if budget:
-            result['budget'] = budget
-        return result
-    
-    @v_args(inline=True)
-    def platform_definition(self, platform_list):
-        return platform_list
-    
-    def platform_list(self, platforms):
-        return [str(p) for p in platforms]
-    
-    def platform_name(self, platform):
-        return str(platform)
-    
-    @v_args(inline=True)
-    def content_definition(self, *content_items):
-        return list(content_items)
-    
-    @v_args(inline=True)
-    def content_item(self, content_type, name, properties):
-        return {
-            'type': str(content_type),
-            'name': name,
-            'properties': properties
-        }
-    
-    def content_properties(self, properties):
-        result = {}
-        for prop in properties:
-            if isinstance(prop, dict):
-                result.update(prop)
-        return result
-    
-    @v_args(inline=True)
-    def text_property(self, text):
-        return {'text': self._clean_string(text)}
-    
-    @v_args(inline=True) 
-    def media_property(self, media, optional=None):
-        return {'media': self._clean_string(media), 'optional': optional is not None}
-    
-    @v_args(inline=True)
-    def hashtag_property(self, hashtag_list):
-        return {'hashtags': hashtag_list}
-    
-    @v_args(inline=True)
-    def schedule_property(self, schedule):
-        return {'schedule': schedule}
+try:
+    from .limits import ResourceLimitExceeded, ResourceLimits, resource_guard
+except ImportError:
+    # Loaded from src/ as a top-level module (scripts, tests) rather than as src.parser
+    from limits import ResourceLimitExceeded, ResourceLimits, resource_guard
+
+# Compiled Earley parsers by grammar file and modification time; building one
+# takes longer than parsing a typical campaign, so instances share them
+_LARK_CACHE = {}
+
+def _sibling(name):
+    """Lazily import a module of src/, whether this one is src.parser or top-level"""
+    import importlib
+    if __package__:
+        return importlib.import_module(f".{name}", __package__)
+    return importlib.import_module(name)
+
+def __getattr__(name):
+    # lark is imported only once a Lark-backed parser is needed
+    if name == 'SocialMediaContentTransformer':
+        return _sibling('transformer').SocialMediaContentTransformer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def time_to_minutes(value):
+    """Convert an "HH:MM" time to minutes since midnight"""
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+def minutes_to_time(minutes):
+    """Convert minutes since midnight back to "HH:MM" """
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def print_failure(path, result, file=None):
+    """Print the ``[FAILED]`` line and the errors of a failed parse result"""
+    print(f"[FAILED] {path}", file=file)
+    for error in result['errors']:
+        print(f"  {error['type']}: {error['message']}", file=file)
+
+class StringPool:
+    """Shared pool of interned string literals for a parse session or batch
     
-    @v_args(inline=True)
-    def daily_schedule(self, *times):
-        return {'type': 'daily', 'times': list(times)}
+    Platform names, content types, hashtags, weekdays and list values repeat
+    across a corpus; the pool hands out one shared instance per distinct
+    string so the ASTs keep a single copy and equal values compare by
+    identity.  Times are minute counts (ints) and are not pooled.
     
-    @v_args(inline=True)
-    def time_specific_schedule(self, *times):
-        return {'type': 'at', 'times': list(times)}
+    The pool is unbounded and lives as long as its owner: a parser's own
+    pool is cleared at the start of every ``parse_many`` batch, while a pool
+    passed in by the caller is kept until the caller clears it.
+    """
     
-    def time_list(self, times):
-        return [self._clean_string(t) for t in times]
+    def __init__(self):
+        self._strings = {}
+        self.hits = 0
+        self.misses = 0
     
-    @v_args(inline=True)
-    def duration_value(self, number, unit):
-        return {'value': int(number), 'unit': str(unit)}
+    def __len__(self):
+        return len(self._strings)
     
-    def string_list(self, strings):
-        return [self._clean_string(s) for s in strings]
+    def __contains__(self, value):
+        return value in self._strings
     
-    @v_args(inline=True)
-    def money_value(self, amount, decimal=None):
-        if decimal:
-            return float(f"{amount}.{decimal}")
-        return int(amount)
+    def intern(self, value):
+        """Return the pooled instance equal to ``value``"""
+        pooled = self._strings.get(value)
+        if pooled is None:
+            pooled = self._strings[value] = value
+            self.misses += 1
+        else:
+            self.hits += 1
+        return pooled
     
-    def _clean_string(self, s):
-        """Remove quotes from string literals"""
-        if isinstance(s, str) and s.startswith('"') and s.endswith('"'):
-            return s[1:-1]
-        return str(s)
+    def clear(self):
+        self._strings.clear()
+        self.hits = 0
+        self.misses = 0
 
 class SocialMediaContentParser:
     """Main parser class"""
     
-    def __init__(self):
+    def __init__(self, string_pool=None, backend='lark', limits=None, profile=None, verbose=True):
         self.grammar_file = Path(__file__).parent / "grammar.lark"
+        # Progress messages ([OK] / [ERROR]) on stdout; tools turn them off
+        self.verbose = verbose
         self.parser = None
-        self.transformer = SocialMediaContentTransformer()
-        self._load_grammar()
+        # Guards against pathological inputs (see limits.py)
+        self.limits = limits if limits is not None else ResourceLimits()
+        # One pool per parser session unless a batch shares its own
+        self._own_pool = string_pool is None
+        self.string_pool = string_pool if string_pool is not None else StringPool()
+        self.transformer = None
+        self.backend = backend
+        # Opt-in callprofile.CallProfile of rules and transformer callbacks
+        self.profile = profile
+        if backend == 'lark':
+            if profile is not None:
+                self.transformer = _sibling('transformer').ProfilingTransformer(self.string_pool, profile)
+            else:
+                self.transformer = _sibling('transformer').SocialMediaContentTransformer(self.string_pool)
+            self._load_grammar()
+        elif backend == 'fast':
+            # Hand-written recursive-descent parser, same AST and error positions
+            self.parser = _sibling('fastparser').FastParser(self.string_pool)
+            if profile is not None:
+                _sibling('callprofile').instrument(self.parser, profile)
+        else:
+            raise ValueError(f"Unknown parser backend: {backend}")
     
     def _load_grammar(self):
         """Load and initialize the Lark parser"""
         try:
+            key = (str(self.grammar_file), os.stat(self.grammar_file).st_mtime_ns)
+            cached = _LARK_CACHE.get(key)
+            if cached is not None:
+                self.parser = cached
+                return
+            
+            from lark import Lark
             with open(self.grammar_file, 'r', encoding='utf-8') as f:
                 grammar_content = f.read()
             
-            self.parser = Lark(
+            self.parser = _LARK_CACHE[key] = Lark(
                 grammar_content,
+                start=['start', 'module'],  # 'module' for imported files
                 parser='earley',  # supports all context-free grammars
                 ambiguity='explicit'  # handle ambiguous grammars
             )
-            print(f"[OK] Grammar loaded successfully from {self.grammar_file}")
+            self._say(f"[OK] Grammar loaded successfully from {self.grammar_file}")
             
         except FileNotFoundError:
             raise FileNotFoundError(f"Grammar file not found: {self.grammar_file}")
         except Exception as e:
             raise RuntimeError(f"Failed to load grammar: {e}")
     
-    def parse_file(self, file_path):
+    def parse_file(self, file_path, start='start'):
         """Parse a .smp file"""
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
-            return self.parse_string(content)
+            return self.parse_string(content, start=start)
         except FileNotFoundError:
             raise FileNotFoundError(f"Input file not found: {file_path}")
         except Exception as e:
             raise RuntimeError(f"Failed to read file {file_path}: {e}")
     
-    def parse_string(self, content):
-        """Parse a string containing SMP DSL code"""
+    def _say(self, message):
+        if self.verbose:
+            print(message)
+    
+    def parse_files(self, paths, start='start'):
+        """Lazily parse files and yield ``(path, result)`` pairs
+        
+        A file that cannot be read gives a failed result with an
+        ``IOError`` entry instead of raising, so one bad path does not stop
+        a batch.
+        """
+        for path in paths:
+            try:
+                result = self.parse_file(path, start=start)
+            except (FileNotFoundError, RuntimeError) as e:
+                result = {'success': False, 'parse_tree': None, 'ast': None,
+                          'errors': [{'type': 'IOError', 'message': str(e)}]}
+            yield path, result
+    
+    def parse_many(self, contents):
+        """Parse a batch of SMP sources sharing one string pool
+        
+        The parser's own pool starts empty for every batch, so a long-lived
+        parser does not accumulate the literals of earlier batches.
+        """
+        if self._own_pool:
+            self.string_pool.clear()
+        return [self.parse_string(content) for content in contents]
+    
+    def parse_string(self, content, start='start'):
+        """Parse a string containing SMP DSL code
+        
+        ``start='module'`` parses an importable file whose campaign is optional.
+        """
         if not self.parser:
             raise RuntimeError("Parser not initialized")
         
+        try:
+            self.limits.check_input(content)
+            with resource_guard(self.limits):
+                if self.backend == 'fast':
+                    return self._parse_fast(content, start)
+                return self._parse_lark(content, start)
+            
+        except ResourceLimitExceeded as e:
+            self._say(f"[ERROR] Resource limit exceeded: {e}")
+            return {
+                'success': False,
+                'parse_tree': None,
+                'ast': None,
+                'errors': [e.to_error()]
+            }
+    
+    def _frame(self, name):
+        """Profile frame around a parsing step, if profiling"""
+        return self.profile.frame(name) if self.profile is not None else nullcontext()
+    
+    def _parse_lark(self, content, start):
+        """parse_string() for the Earley backend"""
+        from lark.exceptions import ParseError, LexError, VisitError
+        
         try:
             # Parse the content
-            parse_tree = self.parser.parse(content)
-            print("[OK] Parsing successful!")
+            with self._frame('earley_parse'):
+                parse_tree = self.parser.parse(content, start=start)
+            self._say("[OK] Parsing successful!")
             
             # Transform to structured data
-            result = self.transformer.transform(parse_tree)
-            print("[OK] AST transformation successful!")
+            with self._frame('transform'):
+                result = self.transformer.transform(parse_tree)
+            self._say("[OK] AST transformation successful!")
             
             return {
                 'success': True,
@@ -170,7 +235,7 @@ class SocialMediaContentParser:
             
         except ParseError as e:
             error_msg = f"Syntax error at line {e.line}, column {e.column}: {e}"
-            print(f"[ERROR] Parse error: {error_msg}")
+            self._say(f"[ERROR] Parse error: {error_msg}")
             return {
                 'success': False,
                 'parse_tree': None,
@@ -178,19 +243,40 @@ class SocialMediaContentParser:
                 'errors': [{'type': 'ParseError', 'message': error_msg, 'line': e.line, 'column': e.column}]
             }
             
+        except ResourceLimitExceeded:
+            raise
+            
+        except VisitError as e:
+            if isinstance(e.orig_exc, ResourceLimitExceeded):
+                raise e.orig_exc
+            # Typed terminals are converted at transform time; the first
+            # token of the failing rule gives the position
+            error_type = 'ValueError' if isinstance(e.orig_exc, ValueError) else 'UnexpectedError'
+            error_msg = f"Invalid value: {e.orig_exc}"
+            self._say(f"[ERROR] Value error: {error_msg}")
+            token = next((value for value in e.obj.scan_values(lambda value: hasattr(value, 'line'))), None)
+            return {
+                'success': False,
+                'parse_tree': None,
+                'ast': None,
+                'errors': [{'type': error_type, 'message': error_msg,
+                            'line': getattr(token, 'line', None), 'column': getattr(token, 'column', None)}]
+            }
+            
         except LexError as e:
             error_msg = f"Lexical error: {e}"
-            print(f"[ERROR] Lex error: {error_msg}")
+            self._say(f"[ERROR] Lex error: {error_msg}")
             return {
                 'success': False,
                 'parse_tree': None,
                 'ast': None,
-                'errors': [{'type': 'LexError', 'message': error_msg}]
+                'errors': [{'type': 'LexError', 'message': error_msg,
+                            'line': getattr(e, 'line', None), 'column': getattr(e, 'column', None)}]
             }
             
         except Exception as e:
             error_msg = f"Unexpected error: {e}"
-            print(f"[ERROR] Unexpected error: {error_msg}")
+            self._say(f"[ERROR] Unexpected error: {error_msg}")
             return {
                 'success': False,
                 'parse_tree': None,
@@ -198,6 +284,48 @@ class SocialMediaContentParser:
                 'errors': [{'type': 'UnexpectedError', 'message': error_msg}]
             }
     
+    def _parse_fast(self, content, start):
+        """parse_string() for the recursive-descent backend (no parse tree)"""
+        FastSyntaxError = _sibling('fastparser').FastSyntaxError
+        
+        try:
+            result = self.parser.parse(content, start=start)
+            self._say("[OK] Parsing successful!")
+            return {
+                'success': True,
+                'parse_tree': None,
+                'ast': result,
+                'errors': []
+            }
+        
+        except FastSyntaxError as e:
+            if e.kind == 'ParseError':
+                error_msg = f"Syntax error at line {e.line}, column {e.column}: {e}"
+                self._say(f"[ERROR] Parse error: {error_msg}")
+            else:
+                error_msg = f"Lexical error: {e}"
+                self._say(f"[ERROR] Lex error: {error_msg}")
+            return {
+                'success': False,
+                'parse_tree': None,
+                'ast': None,
+                'errors': [{'type': e.kind, 'message': error_msg, 'line': e.line, 'column': e.column}]
+            }
+        
+        except ResourceLimitExceeded:
+            raise
+        
+        except ValueError as e:
+            error_msg = f"Invalid value: {e}"
+            self._say(f"[ERROR] Value error: {error_msg}")
+            return {
+                'success': False,
+                'parse_tree': None,
+                'ast': None,
+                'errors': [{'type': 'ValueError', 'message': error_msg,
+                            'line': getattr(e, 'line', None), 'column': getattr(e, 'column', None)}]
+            }
+    
     def validate_semantic(self, ast):
         """Perform semantic validation on the AST"""
         errors = []
@@ -205,11 +333,9 @@ class SocialMediaContentParser:
         if not ast:
             return ['Invalid AST structure']
         
-        # Handle case where AST is wrapped in Tree object
+        # A Lark Tree means the transformer missed a rule (profiler.py finds which)
         if hasattr(ast, 'data') and hasattr(ast, 'children'):
-            # This is a Lark Tree object, extract the actual data
-            print(f"[DEBUG] AST is Tree object: {type(ast)}")
-            return []  # For now, skip semantic validation on Tree objects
+            return [f"AST is an unconverted parse tree: {ast.data}"]
         
         if not isinstance(ast, dict):
             return ['AST is not a dictionary structure']
@@ -232,6 +358,12 @@ class SocialMediaContentParser:
         if not content:
             errors.append("Campaign must have at least one content item")
         
+        # Validate the age range (see overlap.MIN_AGE / MAX_AGE)
+        age_range = (body.get('targeting') or {}).get('age_range')
+        if age_range and not 0 <= age_range['min'] <= age_range['max'] <= 130:
+            errors.append(f"Invalid age_range {age_range['min']} to {age_range['max']}: "
+                          f"ages must be ascending and within 0 to 130")
+        
         # Validate budget values
         budget = body.get('budget')
         if budget:
@@ -242,44 +374,9 @@ class SocialMediaContentParser:
         return errors
 
 def main():
-    """Command line interface"""
-    if len(sys.argv) != 2:
-        print("Usage: python parser.py <file.smp>")
-        print("Example: python parser.py ../examples/basic_campaign.smp")
-        sys.exit(1)
-    
-    file_path = sys.argv[1]
-    
-    try:
-        parser = SocialMediaContentParser()
-        result = parser.parse_file(file_path)
-        
-        if result['success']:
-            print(f"\n[SUCCESS] Successfully parsed: {file_path}")
-            print("\n[INFO] Parse Tree:")
-            print(result['parse_tree'].pretty())
-            
-            print("\n[INFO] AST Structure:")
-            import json
-            print(json.dumps(result['ast'], indent=2, ensure_ascii=False))
-            
-            # Semantic validation
-            semantic_errors = parser.validate_semantic(result['ast'])
-            if semantic_errors:
-                print("\n[WARNING] Semantic validation errors:")
-                for error in semantic_errors:
-                    print(f"  - {error}")
-            else:
-                print("\n[OK] Semantic validation passed!")
-        else:
-            print(f"\n[FAILED] Failed to parse: {file_path}")
-            for error in result['errors']:
-                print(f"  {error['type']}: {error['message']}")
-            sys.exit(1)
-            
-    except Exception as e:
-        print(f"[ERROR] Error: {e}")
-        sys.exit(1)
+    """Command line interface (see cli.py; --tree and --ast print the parse results)"""
+    from cli import main as cli_main
+    sys.exit(cli_main())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Grammar Profiler
+Nyelvtan-szabályonkénti kétértelműség-, nyers Tree- és költségprofil egy korpuszon
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from lark import Lark, Token, Tree
+from lark.exceptions import LarkError
+
+from callprofile import CallProfile
+from parser import StringPool
+from transformer import ProfilingTransformer, SocialMediaContentTransformer
+
+GRAMMAR_FILE = Path(__file__).parent / "grammar.lark"
+
+
+def _rule_stats():
+    return {'nodes': 0, 'ambiguous': 0, 'raw_trees': 0, 'parse_seconds': 0.0,
+            'parse_samples': 0, 'transform_seconds': 0.0}
+
+
+def _position(node):
+    meta = getattr(node, 'meta', None)
+    if meta is None or getattr(meta, 'empty', True):
+        return None, None
+    return meta.line, meta.column
+
+
+class GrammarProfiler:
+    """Parses a corpus with the Earley grammar and profiles it rule by rule
+
+    For every rule it counts parse tree nodes, ``_ambig`` nodes (explicit
+    ambiguities) below which the rule appears as an alternative, Lark Trees
+    of the rule that survive the transformer, transformer time, and -- when
+    ``isolate`` is set -- the time to re-parse each node's source span with
+    the rule as start symbol (inclusive of its subrules).  It also checks
+    whether the grammar builds as LALR(1) and whether the LALR parser gives
+    the same AST for every file, which is what a move to a deterministic
+    parser depends on.
+    """
+
+    def __init__(self, isolate=True, lalr=True):
+        grammar = GRAMMAR_FILE.read_text(encoding='utf-8')
+        self.earley = Lark(grammar, start=['start', 'module'], parser='earley',
+                           ambiguity='explicit', propagate_positions=True)
+        # Aliased alternatives (-> name) re-parse with the rule they belong to
+        self.origins = {}
+        for grammar_rule in self.earley.rules:
+            name = str(grammar_rule.origin.name)
+            if not name.startswith('_'):
+                self.origins[grammar_rule.alias or name] = name
+        self.isolated = None
+        if isolate:
+            self.isolated = Lark(grammar, start=sorted(set(self.origins.values())),
+                                 parser='earley', ambiguity='explicit')
+        self.lalr = None
+        self.lalr_error = None
+        if lalr:
+            try:
+                self.lalr = Lark(grammar, start=['start', 'module'], parser='lalr')
+            except LarkError as e:
+                self.lalr_error = f"{type(e).__name__}: {e}"
+        self.rules = defaultdict(_rule_stats)
+        self.files = []
+        self.ambiguities = []
+        self.raw_trees = []
+
+    # ===== CORPUS =====
+
+    def profile_file(self, path):
+        """Profile one file; returns its per-file summary"""
+        source = Path(path).read_text(encoding='utf-8')
+        return self.profile_source(source, str(path))
+
+    def profile_source(self, source, name='<string>'):
+        """Profile one source text (a campaign, or a module without one)"""
+        summary = {'file': name, 'start': None, 'parse_seconds': None, 'nodes': 0,
+                   'error': None, 'lalr': None}
+        self.files.append(summary)
+        tree = None
+        for start in ('start', 'module'):
+            started = time.perf_counter()
+            try:
+                tree = self.earley.parse(source, start=start)
+            except LarkError as e:
+                summary['error'] = f"{type(e).__name__}: {e}"
+                continue
+            summary.update(start=start, parse_seconds=time.perf_counter() - started, error=None)
+            break
+        if tree is None:
+            return summary
+
+        self._walk(tree, source, name, summary)
+        # Rule callback times, exclusive of subtrees, as in cli.py --profile
+        profile = CallProfile()
+        transformer = ProfilingTransformer(StringPool(), profile)
+        try:
+            ast = transformer.transform(tree)
+        except LarkError as e:
+            # Value conversions (e.g. an invalid date) fail as a VisitError
+            summary['error'] = f"{type(e).__name__}: {e}"
+            return summary
+        for rule_name, stats in profile.report().items():
+            self.rules[rule_name]['transform_seconds'] += stats['self_seconds']
+        self._find_raw(ast, name, ())
+        if self.lalr is not None:
+            summary['lalr'] = self._compare_lalr(source, summary['start'], ast)
+        return summary
+
+    def _walk(self, tree, source, name, summary):
+        stack = [(tree, None)]
+        while stack:
+            node, parent = stack.pop()
+            if not isinstance(node, Tree):
+                continue
+            summary['nodes'] += 1
+            if node.data == '_ambig':
+                alternatives = [child.data for child in node.children if isinstance(child, Tree)]
+                line, column = _position(node)
+                for rule_name in set(alternatives):
+                    self.rules[rule_name]['ambiguous'] += 1
+                self.ambiguities.append({'file': name, 'parent': parent, 'alternatives': alternatives,
+                                         'line': line, 'column': column})
+            else:
+                self.rules[node.data]['nodes'] += 1
+                self._time_span(node, source)
+            for child in node.children:
+                stack.append((child, node.data if node.data != '_ambig' else parent))
+
+    def _time_span(self, node, source):
+        if self.isolated is None or getattr(node.meta, 'empty', True):
+            return
+        start = self.origins.get(node.data)
+        if start is None:
+            return
+        span = source[node.meta.start_pos:node.meta.end_pos]
+        started = time.perf_counter()
+        try:
+            self.isolated.parse(span, start=start)
+        except LarkError:
+            # Spans of rules that need their surroundings (e.g. optional suffixes)
+            return
+        stats = self.rules[node.data]
+        stats['parse_seconds'] += time.perf_counter() - started
+        stats['parse_samples'] += 1
+
+    def _find_raw(self, value, name, path):
+        if isinstance(value, Tree):
+            self.rules[value.data]['raw_trees'] += 1
+            line, column = _position(value)
+            self.raw_trees.append({'file': name, 'rule': value.data, 'path': list(path),
+                                   'line': line, 'column': column})
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                self._find_raw(item, name, path + (key,))
+        elif isinstance(value, (list, tuple)):
+            for index, item in enumerate(value):
+                self._find_raw(item, name, path + (index,))
+        elif isinstance(value, Token):
+            # Tokens are strings, but a leaked one means a missing conversion
+            self.raw_trees.append({'file': name, 'rule': f"Token({value.type})", 'path': list(path),
+                                   'line': value.line, 'column': value.column})
+
+    def _compare_lalr(self, source, start, ast):
+        try:
+            tree = self.lalr.parse(source, start=start)
+        except LarkError as e:
+            return f"fails: {type(e).__name__}: {str(e).splitlines()[0]}"
+        try:
+            lalr_ast = SocialMediaContentTransformer(StringPool()).transform(tree)
+        except LarkError as e:
+            return f"fails: {type(e).__name__}: {str(e).splitlines()[0]}"
+        return 'same' if lalr_ast == ast else 'different AST'
+
+    # ===== REPORT =====
+
+    def report(self):
+        """Profile results as one JSON-serializable dict"""
+        parsed = [f for f in self.files if f['error'] is None]
+        return {
+            'files': len(self.files),
+            'parsed': len(parsed),
+            'parse_seconds': sum(f['parse_seconds'] for f in parsed),
+            'rules': {name: dict(stats) for name, stats in sorted(self.rules.items())},
+            'ambiguities': self.ambiguities,
+            'raw_trees': self.raw_trees,
+            'lalr': {
+                'builds': self.lalr is not None,
+                'error': self.lalr_error,
+                'same': sum(f['lalr'] == 'same' for f in parsed),
+                'mismatches': [{'file': f['file'], 'result': f['lalr']}
+                               for f in parsed if f['lalr'] not in (None, 'same')]
+            },
+            'errors': [{'file': f['file'], 'error': f['error']} for f in self.files if f['error']]
+        }
+
+
+def format_report(report, top=15):
+    """Human-readable summary: costliest rules first, then findings"""
+    lines = [f"{report['parsed']}/{report['files']} files parsed in {report['parse_seconds'] * 1000:.1f} ms"]
+    lines.append(f"{'rule':<26}{'nodes':>8}{'parse ms':>11}{'ms/node':>9}{'xform ms':>10}{'ambig':>7}{'raw':>5}")
+    rules = sorted(report['rules'].items(), reverse=True,
+                   key=lambda item: (item[1]['parse_seconds'], item[1]['transform_seconds']))
+    for name, stats in rules[:top]:
+        per_node = stats['parse_seconds'] / stats['parse_samples'] if stats['parse_samples'] else 0
+        lines.append(f"{name:<26}{stats['nodes']:>8}{stats['parse_seconds'] * 1000:>11.2f}"
+                     f"{per_node * 1000:>9.3f}{stats['transform_seconds'] * 1000:>10.2f}"
+                     f"{stats['ambiguous']:>7}{stats['raw_trees']:>5}")
+    for ambiguity in report['ambiguities']:
+        lines.append(f"AMBIGUOUS {ambiguity['file']}:{ambiguity['line']}:{ambiguity['column']} "
+                     f"in {ambiguity['parent']}: {' | '.join(ambiguity['alternatives'])}")
+    for raw in report['raw_trees']:
+        lines.append(f"RAW TREE {raw['file']}:{raw['line']}:{raw['column']} "
+                     f"{raw['rule']} at {'/'.join(map(str, raw['path']))}")
+    lalr = report['lalr']
+    if not lalr['builds']:
+        lines.append(f"LALR: grammar does not build ({lalr['error']})")
+    else:
+        lines.append(f"LALR: builds; same AST for {lalr['same']}/{report['parsed']} files")
+        for mismatch in lalr['mismatches']:
+            lines.append(f"LALR {mismatch['file']}: {mismatch['result']}")
+    for error in report['errors']:
+        lines.append(f"ERROR {error['file']}: {error['error'].splitlines()[0]}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """Command line interface: profile the grammar on .smp files or directories"""
+    arg_parser = argparse.ArgumentParser(description="Profile grammar ambiguity and cost on a corpus")
+    arg_parser.add_argument('paths', nargs='+', help="Files or directories of .smp files")
+    arg_parser.add_argument('--json', action='store_true', help="Print the full report as JSON")
+    arg_parser.add_argument('--top', type=int, default=15, help="Number of rules to list")
+    arg_parser.add_argument('--no-isolate', action='store_true',
+                            help="Skip per-rule re-parsing (faster, no per-rule parse times)")
+    arg_parser.add_argument('--no-lalr', action='store_true', help="Skip the LALR comparison")
+    args = arg_parser.parse_args(argv)
+
+    profiler = GrammarProfiler(isolate=not args.no_isolate, lalr=not args.no_lalr)
+    for path in map(Path, args.paths):
+        files = sorted(path.rglob('*.smp')) if path.is_dir() else [path]
+        for file_path in files:
+            profiler.profile_file(file_path)
+    report = profiler.report()
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False, default=str))
+    else:
+        print(format_report(report, args.top))
+    return 1 if report['ambiguities'] or report['raw_trees'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Schedule Expansion
+Ütemezési szabályok lusta kibontása konkrét időpontokra
+"""
+
+import heapq
+from datetime import date, datetime, time, timedelta
+
+# Months have no fixed length; campaigns count them as 30 days
+UNIT_SECONDS = {
+    'minutes': 60,
+    'hours': 3600,
+    'days': 86400,
+    'weeks': 7 * 86400,
+    'months': 30 * 86400,
+}
+
+WEEKDAYS = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+    'friday': 4, 'saturday': 5, 'sunday': 6,
+}
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def duration_delta(duration):
+    """timedelta of a {'value', 'unit'} duration"""
+    return timedelta(seconds=duration['value'] * UNIT_SECONDS[duration['unit']])
+
+
+def weekday_number(day):
+    """0 for Monday ... 6 for Sunday"""
+    try:
+        return WEEKDAYS[day.strip().casefold()]
+    except KeyError:
+        raise ValueError(f"Invalid weekday: {day}")
+
+
+def campaign_window(ast, start):
+    """(start, end) of a campaign starting at ``start``; ``end`` is exclusive"""
+    return start, start + duration_delta(ast['duration'])
+
+
+def _at(day, minutes, tzinfo):
+    return datetime.combine(day, time(minutes // 60, minutes % 60), tzinfo)
+
+
+def _days(start, end):
+    """Calendar dates touched by the window [start, end)"""
+    day = start.date()
+    while _at(day, 0, start.tzinfo) < end:
+        yield day
+        day += timedelta(days=1)
+
+
+def _interval_days(schedule, start, end):
+    """Occurrences of day-or-longer intervals: every N days from the start date"""
+    step = duration_delta(schedule['every']).days
+    until = schedule.get('until')
+    if step <= 0:
+        return
+    times = sorted(set(schedule['times'])) or [start.hour * 60 + start.minute]
+    if isinstance(until, int):
+        # A time cut-off drops the anchors after it on every day
+        times = [t for t in times if t <= until]
+    day = start.date()
+    while True:
+        if isinstance(until, date) and day > until:
+            return
+        if _at(day, 0, start.tzinfo) >= end:
+            return
+        for minutes in times:
+            yield _at(day, minutes, start.tzinfo)
+        day += timedelta(days=step)
+
+
+def _interval_subday(schedule, start, end):
+    """Occurrences of hour/minute intervals
+
+    With ``at`` anchors every day runs from each anchor in steps of N until
+    the ``until`` time (or the end of the day); without anchors the interval
+    runs continuously from the campaign start.
+    """
+    step = schedule['every']['value'] * UNIT_SECONDS[schedule['every']['unit']] // 60
+    until = schedule.get('until')
+    if step <= 0:
+        return
+    if not schedule['times']:
+        moment = start
+        while moment < end:
+            if isinstance(until, date) and moment.date() > until:
+                return
+            if not isinstance(until, int) or moment.hour * 60 + moment.minute <= until:
+                yield moment
+            moment += timedelta(minutes=step)
+        return
+    last = until if isinstance(until, int) else MINUTES_PER_DAY - 1
+    minutes = set()
+    for anchor in schedule['times']:
+        minutes.update(range(anchor, last + 1, step))
+    times = sorted(minutes)
+    for day in _days(start, end):
+        if isinstance(until, date) and day > until:
+            return
+        for m in times:
+            yield _at(day, m, start.tzinfo)
+
+
+def _occurrences(schedule, start, end):
+    kind = schedule['type']
+    if kind == 'daily':
+        times = sorted(set(schedule['times']))
+        for day in _days(start, end):
+            for minutes in times:
+                yield _at(day, minutes, start.tzinfo)
+    elif kind == 'weekly':
+        weekday = weekday_number(schedule['day'])
+        times = sorted(set(schedule['times']))
+        day = start.date() + timedelta(days=(weekday - start.weekday()) % 7)
+        while _at(day, 0, start.tzinfo) < end:
+            for minutes in times:
+                yield _at(day, minutes, start.tzinfo)
+            day += timedelta(weeks=1)
+    elif kind == 'at':
+        # One-shot: the first time each "HH:MM" comes round after the start
+        moments = []
+        for minutes in set(schedule['times']):
+            moment = _at(start.date(), minutes, start.tzinfo)
+            if moment < start:
+                moment += timedelta(days=1)
+            moments.append(moment)
+        yield from sorted(moments)
+    elif kind == 'interval':
+        if schedule['every']['unit'] in ('minutes', 'hours'):
+            yield from _interval_subday(schedule, start, end)
+        else:
+            yield from _interval_days(schedule, start, end)
+    else:
+        raise ValueError(f"Unknown schedule type: {kind}")
+
+
+def expand_schedule(schedule, start, end):
+    """Lazily yield the datetimes of a schedule inside [start, end), in order"""
+    for moment in _occurrences(schedule, start, end):
+        if moment >= end:
+            return
+        if moment >= start:
+            yield moment
+
+
+def _tagged(moments, order, item):
+    for moment in moments:
+        yield moment, order, item
+
+
+def expand_campaign(ast, start):
+    """Lazily yield (datetime, content_item) for a whole campaign, in time order"""
+    window_start, window_end = campaign_window(ast, start)
+    streams = []
+    for order, item in enumerate(ast['body']['content']):
+        schedule = item['properties'].get('schedule')
+        if schedule:
+            moments = expand_schedule(schedule, window_start, window_end)
+            streams.append(_tagged(moments, order, item))
+    for moment, _, item in heapq.merge(*streams, key=lambda entry: entry[:2]):
+        yield moment, item
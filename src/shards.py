@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Sharded Validation
+Nagy korpuszok szilánkokra bontott, folytatható ellenőrzése és az eredmények összefésülése
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+
+RESULTS_NAME = "shard-{shard:04d}-of-{shards:04d}.jsonl"
+CHECKPOINT_NAME = "shard-{shard:04d}-of-{shards:04d}.checkpoint.json"
+
+
+def read_manifest(path):
+    """File paths listed in a manifest, one per line (blank lines and # comments skipped)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+def shard_of(path, shards):
+    """Shard number of a path: a stable hash, so workers need no coordination"""
+    digest = hashlib.blake2b(str(path).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % shards
+
+
+def partition(paths, shards):
+    """Split a manifest into ``shards`` lists, keeping manifest order within each"""
+    if shards < 1:
+        raise ValueError("Need at least one shard")
+    parts = [[] for _ in range(shards)]
+    for path in paths:
+        parts[shard_of(path, shards)].append(path)
+    return parts
+
+
+def _fingerprint(paths, shards):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(shards).encode())
+    for path in paths:
+        h.update(b'\0')
+        h.update(str(path).encode('utf-8'))
+    return h.hexdigest()
+
+
+def _write_json(path, value):
+    """Replace ``path`` atomically: readers see the old or the new file, never half of one"""
+    temporary = path.with_name(path.name + '.tmp')
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(value, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+class ShardWorker:
+    """Validates one shard of a manifest with checkpoints, so it can resume
+
+    Results go to ``shard-NNNN-of-MMMM.jsonl`` in ``out_dir``, one JSON record
+    per file in manifest order.  Every ``checkpoint_every`` files the results
+    are synced to disk and the checkpoint records how many files are done
+    and the byte length of the results file at that point.  A restarted
+    worker cuts the results back to that length, dropping records written
+    after the last checkpoint, and continues with the next file.  Without
+    ``limits`` a parse is interrupted as soon as it spends the default
+    ResourceLimits budgets, so one pathological file cannot stall the shard.
+    """
+
+    def __init__(self, manifest, shard, shards, out_dir, backend='fast', checkpoint_every=100, limits=None):
+        if not 0 <= shard < shards:
+            raise ValueError(f"Shard {shard} out of range for {shards} shards")
+        self.shard = shard
+        self.shards = shards
+        self.paths = partition(manifest, shards)[shard]
+        self.fingerprint = _fingerprint(self.paths, shards)
+        self.out_dir = Path(out_dir)
+        self.results_path = self.out_dir / RESULTS_NAME.format(shard=shard, shards=shards)
+        self.checkpoint_path = self.out_dir / CHECKPOINT_NAME.format(shard=shard, shards=shards)
+        self.backend = backend
+        self.checkpoint_every = max(1, checkpoint_every)
+        if limits is None:
+            from limits import ResourceLimits
+            limits = ResourceLimits(interrupt=True)
+        self.limits = limits
+        self.parser = None
+
+    def load_checkpoint(self):
+        """Saved progress of this shard, or a fresh one"""
+        if not self.checkpoint_path.exists():
+            return {'shard': self.shard, 'shards': self.shards, 'fingerprint': self.fingerprint,
+                    'files': len(self.paths), 'done': 0, 'offset': 0, 'complete': False}
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if checkpoint['fingerprint'] != self.fingerprint:
+            raise ValueError(f"{self.checkpoint_path} belongs to another manifest or shard count; "
+                             f"use a new output directory")
+        return checkpoint
+
+    def run(self, max_files=None):
+        """Validate the rest of the shard (at most ``max_files`` files); returns the checkpoint"""
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        checkpoint = self.load_checkpoint()
+        if checkpoint['complete']:
+            return checkpoint
+        if not self.checkpoint_path.exists():
+            # Record the shard count right away, so a merge sees this shard as started
+            _write_json(self.checkpoint_path, checkpoint)
+        if self.parser is None:
+            from parser import SocialMediaContentParser
+            self.parser = SocialMediaContentParser(backend=self.backend, limits=self.limits, verbose=False)
+
+        mode = 'r+b' if self.results_path.exists() else 'wb'
+        with open(self.results_path, mode) as results:
+            results.truncate(checkpoint['offset'])
+            results.seek(checkpoint['offset'])
+            stop = len(self.paths) if max_files is None else min(len(self.paths), checkpoint['done'] + max_files)
+            while checkpoint['done'] < stop:
+                batch = self.paths[checkpoint['done']:min(stop, checkpoint['done'] + self.checkpoint_every)]
+                for record in self.check_batch(batch):
+                    results.write(json.dumps(record, ensure_ascii=False, default=str).encode('utf-8') + b'\n')
+                results.flush()
+                os.fsync(results.fileno())
+                checkpoint['done'] += len(batch)
+                checkpoint['offset'] = results.tell()
+                checkpoint['complete'] = checkpoint['done'] == len(self.paths)
+                _write_json(self.checkpoint_path, checkpoint)
+        if not self.paths:
+            checkpoint['complete'] = True
+            _write_json(self.checkpoint_path, checkpoint)
+        return checkpoint
+
+    def check_batch(self, paths):
+        """Parse and validate a batch of files; one record per file"""
+        records = []
+        # (record, ast) pairs for the feasibility rules, which run per batch
+        validated = []
+        for path, result in self.parser.parse_files(paths):
+            record = {'path': path, 'ok': True, 'errors': [], 'warnings': [], 'findings': []}
+            records.append(record)
+            if not result['success']:
+                record['ok'] = False
+                record['errors'] = result['errors']
+                continue
+            record['warnings'] = self.parser.validate_semantic(result['ast'])
+            record['ok'] = not record['warnings']
+            validated.append((record, result['ast']))
+        if validated:
+            from feasibility import check_feasibility
+            for finding in check_feasibility([ast for _, ast in validated]):
+                record = validated[finding['index']][0]
+                record['findings'].append({key: finding[key] for key in ('code', 'severity', 'item', 'message')})
+                if finding['severity'] == 'error':
+                    record['ok'] = False
+        return records
+
+
+def _read_results(path, offset):
+    """Checkpointed records of a shard; anything after ``offset`` is uncommitted"""
+    with open(path, 'rb') as f:
+        data = f.read(offset)
+    return [json.loads(line) for line in data.splitlines() if line]
+
+
+def merge_reports(out_dir, shards=None):
+    """Merge the shard outputs in ``out_dir`` into one report
+
+    ``shards`` is the expected shard count; without it the count recorded
+    in the checkpoints is used.  Shards without a checkpoint, or not yet
+    complete, are listed under ``missing``/``incomplete`` and their
+    checkpointed records still count.  A directory without any checkpoint
+    is never complete.
+    """
+    out_dir = Path(out_dir)
+    checkpoints = []
+    for path in sorted(out_dir.glob("shard-*-of-*.checkpoint.json")):
+        with open(path, 'r', encoding='utf-8') as f:
+            checkpoints.append(json.load(f))
+    counts = {checkpoint['shards'] for checkpoint in checkpoints}
+    if shards is not None:
+        counts.add(shards)
+    if len(counts) > 1:
+        raise ValueError(f"{out_dir} mixes runs with different shard counts: {sorted(counts)}")
+    shards = counts.pop() if counts else 0
+
+    files = ok = 0
+    failures = []
+    findings = Counter()
+    for checkpoint in checkpoints:
+        results_path = out_dir / RESULTS_NAME.format(shard=checkpoint['shard'], shards=shards)
+        for record in _read_results(results_path, checkpoint['offset']):
+            files += 1
+            ok += record['ok']
+            findings.update(finding['code'] for finding in record['findings'])
+            if not record['ok']:
+                failures.append(record)
+    seen = {checkpoint['shard'] for checkpoint in checkpoints}
+    return {
+        'shards': shards,
+        'complete': (bool(checkpoints) and all(checkpoint['complete'] for checkpoint in checkpoints)
+                     and len(seen) == shards),
+        'missing': [shard for shard in range(shards) if shard not in seen],
+        'incomplete': [checkpoint['shard'] for checkpoint in checkpoints if not checkpoint['complete']],
+        'expected_files': sum(checkpoint['files'] for checkpoint in checkpoints),
+        'files': files,
+        'ok': ok,
+        'failed': len(failures),
+        'findings': dict(sorted(findings.items())),
+        'failures': sorted(failures, key=lambda record: record['path'])
+    }
+
+
+def format_report(report):
+    """Human-readable merged report"""
+    lines = [f"{report['files']} files checked in {report['shards']} shard(s): "
+             f"{report['ok']} ok, {report['failed']} failed"]
+    if not report['shards']:
+        lines.append("INCOMPLETE: no shard checkpoints found")
+    elif not report['complete']:
+        lines.append(f"INCOMPLETE: missing shards {report['missing']}, unfinished shards {report['incomplete']} "
+                     f"({report['files']}/{report['expected_files']} files of the started shards)")
+    for code, count in report['findings'].items():
+        lines.append(f"  {code}: {count}")
+    for record in report['failures']:
+        lines.append(f"[FAILED] {record['path']}")
+        for error in record['errors']:
+            lines.append(f"  {error['type']}: {error['message']}")
+        for warning in record['warnings']:
+            lines.append(f"  [WARNING] {warning}")
+        for finding in record['findings']:
+            if finding['severity'] == 'error':
+                lines.append(f"  [ERROR] {finding['code']} {finding['message']}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """Command line interface: run one shard of a manifest, or merge shard outputs"""
+    arg_parser = argparse.ArgumentParser(description="Resumable sharded validation of a file manifest")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help="Validate one shard (resumes from its checkpoint)")
+    run.add_argument('manifest', help="File with one .smp path per line")
+    run.add_argument('out_dir', help="Directory for shard results and checkpoints")
+    run.add_argument('--shard', type=int, default=0, help="Shard number (0-based)")
+    run.add_argument('--shards', type=int, default=1, help="Total number of shards")
+    run.add_argument('--checkpoint-every', type=int, default=100, help="Files between checkpoints")
+    run.add_argument('--backend', choices=('fast', 'lark'), default='fast', help="Parser backend")
+    run.add_argument('--no-interrupt', action='store_true',
+                     help="Check the time and memory budgets only after each parse, without a SIGALRM timer")
+    merge = commands.add_parser('merge', help="Merge shard outputs into one report")
+    merge.add_argument('out_dir', help="Directory with shard results and checkpoints")
+    merge.add_argument('--shards', type=int,
+                       help="Expected number of shards (default: the count recorded in the checkpoints)")
+    merge.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = arg_parser.parse_args(argv)
+
+    if args.command == 'run':
+        limits = None
+        if args.no_interrupt:
+            from limits import ResourceLimits
+            limits = ResourceLimits(interrupt=False)
+        worker = ShardWorker(read_manifest(args.manifest), args.shard, args.shards, args.out_dir,
+                             backend=args.backend, checkpoint_every=args.checkpoint_every, limits=limits)
+        checkpoint = worker.run()
+        print(f"shard {args.shard}/{args.shards}: {checkpoint['done']}/{checkpoint['files']} files")
+        return 0
+    report = merge_reports(args.out_dir, args.shards)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print(format_report(report))
+    return 0 if report['complete'] and not report['failed'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
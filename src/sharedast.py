@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Shared-memory AST Transfer
+Tömör AST-kódolás megosztott memóriában többfolyamatos feldolgozáshoz, lusta visszaolvasással
+"""
+
+import struct
+from array import array
+from collections.abc import Mapping, Sequence
+from datetime import date
+from decimal import Decimal
+
+MAGIC = b'SMA1'
+# magic, number of values, node words, strings, string blob bytes; then the
+# root slots, the node words, the string offsets and the UTF-8 string blob
+HEADER = struct.Struct('<4sIIII')
+
+# Value slots are two 32-bit words: a tag and a payload
+NONE, FALSE, TRUE, INT, STR, DECIMAL, DATE, LIST, DICT, BIGINT = range(10)
+
+_UINT32 = 1 << 32
+
+
+class _Encoder:
+    """Flattens ASTs into one word array and a table of distinct strings"""
+
+    def __init__(self):
+        self.words = array('I')
+        self.strings = {}
+
+    def string(self, text):
+        index = self.strings.get(text)
+        if index is None:
+            index = self.strings[text] = len(self.strings)
+        return index
+
+    def slot(self, value):
+        """(tag, payload) of a value; containers are written out first"""
+        kind = type(value)
+        if kind is str:
+            index = self.strings.get(value)
+            if index is None:
+                index = self.strings[value] = len(self.strings)
+            return STR, index
+        if kind is dict:
+            flat = [len(value)]
+            for key, item in value.items():
+                flat.append(self.string(key))
+                flat.extend(self.slot(item))
+            offset = len(self.words)
+            self.words.extend(flat)
+            return DICT, offset
+        if kind is list or kind is tuple:
+            flat = [len(value)]
+            for item in value:
+                flat.extend(self.slot(item))
+            offset = len(self.words)
+            self.words.extend(flat)
+            return LIST, offset
+        if value is None:
+            return NONE, 0
+        if kind is bool:
+            return (TRUE if value else FALSE), 0
+        if isinstance(value, int):
+            if 0 <= value < _UINT32:
+                return INT, value
+            return BIGINT, self.string(str(value))
+        if isinstance(value, str):
+            return STR, self.string(str(value))
+        if isinstance(value, Decimal):
+            return DECIMAL, self.string(str(value))
+        if isinstance(value, date):
+            return DATE, value.toordinal()
+        if isinstance(value, dict):
+            return self.slot(dict(value))
+        raise TypeError(f"Cannot encode {type(value).__name__} in an AST")
+
+
+def encoded_size(values):
+    """Encode ``values`` (ASTs or None) and return ``(size, write)``
+
+    ``write(buffer)`` fills the first ``size`` bytes of a writable buffer,
+    e.g. a ``SharedMemory.buf``, so the result is copied only once.
+    """
+    encoder = _Encoder()
+    roots = array('I')
+    for value in values:
+        roots.extend(encoder.slot(value))
+    words = encoder.words
+    blobs = [text.encode('utf-8') for text in encoder.strings]
+    offsets = array('I', [0])
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    blob = b''.join(blobs)
+    size = HEADER.size + 4 * (len(roots) + len(words) + len(offsets)) + len(blob)
+
+    def write(buffer):
+        HEADER.pack_into(buffer, 0, MAGIC, len(roots) // 2, len(words), len(blobs), len(blob))
+        position = HEADER.size
+        for part in (roots.tobytes(), words.tobytes(), offsets.tobytes(), blob):
+            buffer[position:position + len(part)] = part
+            position += len(part)
+
+    return size, write
+
+
+def encode(values):
+    """Encoded bytes of a list of ASTs (or None for failed parses)"""
+    size, write = encoded_size(values)
+    buffer = bytearray(size)
+    write(buffer)
+    return bytes(buffer)
+
+
+class EncodedBatch:
+    """Read-only view of encoded ASTs in a buffer, without copying it
+
+    ``batch[i]`` is a lazy view of the i-th AST: dicts and lists behave as
+    read-only mappings and sequences that decode their items on access,
+    straight from the buffer.  ``decode(i)`` builds the plain dict AST, equal
+    to the one that was encoded.  The views are valid until ``release()``.
+    """
+
+    def __init__(self, buffer):
+        view = memoryview(buffer)
+        magic, self._count, n_words, n_strings, blob_size = HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError("Not an encoded AST batch")
+        start = HEADER.size
+        self._roots = view[start:start + 8 * self._count].cast('I')
+        start += 8 * self._count
+        self._words = view[start:start + 4 * n_words].cast('I')
+        start += 4 * n_words
+        self._offsets = view[start:start + 4 * (n_strings + 1)].cast('I')
+        start += 4 * (n_strings + 1)
+        self._blob = view[start:start + blob_size]
+        self._view = view
+        self._strings = {}
+
+    def __len__(self):
+        return self._count
+
+    def _root(self, index):
+        if not -self._count <= index < self._count:
+            raise IndexError("AST index out of range")
+        index %= self._count
+        return self._roots[2 * index], self._roots[2 * index + 1]
+
+    def __getitem__(self, index):
+        return self._value(*self._root(index), lazy=True)
+
+    def decode(self, index):
+        """Plain (dict/list) AST at ``index``"""
+        return self._value(*self._root(index), lazy=False)
+
+    def release(self):
+        """Drop the buffer views, e.g. before closing a shared memory segment"""
+        self._strings.clear()
+        for view in (self._roots, self._words, self._offsets, self._blob, self._view):
+            view.release()
+
+    def _string(self, index):
+        text = self._strings.get(index)
+        if text is None:
+            text = self._strings[index] = str(self._blob[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+        return text
+
+    def _value(self, tag, payload, lazy):
+        if tag == STR:
+            return self._string(payload)
+        if tag == INT:
+            return payload
+        if tag == DICT:
+            if lazy:
+                return LazyDict(self, payload)
+            return self._plain_dict(payload)
+        if tag == LIST:
+            if lazy:
+                return LazyList(self, payload)
+            return self._plain_list(payload)
+        if tag == NONE:
+            return None
+        if tag == TRUE:
+            return True
+        if tag == FALSE:
+            return False
+        if tag == DECIMAL:
+            return Decimal(self._string(payload))
+        if tag == DATE:
+            return date.fromordinal(payload)
+        if tag == BIGINT:
+            return int(self._string(payload))
+        raise ValueError(f"Corrupt AST buffer: tag {tag}")
+
+
+    def _plain_dict(self, offset):
+        words, string, value = self._words, self._string, self._value
+        result = {}
+        for at in range(offset + 1, offset + 1 + 3 * words[offset], 3):
+            tag, payload = words[at + 1], words[at + 2]
+            # Strings and numbers are most of an AST; skip the dispatch for them
+            result[string(words[at])] = (string(payload) if tag == STR else payload if tag == INT
+                                         else value(tag, payload, False))
+        return result
+
+    def _plain_list(self, offset):
+        words, string, value = self._words, self._string, self._value
+        result = []
+        for at in range(offset + 1, offset + 1 + 2 * words[offset], 2):
+            tag, payload = words[at], words[at + 1]
+            result.append(string(payload) if tag == STR else payload if tag == INT
+                          else value(tag, payload, False))
+        return result
+
+
+class LazyDict(Mapping):
+    """Read-only dict view of an encoded AST node"""
+
+    __slots__ = ('_batch', '_offset')
+
+    def __init__(self, batch, offset):
+        self._batch = batch
+        self._offset = offset
+
+    def __len__(self):
+        return self._batch._words[self._offset]
+
+    def __iter__(self):
+        words = self._batch._words
+        for at in range(self._offset + 1, self._offset + 1 + 3 * words[self._offset], 3):
+            yield self._batch._string(words[at])
+
+    def __getitem__(self, key):
+        batch = self._batch
+        words = batch._words
+        # AST dicts have a handful of keys, so a scan beats building an index
+        for at in range(self._offset + 1, self._offset + 1 + 3 * words[self._offset], 3):
+            if batch._string(words[at]) == key:
+                return batch._value(words[at + 1], words[at + 2], lazy=True)
+        raise KeyError(key)
+
+    def decode(self):
+        """Plain dict copy of this node"""
+        return self._batch._value(DICT, self._offset, lazy=False)
+
+    def __repr__(self):
+        return f"LazyDict({self.decode()!r})"
+
+
+class LazyList(Sequence):
+    """Read-only list view of an encoded AST node"""
+
+    __slots__ = ('_batch', '_offset')
+
+    def __init__(self, batch, offset):
+        self._batch = batch
+        self._offset = offset
+
+    def __len__(self):
+        return self._batch._words[self._offset]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        length = len(self)
+        if not -length <= index < length:
+            raise IndexError("list index out of range")
+        at = self._offset + 1 + 2 * (index % length)
+        words = self._batch._words
+        return self._batch._value(words[at], words[at + 1], lazy=True)
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def decode(self):
+        """Plain list copy of this node"""
+        return self._batch._value(LIST, self._offset, lazy=False)
+
+    def __repr__(self):
+        return f"LazyList({self.decode()!r})"
+
+
+# ===== MULTI-PROCESS PARSING =====
+
+_WORKER = {}
+
+
+def _init_worker(backend, limits):
+    from parser import SocialMediaContentParser
+    _WORKER['parser'] = SocialMediaContentParser(backend=backend, limits=limits, verbose=False)
+
+
+def _unlink(name):
+    """Free a shared memory segment by name, if it still exists"""
+    from multiprocessing import shared_memory
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    segment.close()
+    segment.unlink()
+
+
+def _parse_chunk(paths, start):
+    """Worker: parse a chunk of files into one shared memory segment
+
+    Only the segment name and the small per-file status travel back through
+    the pipe; Lark parse trees are not transferred.  If the chunk fails as a
+    whole, no segment is left behind: the name is None and every file of
+    the chunk gets the error.
+    """
+    from multiprocessing import shared_memory
+
+    parser = _WORKER['parser']
+    statuses = []
+    asts = []
+    try:
+        for path, result in parser.parse_files(paths, start=start):
+            statuses.append((path, result['success'], result['errors']))
+            asts.append(result['ast'])
+        size, write = encoded_size(asts)
+        segment = shared_memory.SharedMemory(create=True, size=size)
+        try:
+            write(segment.buf)
+        except BaseException:
+            segment.close()
+            segment.unlink()
+            raise
+        name = segment.name
+        segment.close()
+        return name, statuses
+    except Exception as e:
+        error = {'type': 'UnexpectedError', 'message': f"Unexpected error: {type(e).__name__}: {e}"}
+        return None, [(path, False, [error]) for path in paths]
+
+
+class SharedParseResults:
+    """Results of parse_shared(), read from shared memory
+
+    Iterating yields ``{'path', 'success', 'errors', 'ast'}`` dicts in input
+    order, where ``ast`` is a lazy view (``LazyDict``) of the AST, or None.
+    Call ``decode()`` on it for a plain dict.  The views stay valid until
+    ``close()``, which also frees the shared memory.
+    """
+
+    def __init__(self, chunks):
+        from multiprocessing import shared_memory
+        self.names = [name for name, _ in chunks if name is not None]
+        self._segments = []
+        self._batches = []
+        self._statuses = []
+        try:
+            for name, statuses in chunks:
+                batch = None
+                if name is not None:
+                    segment = shared_memory.SharedMemory(name=name)
+                    self._segments.append(segment)
+                    batch = EncodedBatch(segment.buf)
+                self._batches.append(batch)
+                self._statuses.append(statuses)
+        except BaseException:
+            # Free what is attached and the segments not reached yet
+            attached = {segment.name for segment in self._segments}
+            self.close()
+            for name in self.names:
+                if name not in attached:
+                    _unlink(name)
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self):
+        for batch, statuses in zip(self._batches, self._statuses):
+            for index, (path, success, errors) in enumerate(statuses):
+                yield {'path': path, 'success': success, 'errors': errors,
+                       'ast': batch[index] if batch is not None else None}
+
+    def close(self):
+        for batch in self._batches:
+            if batch is not None:
+                batch.release()
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+        self._batches, self._segments, self._statuses = [], [], []
+
+
+def parse_shared(paths, processes=None, chunk_size=32, start='start', backend='fast', limits=None):
+    """Parse files in a process pool, returning the ASTs through shared memory
+
+    Each worker task parses ``chunk_size`` files and encodes their ASTs into
+    one shared memory segment; the parent maps the segments and reads them
+    lazily instead of unpickling object graphs.  If the parent fails while
+    collecting the chunks, the segments received so far are freed.
+    """
+    from functools import partial
+    from multiprocessing import Pool, resource_tracker
+
+    # Workers must share the parent's resource tracker; one of their own
+    # would unlink the segments when the pool shuts down
+    resource_tracker.ensure_running()
+    paths = [str(path) for path in paths]
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    outputs = []
+    try:
+        with Pool(processes, initializer=_init_worker, initargs=(backend, limits)) as pool:
+            for output in pool.imap(partial(_parse_chunk, start=start), chunks):
+                outputs.append(output)
+    except BaseException:
+        for name, _ in outputs:
+            if name is not None:
+                _unlink(name)
+        raise
+    return SharedParseResults(outputs)
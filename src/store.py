@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Campaign Store
+SQLite alapú kampánytár tömeges betöltéssel és indexelt lekérdezésekkel
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from itertools import repeat
+
+from formatter import canonical_hash
+from parser import minutes_to_time, time_to_minutes
+
+SCHEMA = """
+PRAGMA foreign_keys = ON;
+
+CREATE TABLE IF NOT EXISTS campaigns (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL DEFAULT '',
+    name TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    duration_value INTEGER,
+    duration_unit TEXT,
+    UNIQUE (source, name)
+);
+
+CREATE TABLE IF NOT EXISTS platforms (
+    campaign_id INTEGER NOT NULL REFERENCES campaigns(id) ON DELETE CASCADE,
+    platform TEXT NOT NULL,
+    PRIMARY KEY (campaign_id, platform)
+);
+CREATE INDEX IF NOT EXISTS platforms_by_platform ON platforms(platform, campaign_id);
+
+CREATE TABLE IF NOT EXISTS content_items (
+    id INTEGER PRIMARY KEY,
+    campaign_id INTEGER NOT NULL REFERENCES campaigns(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    name TEXT,
+    template TEXT,
+    text TEXT,
+    media TEXT,
+    media_optional INTEGER
+);
+CREATE INDEX IF NOT EXISTS content_by_campaign ON content_items(campaign_id);
+
+CREATE TABLE IF NOT EXISTS hashtags (
+    content_id INTEGER NOT NULL REFERENCES content_items(id) ON DELETE CASCADE,
+    hashtag TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS hashtags_by_tag ON hashtags(hashtag, content_id);
+CREATE INDEX IF NOT EXISTS hashtags_by_content ON hashtags(content_id);
+
+CREATE TABLE IF NOT EXISTS schedules (
+    id INTEGER PRIMARY KEY,
+    content_id INTEGER NOT NULL UNIQUE REFERENCES content_items(id) ON DELETE CASCADE,
+    type TEXT NOT NULL,
+    weekday TEXT,
+    every_value INTEGER,
+    every_unit TEXT,
+    until_date TEXT,
+    until_minutes INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS schedule_times (
+    schedule_id INTEGER NOT NULL REFERENCES schedules(id) ON DELETE CASCADE,
+    minutes INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS times_by_minutes ON schedule_times(minutes, schedule_id);
+CREATE INDEX IF NOT EXISTS times_by_schedule ON schedule_times(schedule_id);
+
+CREATE TABLE IF NOT EXISTS targeting (
+    campaign_id INTEGER PRIMARY KEY REFERENCES campaigns(id) ON DELETE CASCADE,
+    template TEXT,
+    age_min INTEGER,
+    age_max INTEGER,
+    location_optional INTEGER,
+    optional INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS targeting_values (
+    campaign_id INTEGER NOT NULL REFERENCES campaigns(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS targeting_values_by_value ON targeting_values(kind, value);
+CREATE INDEX IF NOT EXISTS targeting_values_by_campaign ON targeting_values(campaign_id);
+
+CREATE TABLE IF NOT EXISTS budgets (
+    campaign_id INTEGER PRIMARY KEY REFERENCES campaigns(id) ON DELETE CASCADE,
+    template TEXT,
+    total TEXT,
+    daily_limit TEXT,
+    daily_limit_optional INTEGER,
+    auto_optimize INTEGER,
+    optional INTEGER
+);
+"""
+
+
+def content_hash(ast):
+    """Hash of a campaign's canonical form (layout, comments and order do not count)"""
+    return canonical_hash(ast)
+
+
+def _flag(value):
+    return None if value is None else int(bool(value))
+
+
+def _text(value):
+    # Decimal amounts are stored as text so they stay exact
+    return None if value is None else str(value)
+
+
+def _minutes(value):
+    if value is None or isinstance(value, int):
+        return value
+    return time_to_minutes(value)
+
+
+class CampaignStore:
+    """Persistent store of parsed campaigns in a normalized SQLite schema
+
+    Campaigns are keyed by source (the file they were parsed from, ``''``
+    when not given) and name, so equally named campaigns of different
+    files are kept apart.  ``ingest`` writes a whole batch in one
+    transaction and skips campaigns whose content hash is already stored;
+    a changed campaign replaces its old rows (child rows cascade).
+    """
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM campaigns").fetchone()[0]
+
+    # ===== INGEST =====
+
+    def ingest(self, results, sources=None):
+        """Store a batch of parse results (or campaign ASTs) in one transaction
+
+        ``sources`` gives the source path of each result, in the same order.
+        Returns counts of ``inserted``, ``updated``, ``skipped`` (unchanged
+        content hash), ``failed`` (unsuccessful parse results) and
+        ``conflicts``: a campaign whose source and name repeat earlier in the
+        batch with different content is not stored, the first one is kept.
+        """
+        stats = {'inserted': 0, 'updated': 0, 'skipped': 0, 'failed': 0, 'conflicts': 0}
+        stored = {(row['source'], row['name']): row['content_hash'] for row in
+                  self.connection.execute("SELECT source, name, content_hash FROM campaigns")}
+        # (source, name) -> content hash of the campaigns of this batch
+        batch = {}
+        with self.connection:
+            for result, source in zip(results, repeat('') if sources is None else map(str, sources)):
+                ast = result.get('ast') if 'success' in result else result
+                if not ast or ('success' in result and not result['success']):
+                    stats['failed'] += 1
+                    continue
+                if ast.get('type') == 'module':
+                    ast = ast.get('campaign')
+                    if not ast:
+                        stats['failed'] += 1
+                        continue
+                digest = content_hash(ast)
+                key = (source, ast['name'])
+                if key in batch:
+                    stats['skipped' if batch[key] == digest else 'conflicts'] += 1
+                    continue
+                batch[key] = digest
+                previous = stored.get(key)
+                if previous == digest:
+                    stats['skipped'] += 1
+                    continue
+                if previous is not None:
+                    self.connection.execute("DELETE FROM campaigns WHERE source = ? AND name = ?", key)
+                    stats['updated'] += 1
+                else:
+                    stats['inserted'] += 1
+                self._insert(ast, digest, source)
+        return stats
+
+    def _insert(self, ast, digest, source=''):
+        execute = self.connection.execute
+        duration = ast.get('duration') or {}
+        campaign_id = execute(
+            "INSERT INTO campaigns (source, name, content_hash, duration_value, duration_unit)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (source, ast['name'], digest, duration.get('value'), duration.get('unit'))).lastrowid
+        body = ast.get('body', {})
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO platforms (campaign_id, platform) VALUES (?, ?)",
+            [(campaign_id, platform) for platform in body.get('platforms', [])])
+
+        for position, item in enumerate(body.get('content', [])):
+            properties = item.get('properties', {})
+            content_id = execute(
+                "INSERT INTO content_items (campaign_id, position, type, name, template, text, media,"
+                " media_optional) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (campaign_id, position, item['type'], item.get('name'), item.get('template'),
+                 properties.get('text'), properties.get('media'), _flag(properties.get('optional')))).lastrowid
+            self.connection.executemany(
+                "INSERT INTO hashtags (content_id, hashtag) VALUES (?, ?)",
+                [(content_id, tag) for tag in properties.get('hashtags', [])])
+            schedule = properties.get('schedule')
+            if schedule:
+                self._insert_schedule(content_id, schedule)
+
+        targeting = body.get('targeting')
+        if targeting:
+            age = targeting.get('age_range') or {}
+            execute(
+                "INSERT INTO targeting (campaign_id, template, age_min, age_max, location_optional, optional)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (campaign_id, targeting.get('use'), age.get('min'), age.get('max'),
+                 _flag(targeting.get('location_optional')), _flag(targeting.get('optional'))))
+            self.connection.executemany(
+                "INSERT INTO targeting_values (campaign_id, kind, value) VALUES (?, ?, ?)",
+                [(campaign_id, kind, value) for kind in ('interests', 'location')
+                 for value in targeting.get(kind, [])])
+
+        budget = body.get('budget')
+        if budget:
+            execute(
+                "INSERT INTO budgets (campaign_id, template, total, daily_limit, daily_limit_optional,"
+                " auto_optimize, optional) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (campaign_id, budget.get('use'), _text(budget.get('total')), _text(budget.get('daily_limit')),
+                 _flag(budget.get('daily_limit_optional')), _flag(budget.get('auto_optimize')),
+                 _flag(budget.get('optional'))))
+
+    def _insert_schedule(self, content_id, schedule):
+        every = schedule.get('every') or {}
+        until = schedule.get('until')
+        schedule_id = self.connection.execute(
+            "INSERT INTO schedules (content_id, type, weekday, every_value, every_unit, until_date, until_minutes)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (content_id, schedule['type'], schedule.get('day'), every.get('value'), every.get('unit'),
+             until.isoformat() if hasattr(until, 'isoformat') else None,
+             until if isinstance(until, int) else None)).lastrowid
+        self.connection.executemany(
+            "INSERT INTO schedule_times (schedule_id, minutes) VALUES (?, ?)",
+            [(schedule_id, minutes) for minutes in schedule.get('times', [])])
+
+    def remove(self, name, source=None):
+        """Delete the campaigns called ``name`` (of ``source`` only, if given) and everything belonging to them"""
+        with self.connection:
+            if source is None:
+                return self.connection.execute("DELETE FROM campaigns WHERE name = ?", (name,)).rowcount > 0
+            return self.connection.execute("DELETE FROM campaigns WHERE source = ? AND name = ?",
+                                           (str(source), name)).rowcount > 0
+
+    # ===== QUERIES =====
+
+    def campaigns(self, platform=None, hashtag=None, between=None):
+        """Names of campaigns matching every given filter
+
+        ``platform`` and ``hashtag`` match exactly; ``between`` is a
+        ``(start, end)`` pair of "HH:MM" times or minutes and matches
+        campaigns with a scheduled time of day in that inclusive range.
+        It filters the time of day only: dates (campaign start, ``until``
+        dates, weekdays) are not considered.  The filters need not hold for
+        the same content item.  A name is listed once per matching source.
+        """
+        where = []
+        params = []
+        if platform is not None:
+            where.append("c.id IN (SELECT campaign_id FROM platforms WHERE platform = ?)")
+            params.append(platform)
+        if hashtag is not None:
+            where.append("c.id IN (SELECT i.campaign_id FROM hashtags h"
+                         " JOIN content_items i ON i.id = h.content_id WHERE h.hashtag = ?)")
+            params.append(hashtag)
+        if between is not None:
+            where.append("c.id IN (SELECT i.campaign_id FROM schedule_times t"
+                         " JOIN schedules s ON s.id = t.schedule_id"
+                         " JOIN content_items i ON i.id = s.content_id WHERE t.minutes BETWEEN ? AND ?)")
+            params.extend(_minutes(value) for value in between)
+        sql = "SELECT c.name FROM campaigns c" + (" WHERE " + " AND ".join(where) if where else "")
+        return sorted(row['name'] for row in self.connection.execute(sql + " ORDER BY c.name", params))
+
+    def content(self, platform=None, hashtag=None, between=None):
+        """Content items matching every given filter, with their campaign
+
+        Each row is a dict with ``campaign``, ``item``, ``type`` and, when
+        ``between`` is given, the matching ``time`` ("HH:MM", time of day
+        only, as in ``campaigns``).
+        """
+        joins = []
+        where = []
+        params = []
+        columns = "c.name AS campaign, i.id AS item_id, i.name AS item, i.type AS type"
+        if platform is not None:
+            joins.append("JOIN platforms p ON p.campaign_id = c.id")
+            where.append("p.platform = ?")
+            params.append(platform)
+        if hashtag is not None:
+            joins.append("JOIN hashtags h ON h.content_id = i.id")
+            where.append("h.hashtag = ?")
+            params.append(hashtag)
+        if between is not None:
+            start, end = (_minutes(value) for value in between)
+            joins.append("JOIN schedules s ON s.content_id = i.id JOIN schedule_times t ON t.schedule_id = s.id")
+            where.append("t.minutes BETWEEN ? AND ?")
+            params.extend((start, end))
+            columns += ", t.minutes AS minutes"
+        sql = (f"SELECT DISTINCT {columns} FROM content_items i JOIN campaigns c ON c.id = i.campaign_id "
+               f"{' '.join(joins)} {'WHERE ' + ' AND '.join(where) if where else ''} "
+               f"ORDER BY c.name, i.position" + (", t.minutes" if between is not None else ""))
+        rows = []
+        for row in self.connection.execute(sql, params):
+            entry = {'campaign': row['campaign'], 'item': row['item'], 'type': row['type']}
+            if between is not None:
+                entry['time'] = minutes_to_time(row['minutes'])
+            rows.append(entry)
+        return rows
+
+    def explain(self, sql, params=()):
+        """SQLite query plan lines for ``sql`` (to check index use)"""
+        return [row['detail'] for row in self.connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def main(argv=None):
+    """Command line interface: ingest campaign files or query the store"""
+    arg_parser = argparse.ArgumentParser(description="SQLite campaign store")
+    arg_parser.add_argument('database', help="SQLite database file")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+    ingest = commands.add_parser('ingest', help="Parse and store .smp files")
+    ingest.add_argument('files', nargs='+')
+    query = commands.add_parser('query', help="List matching content items")
+    query.add_argument('--platform')
+    query.add_argument('--hashtag')
+    query.add_argument('--between', nargs=2, metavar=('START', 'END'), help="Time-of-day range, e.g. 09:00 12:00 (dates are not filtered)")
+    args = arg_parser.parse_args(argv)
+
+    with CampaignStore(args.database) as store:
+        if args.command == 'ingest':
+            from parser import SocialMediaContentParser, print_failure
+            parser = SocialMediaContentParser(backend='fast', verbose=False)
+            results = []
+            for path, result in parser.parse_files(args.files):
+                if not result['success']:
+                    print_failure(path, result, file=sys.stderr)
+                results.append(result)
+            stats = store.ingest(results, [os.path.abspath(path) for path in args.files])
+            print(', '.join(f"{count} {what}" for what, count in stats.items()))
+            return 1 if stats['failed'] or stats['conflicts'] else 0
+        for row in store.content(args.platform, args.hashtag, args.between):
+            print(f"{row['campaign']}\t{row['item']}\t{row['type']}" + (f"\t{row['time']}" if 'time' in row else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
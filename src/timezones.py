@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Timezone Fan-out
+Ütemezések kibontása célzott helyszínenként helyi időre, gyorsítótárazott DST-váltásokkal
+"""
+
+import heapq
+from collections import OrderedDict
+from itertools import groupby
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from schedule import campaign_window, expand_schedule
+
+# Representative zone of the country codes used in targeting.location;
+# IANA zone names ("Europe/Budapest") can be used as locations directly
+LOCATION_ZONES = {
+    'US': 'America/New_York', 'CA': 'America/Toronto', 'MX': 'America/Mexico_City',
+    'BR': 'America/Sao_Paulo', 'AR': 'America/Argentina/Buenos_Aires', 'CL': 'America/Santiago',
+    'UK': 'Europe/London', 'GB': 'Europe/London', 'IE': 'Europe/Dublin', 'PT': 'Europe/Lisbon',
+    'ES': 'Europe/Madrid', 'FR': 'Europe/Paris', 'DE': 'Europe/Berlin', 'IT': 'Europe/Rome',
+    'NL': 'Europe/Amsterdam', 'BE': 'Europe/Brussels', 'AT': 'Europe/Vienna', 'CH': 'Europe/Zurich',
+    'PL': 'Europe/Warsaw', 'HU': 'Europe/Budapest', 'RO': 'Europe/Bucharest', 'SE': 'Europe/Stockholm',
+    'NO': 'Europe/Oslo', 'DK': 'Europe/Copenhagen', 'FI': 'Europe/Helsinki', 'GR': 'Europe/Athens',
+    'TR': 'Europe/Istanbul', 'UA': 'Europe/Kyiv', 'IL': 'Asia/Jerusalem', 'AE': 'Asia/Dubai',
+    'IN': 'Asia/Kolkata', 'CN': 'Asia/Shanghai', 'JP': 'Asia/Tokyo', 'KR': 'Asia/Seoul',
+    'SG': 'Asia/Singapore', 'AU': 'Australia/Sydney', 'NZ': 'Pacific/Auckland', 'ZA': 'Africa/Johannesburg',
+    'EG': 'Africa/Cairo', 'NG': 'Africa/Lagos',
+}
+
+# No zone is further than this from UTC
+MAX_OFFSET = timedelta(hours=14)
+
+# Larger than any DST shift
+DST_MARGIN = timedelta(hours=3)
+
+
+def location_zone(location):
+    """IANA zone name of a targeting location (country code or zone name)"""
+    key = LOCATION_ZONES.get(location.strip().upper(), location.strip())
+    try:
+        ZoneInfo(key)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown location: {location}")
+    return key
+
+
+def resolve_locations(locations):
+    """Split targeting locations into ``(zones, unresolved)``
+
+    ``zones`` maps each IANA zone name to its locations, in order;
+    ``unresolved`` lists the locations that are neither a country code of
+    ``LOCATION_ZONES`` nor a zone name (e.g. ``"New York"``).
+    """
+    zones = {}
+    unresolved = []
+    for location in locations:
+        try:
+            zones.setdefault(location_zone(location), []).append(location)
+        except ValueError:
+            unresolved.append(location)
+    return zones, unresolved
+
+
+def _utc(moment):
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+class ZoneCache:
+    """UTC offsets of zones per local calendar day, with DST transitions
+
+    A day maps to its offset, or on a transition day to ``(before, after,
+    transition)`` where ``transition`` is the UTC instant of the change.
+    Zones only ever get probed once per day; converting a local time to
+    UTC afterwards is a dict lookup and a subtraction.  With ``max_days``
+    set, the least recently used (zone, day) entries are dropped beyond that
+    many.
+    """
+
+    def __init__(self, max_days=None):
+        self._days = OrderedDict()
+        self.max_days = max_days
+        self.probes = 0
+
+    def day(self, key, day):
+        entry = self._days.get((key, day))
+        if entry is None:
+            entry = self._days[(key, day)] = self._probe(key, day)
+            if self.max_days is not None and len(self._days) > self.max_days:
+                self._days.popitem(last=False)
+        elif self.max_days is not None:
+            self._days.move_to_end((key, day))
+        return entry
+
+    def __len__(self):
+        return len(self._days)
+
+    def _probe(self, key, day):
+        self.probes += 1
+        zone = ZoneInfo(key)
+        first = datetime.combine(day, time(0, 0), zone)
+        last = datetime.combine(day, time(23, 59), zone)
+        before = first.utcoffset()
+        after = last.utcoffset()
+        if before == after:
+            return before
+        # Zones change offset on whole minutes; bisect the minute of the change
+        # (starting a minute early, as some zones change at local midnight)
+        low = first.astimezone(timezone.utc) - timedelta(minutes=1)
+        high = last.astimezone(timezone.utc)
+        while high - low > timedelta(minutes=1):
+            middle = low + (high - low) // 2
+            middle -= timedelta(seconds=middle.second, microseconds=middle.microsecond)
+            if middle <= low:
+                middle = low + timedelta(minutes=1)
+            if middle.astimezone(zone).utcoffset() == before:
+                low = middle
+            else:
+                high = middle
+        return (before, after, high)
+
+    def profile(self, key, first, last):
+        """Tuple of the day entries of ``key`` from ``first`` to ``last``"""
+        days = []
+        day = first
+        while day <= last:
+            days.append(self.day(key, day))
+            day += timedelta(days=1)
+        return tuple(days)
+
+    def to_utc(self, key, local):
+        """UTC instant of a naive local time (fold=0, like zoneinfo)"""
+        entry = self.day(key, local.date())
+        if not isinstance(entry, tuple):
+            return (local - entry).replace(tzinfo=timezone.utc)
+        before, after, transition = entry
+        as_before = (local - before).replace(tzinfo=timezone.utc)
+        as_after = (local - after).replace(tzinfo=timezone.utc)
+        # Times before the change, repeated times and skipped times keep the old offset
+        return as_before if min(as_before, as_after) < transition else as_after
+
+
+# Shared by calls without their own cache; a year of days for about 50 zones
+_DEFAULT_CACHE = ZoneCache(max_days=20_000)
+
+
+def _profile_stream(schedule, start, end, key, locations, cache):
+    zone = ZoneInfo(key)
+    local_start = start.astimezone(zone).replace(tzinfo=None)
+    # Around a DST change local times are not monotonic in UTC, so the end
+    # gets a margin and each local day is ordered by its UTC instants.  A
+    # skipped local time lands on the same instant as the next existing one,
+    # which then posts once.
+    local_end = end.astimezone(zone).replace(tzinfo=None) + DST_MARGIN
+    for _, day in groupby(expand_schedule(schedule, local_start, local_end), key=datetime.date):
+        previous = None
+        for moment, local in sorted((cache.to_utc(key, local), local) for local in day):
+            if start <= moment < end and moment != previous:
+                yield moment, local, locations
+            previous = moment
+
+
+def expand_localized(schedule, start, end, locations, cache=None, unresolved=None):
+    """Lazily yield ``(utc, local, locations)`` for a schedule in local time
+
+    Schedule times are wall-clock times in every targeted location.  Each
+    occurrence comes as its UTC instant, the naive local time and the tuple
+    of locations posting at that instant, ordered by UTC.  Locations are
+    grouped by zone and zones by their offsets over the window, so the
+    schedule is expanded once per distinct offset profile rather than once
+    per location.  Naive ``start``/``end`` are taken as UTC.
+
+    Locations without a time zone (see ``resolve_locations``) are skipped
+    and appended to the ``unresolved`` list, if given; when none is left
+    the schedule is taken as UTC, as without locations.
+    """
+    cache = cache if cache is not None else _DEFAULT_CACHE
+    start, end = _utc(start), _utc(end)
+    zones, skipped = resolve_locations(locations or ())
+    if unresolved is not None:
+        unresolved.extend(skipped)
+    if not zones:
+        zones = {'UTC': ['UTC']}
+    first = (start - MAX_OFFSET).date()
+    last = (end + MAX_OFFSET).date()
+    groups = {}
+    for key, members in zones.items():
+        group = groups.setdefault(cache.profile(key, first, last), (key, []))
+        group[1].extend(members)
+    streams = [_profile_stream(schedule, start, end, key, tuple(members), cache)
+               for key, members in groups.values()]
+    return heapq.merge(*streams, key=lambda entry: entry[0])
+
+
+def _tagged(occurrences, order, item):
+    for moment, local, locations in occurrences:
+        yield moment, order, local, locations, item
+
+
+def expand_campaign_localized(ast, start, cache=None, unresolved=None):
+    """Lazily yield ``(utc, local, locations, content_item)`` for a whole campaign
+
+    Locations come from the campaign's targeting block; without one, or
+    without any location that has a time zone, the times are taken as UTC.
+    Skipped locations are appended to ``unresolved`` once, if given.
+    """
+    window_start, window_end = campaign_window(ast, _utc(start))
+    targeting = ast['body'].get('targeting') or {}
+    zones, skipped = resolve_locations(targeting.get('location') or ())
+    if unresolved is not None:
+        unresolved.extend(skipped)
+    locations = [location for members in zones.values() for location in members] or ('UTC',)
+    streams = []
+    for order, item in enumerate(ast['body']['content']):
+        schedule = item['properties'].get('schedule')
+        if schedule:
+            occurrences = expand_localized(schedule, window_start, window_end, locations, cache)
+            streams.append(_tagged(occurrences, order, item))
+    for moment, _, local, locations, item in heapq.merge(*streams, key=lambda entry: entry[:2]):
+        yield moment, local, locations, item
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Parse Tree Transformer
+A Lark parse tree átalakítása AST szótárakká
+"""
+
+import time
+from datetime import date
+from decimal import Decimal
+from lark import Transformer, Tree, v_args
+
+try:
+    from .parser import time_to_minutes
+except ImportError:
+    # Loaded from src/ as a top-level module rather than as src.transformer
+    from parser import time_to_minutes
+
+class SocialMediaContentTransformer(Transformer):
+    """AST transformer a parse tree struktúrált adattá alakításához"""
+    
+    def __init__(self, string_pool=None):
+        super().__init__()
+        self.string_pool = string_pool
+    
+    def start(self, items):
+        *preamble, campaign = items
+        if preamble:
+            # Unresolved imports and shared blocks; see modules.ModuleLoader
+            campaign['imports'] = [item for item in preamble if isinstance(item, str)]
+            campaign['definitions'] = [item for item in preamble if isinstance(item, dict)]
+        return campaign
+    
+    def module(self, items):
+        *preamble, campaign = items
+        return {
+            'type': 'module',
+            'imports': [item for item in preamble if isinstance(item, str)],
+            'definitions': [item for item in preamble if isinstance(item, dict)],
+            'campaign': campaign
+        }
+    
+    @v_args(inline=True)
+    def import_statement(self, path):
+        return self._clean_string(path)
+    
+    @v_args(inline=True)
+    def targeting_template(self, name, rules):
+        return {'kind': 'targeting', 'name': self._clean_string(name), 'value': rules}
+    
+    @v_args(inline=True)
+    def budget_template(self, name, rules):
+        return {'kind': 'budget', 'name': self._clean_string(name), 'value': rules}
+    
+    @v_args(inline=True)
+    def content_template(self, content_type, name, properties):
+        item = self.content_item(content_type, name, properties)
+        return {'kind': 'content', 'name': item['name'], 'value': item}
+    
+    @v_args(inline=True)
+    def campaign_definition(self, name, duration, body):
+        return {
+            'type': 'campaign',
+            'name': self._clean_string(name),
+            'duration': duration,
+            'body': body
+        }
+    
+    @v_args(inline=True) 
+    def campaign_body(self, platforms, content, targeting=None, budget=None):
+        result = {
+            'platforms': platforms,
+            'content': content
+        }
+        if targeting:
+            result['targeting'] = targeting
+        if budget:
+            result['budget'] = budget
+        return result
+    
+    @v_args(inline=True)
+    def platform_definition(self, platform_list):
+        return platform_list
+    
+    def platform_list(self, platforms):
+        return list(platforms)
+    
+    @v_args(inline=True)
+    def platform_name(self, platform):
+        return self._intern(str(platform))
+    
+    @v_args(inline=True)
+    def content_definition(self, *content_items):
+        return list(content_items)
+    
+    @v_args(inline=True)
+    def content_item(self, content_type, name, properties):
+        return {
+            'type': content_type,
+            'name': self._clean_string(name),
+            'properties': properties
+        }
+    
+    @v_args(inline=True)
+    def content_use(self, template, alias=None):
+        template = self._clean_string(template)
+        return {
+            'type': 'use',
+            'template': template,
+            'name': self._clean_string(alias) if alias is not None else template
+        }
+    
+    @v_args(inline=True)
+    def content_type(self, content_type):
+        return self._intern(str(content_type))
+    
+    def content_properties(self, properties):
+        result = {}
+        for prop in properties:
+            if isinstance(prop, dict):
+                result.update(prop)
+        return result
+    
+    @v_args(inline=True)
+    def content_property(self, prop):
+        return prop
+    
+    @v_args(inline=True)
+    def text_property(self, text):
+        return {'text': self._clean_string(text)}
+    
+    @v_args(inline=True) 
+    def media_property(self, media, optional=None):
+        return {'media': self._clean_string(media), 'optional': optional is not None}
+    
+    @v_args(inline=True)
+    def hashtag_property(self, hashtag_list):
+        return {'hashtags': hashtag_list}
+    
+    @v_args(inline=True)
+    def schedule_property(self, schedule):
+        return {'schedule': schedule}
+    
+    @v_args(inline=True)
+    def schedule_expression(self, schedule):
+        return schedule
+    
+    @v_args(inline=True)
+    def daily_schedule(self, times):
+        return {'type': 'daily', 'times': times}
+    
+    @v_args(inline=True)
+    def weekly_schedule(self, day, times):
+        return {'type': 'weekly', 'day': self._intern(self._clean_string(day)), 'times': times}
+    
+    @v_args(inline=True)
+    def interval_schedule(self, number, unit, *rest):
+        times = []
+        until = None
+        for item in rest:
+            if isinstance(item, list):
+                times = item
+            else:
+                until = item
+        return {
+            'type': 'interval',
+            'every': {'value': int(number), 'unit': unit},
+            'times': times,
+            'until': until
+        }
+    
+    @v_args(inline=True)
+    def time_specific_schedule(self, times):
+        return {'type': 'at', 'times': times}
+    
+    def time_list(self, times):
+        return list(times)
+    
+    @v_args(inline=True)
+    def time_value(self, time):
+        return time_to_minutes(self._clean_string(time))
+    
+    @v_args(inline=True)
+    def until_value(self, value):
+        if value.type == 'TIME':
+            return time_to_minutes(self._clean_string(value))
+        try:
+            return date.fromisoformat(self._clean_string(value))
+        except ValueError as e:
+            raise ValueError(f"Invalid date {value} at line {value.line}, column {value.column}: {e}")
+    
+    @v_args(inline=True)
+    def targeting_definition(self, rules, optional=None):
+        rules['optional'] = optional is not None
+        return rules
+    
+    @v_args(inline=True)
+    def targeting_use(self, name, optional=None):
+        return {'use': self._clean_string(name), 'optional': optional is not None}
+    
+    def targeting_rules(self, rules):
+        result = {}
+        for rule in rules:
+            result.update(rule)
+        return result
+    
+    @v_args(inline=True)
+    def targeting_rule(self, rule):
+        return rule
+    
+    @v_args(inline=True)
+    def age_range_rule(self, min_age, max_age):
+        return {'age_range': {'min': int(min_age), 'max': int(max_age)}}
+    
+    @v_args(inline=True)
+    def interests_rule(self, interests):
+        return {'interests': interests}
+    
+    @v_args(inline=True)
+    def location_rule(self, locations, optional=None):
+        return {'location': locations, 'location_optional': optional is not None}
+    
+    @v_args(inline=True)
+    def budget_definition(self, rules, optional=None):
+        rules['optional'] = optional is not None
+        return rules
+    
+    @v_args(inline=True)
+    def budget_use(self, name, optional=None):
+        return {'use': self._clean_string(name), 'optional': optional is not None}
+    
+    def budget_rules(self, rules):
+        result = {}
+        for rule in rules:
+            result.update(rule)
+        return result
+    
+    @v_args(inline=True)
+    def budget_rule(self, rule):
+        return rule
+    
+    @v_args(inline=True)
+    def total_budget_rule(self, amount):
+        return {'total': amount}
+    
+    @v_args(inline=True)
+    def daily_limit_rule(self, amount, optional=None):
+        return {'daily_limit': amount, 'daily_limit_optional': optional is not None}
+    
+    @v_args(inline=True)
+    def auto_optimize_rule(self, value):
+        return {'auto_optimize': value}
+    
+    @v_args(inline=True)
+    def duration_value(self, number, unit):
+        return {'value': int(number), 'unit': unit}
+    
+    @v_args(inline=True)
+    def time_unit(self, unit):
+        return self._intern(str(unit))
+    
+    def string_list(self, strings):
+        return [self._intern(self._clean_string(s)) for s in strings]
+    
+    def hashtag_list(self, hashtags):
+        return [self._intern(self._clean_string(h)) for h in hashtags]
+    
+    @v_args(inline=True)
+    def money_value(self, amount):
+        return Decimal(amount[1:])
+    
+    @v_args(inline=True)
+    def boolean_value(self, value):
+        return str(value) == 'true'
+    
+    def _clean_string(self, s):
+        """Remove quotes from string literals"""
+        if isinstance(s, str) and s.startswith('"') and s.endswith('"'):
+            return s[1:-1]
+        return str(s)
+    
+    def _intern(self, s):
+        """Share repeated literals through the string pool, if any"""
+        if self.string_pool is None:
+            return s
+        return self.string_pool.intern(s)
+
+
+class ProfilingTransformer(SocialMediaContentTransformer):
+    """Transformer that reports every rule callback to a CallProfile
+
+    Each callback is recorded under the stack of parse tree rules above its
+    node.  Children are transformed before their parent's callback runs, so
+    the recorded times are exclusive of subtrees.
+    """
+    
+    def __init__(self, string_pool=None, profile=None):
+        super().__init__(string_pool)
+        self.profile = profile
+        self._stacks = {}
+    
+    def transform(self, tree):
+        self._stacks = {id(tree): (tree.data,)}
+        for node in tree.iter_subtrees_topdown():
+            stack = self._stacks[id(node)]
+            for child in node.children:
+                if isinstance(child, Tree):
+                    self._stacks[id(child)] = stack + (child.data,)
+        try:
+            return super().transform(tree)
+        finally:
+            self._stacks = {}
+    
+    def _call_userfunc(self, tree, new_children=None):
+        started = time.perf_counter()
+        try:
+            return super()._call_userfunc(tree, new_children)
+        finally:
+            self.profile.add(self._stacks.get(id(tree), (tree.data,)), time.perf_counter() - started)
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Közös tesztsegédek - véletlen ütemezések az összevető tesztekhez
+"""
+
+from datetime import date, timedelta
+
+UNITS = ['minutes', 'hours', 'days', 'weeks', 'months']
+
+
+def random_schedule(rng):
+    """Random schedule dict of every type, including edge cases (zero steps, past until dates)"""
+    times = [rng.randrange(1440) for _ in range(rng.randint(0, 4))]
+    kind = rng.randrange(4)
+    if kind == 0:
+        return {'type': 'daily', 'times': times or [600]}
+    if kind == 1:
+        return {'type': 'weekly', 'day': rng.choice(['monday', 'Sunday', 'friday']), 'times': times or [0]}
+    if kind == 2:
+        return {'type': 'at', 'times': times or [1439]}
+    unit = rng.choice(UNITS)
+    until = None
+    if rng.random() < 0.3:
+        until = rng.randrange(1440)
+    elif rng.random() < 0.5:
+        until = date(2024, 1, 1) + timedelta(days=rng.randint(-3, 60))
+    return {'type': 'interval', 'every': {'value': rng.randint(0, 50 if unit == 'minutes' else 9), 'unit': unit},
+            'times': times, 'until': until}
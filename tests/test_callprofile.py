@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Szabályonkénti profilozás tesztek - hívásszámok, idők és flamegraph-vermek
+"""
+
+import io
+import tempfile
+import unittest
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from parser import SocialMediaContentParser
+from callprofile import CallProfile, instrument
+from cli import main
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+class TestCallProfile(unittest.TestCase):
+    """Hívásszámok és idők nyelvtani szabályonként"""
+
+    def parse(self, backend, profile):
+        with redirect_stdout(io.StringIO()):
+            parser = SocialMediaContentParser(backend=backend, profile=profile)
+            result = parser.parse_file(EXAMPLES / "complex_campaign.smp")
+        self.assertTrue(result['success'])
+        return parser, result
+
+    def test_fast_rules(self):
+        """The fast backend reports every rule method with its call count"""
+        profile = CallProfile()
+        _, result = self.parse('fast', profile)
+        report = profile.report()
+        self.assertEqual(report['campaign_body']['calls'], 1)
+        self.assertEqual(report['content_item']['calls'], 3)
+        self.assertEqual(report['time_list']['calls'], 3)
+        for stats in report.values():
+            self.assertLessEqual(stats['self_seconds'], stats['cumulative_seconds'] + 1e-9)
+        self.assertEqual(next(iter(report)), 'parse')
+        self.assertIn(('parse', 'start', 'campaign_definition', 'campaign_body'), profile.stacks)
+        _, plain = self.parse('fast', None)
+        self.assertEqual(result['ast'], plain['ast'])
+        print(f"[OK] {len(report)} fast parser rules profiled")
+
+    def test_lark_callbacks(self):
+        """The Lark backend reports the Earley parse and each transformer callback"""
+        profile = CallProfile()
+        parser, result = self.parse('lark', profile)
+        report = profile.report()
+        self.assertEqual(report['earley_parse']['calls'], 1)
+        self.assertEqual(report['content_properties']['calls'], 3)
+        self.assertEqual(report['time_list']['calls'], 3)
+        self.assertGreater(report['string_list']['calls'], 0)
+        self.assertTrue(any(stack[:2] == ('transform', 'start') and stack[-1] == 'string_list'
+                            for stack in profile.stacks))
+        transform = report['transform']
+        callbacks = sum(stats['self_seconds'] for name, stats in report.items()
+                        if name not in ('transform', 'earley_parse'))
+        self.assertLessEqual(callbacks, transform['cumulative_seconds'])
+        self.assertEqual(type(parser.transformer).__name__, 'ProfilingTransformer')
+        print(f"[OK] {len(report)} transformer callbacks profiled")
+
+    def test_unprofiled(self):
+        """Without a profile the parsers are not wrapped"""
+        parser, _ = self.parse('fast', None)
+        self.assertNotIn('_campaign_body', vars(parser.parser))
+        parser, _ = self.parse('lark', None)
+        self.assertEqual(type(parser.transformer).__name__, 'SocialMediaContentTransformer')
+        print("[OK] No instrumentation without a profile")
+
+    def test_nesting(self):
+        """Self time excludes nested frames; folded stacks list each stack once"""
+        profile = CallProfile()
+
+        class Worker:
+            def outer(self):
+                return self.inner() + self.inner()
+
+            def inner(self):
+                return 1
+
+        worker = instrument(Worker(), profile)
+        with profile.frame('run'):
+            self.assertEqual(worker.outer(), 2)
+        profile.add(('extra',), 0.5, calls=2)
+        self.assertEqual(profile.stacks[('run', 'outer', 'inner')][0], 2)
+        self.assertEqual(profile.stacks[('extra',)], [2, 0.5])
+        report = profile.report()
+        self.assertEqual(list(report)[0], 'extra')
+        self.assertGreaterEqual(report['run']['cumulative_seconds'], report['outer']['cumulative_seconds'])
+        self.assertAlmostEqual(report['outer']['cumulative_seconds'],
+                               report['outer']['self_seconds'] + report['inner']['self_seconds'])
+        folded = io.StringIO()
+        profile.write_folded(folded)
+        lines = folded.getvalue().splitlines()
+        self.assertIn("extra 500000", lines)
+        for line in lines:
+            stack, microseconds = line.rsplit(' ', 1)
+            self.assertTrue(int(microseconds) > 0 and stack)
+        self.assertIn('extra', profile.format_report(top=1))
+        print("[OK] Nested frames and folded stacks")
+
+    def test_cli(self):
+        """--profile prints the table to stderr; --profile-stacks writes folded stacks"""
+        errors = io.StringIO()
+        with tempfile.TemporaryDirectory() as temp:
+            stacks = Path(temp) / "stacks.folded"
+            with redirect_stdout(io.StringIO()), redirect_stderr(errors):
+                self.assertEqual(main([str(EXAMPLES / "complex_campaign.smp"), '--backend', 'lark',
+                                       '--profile-stacks', str(stacks)]), 0)
+            folded = stacks.read_text(encoding='utf-8')
+        self.assertIn('calls', errors.getvalue())
+        self.assertIn('content_properties', errors.getvalue())
+        self.assertTrue(folded.startswith('earley_parse '))
+        self.assertIn('transform;start;campaign_definition', folded)
+        output = io.StringIO()
+        with redirect_stdout(output), redirect_stderr(io.StringIO()):
+            self.assertEqual(main([str(EXAMPLES / "complex_campaign.smp"), '--profile']), 0)
+        self.assertEqual(output.getvalue().strip(), f"[OK] {EXAMPLES / 'complex_campaign.smp'}")
+        print("[OK] CLI profile report and stack file")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Parancssori felület és indulási idő tesztek
+"""
+
+import json
+import subprocess
+import time
+import unittest
+import sys
+from pathlib import Path
+
+# Add src to path
+SRC = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+from parser import SocialMediaContentParser
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+# Budgets for one `cli.py` run on the default (fast) backend, on top of a
+# bare interpreter start.  The Lark import alone takes longer than both.
+IMPORT_BUDGET_SECONDS = 0.1
+STARTUP_BUDGET_SECONDS = 0.4
+
+
+def run_cli(*args, python_flags=()):
+    return subprocess.run([sys.executable, *python_flags, str(SRC / "cli.py"), *map(str, args)],
+                          capture_output=True, text=True, cwd=SRC)
+
+
+def best_of(runs, command):
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, capture_output=True, cwd=SRC)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class TestCli(unittest.TestCase):
+    """Gyorsan induló CLI"""
+
+    def test_check_files(self):
+        """Files are checked quietly; any failure gives exit status 1"""
+        ok = run_cli(EXAMPLES / "basic_campaign.smp", EXAMPLES / "complex_campaign.smp")
+        self.assertEqual(ok.returncode, 0)
+        self.assertEqual(ok.stdout.count("[OK]"), 2)
+        self.assertNotIn("Parsing successful", ok.stdout)
+        failed = run_cli(EXAMPLES / "basic_campaign.smp", EXAMPLES / "error_examples.smp", "missing.smp")
+        self.assertEqual(failed.returncode, 1)
+        self.assertEqual(failed.stdout.count("[FAILED]"), 2)
+        self.assertIn("IOError", failed.stdout)
+        print("[OK] CLI checks files")
+
+    def test_validate_with_start(self):
+        """--start enables the date feasibility rule"""
+        import tempfile
+        source = ('campaign "short" duration(3 days) {\n    platforms: [instagram]\n    content_types {\n'
+                  '        post "p" { text: "t" schedule: every(1 days) until("2024-12-31") }\n    }\n}\n')
+        with tempfile.TemporaryDirectory() as temp:
+            path = Path(temp) / "short.smp"
+            path.write_text(source, encoding='utf-8')
+            plain = run_cli("--validate", path)
+            dated = run_cli("--validate", "--start", "2024-07-01", path)
+        self.assertEqual(plain.returncode, 0)
+        self.assertNotIn("F201", plain.stdout)
+        self.assertEqual(dated.returncode, 0)
+        self.assertIn(f"[WARNING] {path} (p): F201", dated.stdout)
+        print("[OK] F201 reported with --start")
+
+    def test_pretty_print_on_request(self):
+        """The tree and AST are only printed when asked for"""
+        plain = run_cli(EXAMPLES / "basic_campaign.smp")
+        self.assertEqual(plain.stdout.strip().splitlines(), [f"[OK] {EXAMPLES / 'basic_campaign.smp'}"])
+        tree = run_cli("--tree", EXAMPLES / "basic_campaign.smp")
+        self.assertIn("campaign_definition", tree.stdout)
+        ast = run_cli("--ast", EXAMPLES / "basic_campaign.smp")
+        self.assertEqual(json.loads(ast.stdout.split("\n", 1)[1])['name'], "basic_promo")
+        print("[OK] Pretty-printing is opt-in")
+
+    def test_lazy_imports(self):
+        """Importing the parser and checking a file with the fast backend never loads lark"""
+        result = run_cli(EXAMPLES / "complex_campaign.smp", python_flags=("-X", "importtime"))
+        self.assertEqual(result.returncode, 0)
+        imports = {}
+        for line in result.stderr.splitlines():
+            if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+                _, cumulative, name = line.split("|")
+                imports[name.strip()] = int(cumulative) / 1e6
+        self.assertFalse([name for name in imports if name.split('.')[0] == 'lark'])
+        own = sum(imports.get(name, 0) for name in ('parser', 'fastparser', 'limits', 'argparse'))
+        self.assertLess(own, IMPORT_BUDGET_SECONDS)
+        print(f"[OK] CLI imports took {own * 1000:.1f} ms (budget {IMPORT_BUDGET_SECONDS * 1000:.0f} ms)")
+
+    def test_startup_budget(self):
+        """A fast-backend run stays within its startup budget"""
+        bare = best_of(3, [sys.executable, "-c", "pass"])
+        cli = best_of(3, [sys.executable, str(SRC / "cli.py"), str(EXAMPLES / "complex_campaign.smp")])
+        self.assertLess(cli - bare, STARTUP_BUDGET_SECONDS)
+        print(f"[OK] CLI run {cli * 1000:.0f} ms, interpreter {bare * 1000:.0f} ms "
+              f"(budget +{STARTUP_BUDGET_SECONDS * 1000:.0f} ms)")
+
+    def test_interrupts_by_default(self):
+        """Parses run with the budget interrupt unless --no-interrupt is given"""
+        import io
+        from contextlib import redirect_stdout
+        from unittest import mock
+        import cli
+        for flags, interrupt in (((), True), (("--no-interrupt",), False)):
+            with mock.patch('parser.SocialMediaContentParser', wraps=SocialMediaContentParser) as parser_class, \
+                    redirect_stdout(io.StringIO()):
+                self.assertEqual(cli.main([*flags, str(EXAMPLES / "basic_campaign.smp")]), 0)
+            self.assertIs(parser_class.call_args.kwargs['limits'].interrupt, interrupt)
+        print("[OK] CLI interrupts over-budget parses by default")
+
+    def test_compiled_parser_cache(self):
+        """Lark parsers share one compiled grammar"""
+        first = SocialMediaContentParser()
+        second = SocialMediaContentParser()
+        self.assertIs(first.parser, second.parser)
+        self.assertIsNot(first.transformer, second.transformer)
+        print("[OK] Compiled grammar reused")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
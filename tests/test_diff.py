@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Strukturális diff tesztek
+"""
+
+import contextlib
+import copy
+import io
+import tempfile
+import time
+import unittest
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from parser import SocialMediaContentParser
+from diff import build_tree, diff_trees, diff_campaigns, format_change, main
+
+OLD = '''
+campaign "launch" duration(14 days) {
+    platforms: [instagram, facebook]
+    content_types {
+        post "announcement" {
+            text: "Introducing our new product!"
+            hashtags: ["#new"]
+            schedule: daily at("09:00")
+        }
+        story "teaser" {
+            text: "Coming soon"
+            schedule: at("18:00")
+        }
+    }
+    budget {
+        total: $1000
+    }
+}
+'''
+
+NEW = OLD.replace('at("09:00")', 'at("10:00")').replace('''        story "teaser" {
+            text: "Coming soon"
+            schedule: at("18:00")
+        }''', '''        reel "demo" {
+            text: "See it in action"
+            schedule: weekly on("monday") at("12:00")
+        }''').replace('$1000', '$1500')
+
+
+def large_campaign(items):
+    content = [{
+        'type': 'post',
+        'name': f"item_{i}",
+        'properties': {
+            'text': f"Post number {i}",
+            'hashtags': ['#a', '#b'],
+            'schedule': {'type': 'daily', 'times': [540, 900]}
+        }
+    } for i in range(items)]
+    return {'type': 'campaign', 'name': 'big', 'duration': {'value': 30, 'unit': 'days'},
+            'body': {'platforms': ['instagram'], 'content': content}}
+
+
+class TestStructuralDiff(unittest.TestCase):
+    """Merkle diff tesztek"""
+
+    def setUp(self):
+        self.parser = SocialMediaContentParser()
+
+    def test_reports_changes(self):
+        """Added, removed and changed subtrees are reported by path"""
+        old = self.parser.parse_string(OLD)['ast']
+        new = self.parser.parse_string(NEW)['ast']
+        changes = {(c['op'], "/".join(c['path'])): c for c in diff_campaigns(old, new)}
+        self.assertEqual(set(changes), {
+            ('changed', 'body/content/announcement/properties/schedule/times'),
+            ('removed', 'body/content/teaser'),
+            ('added', 'body/content/demo'),
+            ('changed', 'body/budget/total'),
+        })
+        total = changes[('changed', 'body/budget/total')]
+        self.assertEqual((total['old'], total['new']), (Decimal('1000'), Decimal('1500')))
+        self.assertEqual(format_change(total), '~ body/budget/total: "1000" -> "1500"')
+        self.assertEqual(diff_campaigns(old, copy.deepcopy(old)), [])
+        print("[OK] Structural changes reported")
+
+    def test_equal_amounts(self):
+        """$12.5 and $12.50 are the same amount, $12.51 is not"""
+        old = self.parser.parse_string(OLD.replace('$1000', '$12.5'))['ast']
+        same = self.parser.parse_string(OLD.replace('$1000', '$12.50'))['ast']
+        other = self.parser.parse_string(OLD.replace('$1000', '$12.51'))['ast']
+        self.assertEqual(diff_campaigns(old, same), [])
+        self.assertEqual(build_tree(old).digest, build_tree(same).digest)
+        self.assertEqual([c['path'] for c in diff_campaigns(old, other)], [('body', 'budget', 'total')])
+        print("[OK] Amounts compared by value")
+
+    def test_large_campaign_diff_is_fast(self):
+        """Diffing prebuilt trees of large campaigns takes milliseconds"""
+        old = large_campaign(5000)
+        new = copy.deepcopy(old)
+        new['body']['content'][1234]['properties']['schedule']['times'] = [600]
+        old_tree, new_tree = build_tree(old), build_tree(new)
+
+        start = time.perf_counter()
+        changes = list(diff_trees(old_tree, new_tree))
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(changes[0]['path'][:3], ('body', 'content', 'item_1234'))
+        self.assertLess(elapsed, 0.05)
+        print(f"[OK] Diff of 5000-item campaigns in {elapsed * 1000:.2f} ms")
+
+    def test_cli(self):
+        """CLI prints one line per change and exits 1 on differences"""
+        with tempfile.TemporaryDirectory() as tmp:
+            old_path = Path(tmp) / "old.smp"
+            new_path = Path(tmp) / "new.smp"
+            old_path.write_text(OLD, encoding='utf-8')
+            new_path.write_text(NEW, encoding='utf-8')
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out), contextlib.redirect_stderr(io.StringIO()):
+                code = main([str(old_path), str(new_path)])
+            self.assertEqual(code, 1)
+            lines = out.getvalue().splitlines()
+            self.assertIn("- body/content/teaser", lines)
+            self.assertIn("+ body/content/demo", lines)
+
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                self.assertEqual(main([str(old_path), str(old_path)]), 0)
+        print("[OK] Diff CLI works")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Dispatch scheduler tesztek
+"""
+
+import time
+import unittest
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from dispatch import Dispatcher, InMemoryPublisher, Publisher, TokenBucket
+
+START = datetime(2024, 7, 1, 0, 0)
+
+
+def campaign(name, platforms, items, days=7):
+    content = [{'type': 'post', 'name': item_name, 'properties': {'text': item_name, 'schedule': schedule}}
+               for item_name, schedule in items]
+    return {'type': 'campaign', 'name': name, 'duration': {'value': days, 'unit': 'days'},
+            'body': {'platforms': platforms, 'content': content}}
+
+
+class FailingPublisher(Publisher):
+    def publish(self, post):
+        raise ConnectionError("offline")
+
+
+class TestDispatcher(unittest.TestCase):
+    """Összefésült kiküldési sor tesztek"""
+
+    def test_merged_time_order(self):
+        """Posts of all campaigns come out in schedule order, one per platform"""
+        publisher = InMemoryPublisher()
+        dispatcher = Dispatcher(publisher)
+        dispatcher.add_campaign(campaign("a", ["instagram", "twitter"], [
+            ("morning", {'type': 'daily', 'times': [9 * 60]})]), START)
+        dispatcher.add_campaign(campaign("b", ["facebook"], [
+            ("noon", {'type': 'daily', 'times': [12 * 60]}),
+            ("weekly", {'type': 'weekly', 'day': 'wednesday', 'times': [10 * 60]})]), START)
+        self.assertEqual(dispatcher.run(), 7 * 2 + 7 + 1)
+        times = [post['dispatch_at'] for post in publisher.posts]
+        self.assertEqual(times, sorted(times))
+        self.assertEqual([(p['campaign'], p['platform']) for p in publisher.posts[:3]],
+                         [("a", "instagram"), ("a", "twitter"), ("b", "facebook")])
+        print("[OK] Posts merged in time order")
+
+    def test_rate_limit(self):
+        """A platform's token bucket spaces out bursts of posts"""
+        items = [(f"item_{i}", {'type': 'at', 'times': [9 * 60]}) for i in range(5)]
+        publisher = InMemoryPublisher()
+        dispatcher = Dispatcher(publisher, rate_limits={'instagram': (1 / 60, 2)})
+        dispatcher.add_campaign(campaign("burst", ["instagram", "facebook"], items), START)
+        dispatcher.run()
+        instagram = [p['dispatch_at'] for p in publisher.posts if p['platform'] == 'instagram']
+        facebook = [p['dispatch_at'] for p in publisher.posts if p['platform'] == 'facebook']
+        nine = START + timedelta(hours=9)
+        self.assertEqual(facebook, [nine] * 5)
+        self.assertEqual(instagram[:2], [nine, nine])
+        for earlier, later in zip(instagram[1:], instagram[2:]):
+            self.assertAlmostEqual((later - earlier).total_seconds(), 60, places=3)
+        self.assertGreater(dispatcher.deferred, 0)
+        self.assertTrue(all(p['scheduled_at'] == nine for p in publisher.posts))
+        print("[OK] Rate limit spaces out posts")
+
+    def test_token_bucket(self):
+        """Bucket refills at its rate up to its capacity"""
+        bucket = TokenBucket(rate=1, capacity=1)
+        self.assertIsNone(bucket.acquire(START))
+        self.assertEqual(bucket.acquire(START), START + timedelta(seconds=1))
+        self.assertIsNone(bucket.acquire(START + timedelta(seconds=1)))
+        print("[OK] Token bucket refills")
+
+    def test_until_limit_and_failures(self):
+        """run(until=...) stops at the horizon; publisher errors are collected"""
+        dispatcher = Dispatcher(FailingPublisher())
+        dispatcher.add_campaign(campaign("a", ["instagram"], [
+            ("morning", {'type': 'daily', 'times': [9 * 60]})]), START)
+        self.assertEqual(dispatcher.run(until=START + timedelta(days=2)), 0)
+        self.assertEqual(len(dispatcher.failed), 2)
+        self.assertIsInstance(dispatcher.failed[0][1], ConnectionError)
+        self.assertEqual(len(dispatcher), 1)
+        print("[OK] Horizon and failures handled")
+
+    def test_publisher_interface(self):
+        """A publisher without ``publish`` fails when it is created"""
+        class Incomplete(Publisher):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+        with self.assertRaises(TypeError):
+            Publisher()
+        print("[OK] Incomplete publishers rejected")
+
+    def test_realtime_clock(self):
+        """With a clock the dispatcher sleeps until posts are due"""
+        now = [START + timedelta(hours=8)]
+        slept = []
+
+        def sleep(seconds):
+            slept.append(seconds)
+            now[0] += timedelta(seconds=seconds)
+
+        publisher = InMemoryPublisher()
+        dispatcher = Dispatcher(publisher, clock=lambda: now[0], sleep=sleep)
+        dispatcher.add_campaign(campaign("a", ["instagram"], [
+            ("morning", {'type': 'daily', 'times': [9 * 60]})], days=1), START)
+        dispatcher.run()
+        self.assertEqual(slept, [3600.0])
+        print("[OK] Realtime dispatch waits for due time")
+
+    def test_throughput_lazy(self):
+        """Many campaigns dispatch quickly with a small heap"""
+        publisher = InMemoryPublisher()
+        dispatcher = Dispatcher(publisher, rate_limits={'twitter': 50})
+        for n in range(500):
+            dispatcher.add_campaign(campaign(f"c{n}", ["instagram", "twitter"], [
+                ("hourly", {'type': 'interval', 'every': {'value': 1, 'unit': 'hours'},
+                            'times': [], 'until': None})], days=5), START + timedelta(minutes=n % 60))
+        self.assertEqual(len(dispatcher), 500)
+        started = time.perf_counter()
+        dispatched = dispatcher.run()
+        elapsed = time.perf_counter() - started
+        self.assertEqual(dispatched, 500 * 120 * 2)
+        self.assertLess(elapsed, 30)
+        print(f"[OK] {dispatched} posts dispatched in {elapsed:.2f}s "
+              f"({dispatched / elapsed:,.0f} posts/s)")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Posztszám-becslő tesztek - zárt alak összevetése a teljes kibontással
+"""
+
+import io
+import random
+import time
+import unittest
+import sys
+from contextlib import redirect_stdout
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from parser import SocialMediaContentParser
+from schedule import expand_schedule
+from estimate import count_posts, estimate_campaign, estimate_campaigns, main
+from generators import random_schedule
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+class TestEstimate(unittest.TestCase):
+    """Ütemezések posztszáma kibontás nélkül"""
+
+    def test_matches_expansion(self):
+        """Closed-form counts equal the number of expanded datetimes"""
+        rng = random.Random(42)
+        for _ in range(3000):
+            schedule = random_schedule(rng)
+            start = datetime(2024, 1, 1) + timedelta(seconds=rng.randrange(86400 * 10),
+                                                     microseconds=rng.choice([0, rng.randrange(10 ** 6)]))
+            end = start + timedelta(seconds=rng.choice([0, 20, 60, 3600, 86400, rng.randrange(86400 * 40)]))
+            expected = sum(1 for _ in expand_schedule(schedule, start, end))
+            self.assertEqual(count_posts(schedule, start, end), expected, (schedule, start, end))
+        print("[OK] 3000 random schedules counted exactly")
+
+    def test_long_window(self):
+        """A century of posts is counted without expanding it"""
+        start = datetime(2000, 1, 1, 12, 0)
+        end = datetime(2100, 1, 1, 12, 0)
+        days = (end - start).days
+        self.assertEqual(count_posts({'type': 'daily', 'times': [540, 1080]}, start, end), 2 * days)
+        every = {'type': 'interval', 'every': {'value': 7, 'unit': 'minutes'}, 'times': [], 'until': 600}
+        count = count_posts(every, start, end)
+        # 7 minutes and a day line up again every 7 days, so the expanded
+        # posts of one week and of the remainder give the exact count
+        weeks, rest = divmod(end - start, timedelta(days=7))
+        week = sum(1 for _ in expand_schedule(every, start, start + timedelta(days=7)))
+        tail = sum(1 for _ in expand_schedule(every, start, start + rest))
+        self.assertEqual(count, weeks * week + tail)
+        print(f"[OK] {count} posts over a century counted directly")
+
+    def test_campaign(self):
+        """Per-item counts, publications and cost per post of the example campaign"""
+        with redirect_stdout(io.StringIO()):
+            ast = SocialMediaContentParser(backend='fast').parse_file(EXAMPLES / "complex_campaign.smp")['ast']
+        estimate = estimate_campaign(ast, date(2024, 7, 1))
+        # 30 days: 3 posts a day, every other day, and the Fridays 5, 12, 19 and 26 July
+        self.assertEqual(estimate['items'], {'product_showcase': 90, 'behind_scenes': 15, 'styling_tips': 4})
+        self.assertEqual((estimate['posts'], estimate['publications']), (109, 436))
+        self.assertEqual(estimate['cost_per_post'], Decimal('45.87'))
+        self.assertEqual(estimate['cost_per_publication'], Decimal('11.47'))
+
+        started = time.perf_counter()
+        estimates = list(estimate_campaigns([ast] * 20000, datetime(2024, 7, 1, 9, 30)))
+        elapsed = time.perf_counter() - started
+        self.assertLess(elapsed, 5.0)
+        self.assertEqual(len(estimates), 20000)
+        print(f"[OK] 20000 campaigns estimated in {elapsed:.2f}s")
+
+    def test_cli(self):
+        """The CLI prints posts and cost per post"""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(main([str(EXAMPLES / "complex_campaign.smp"), '--start', '2024-07-01', '--items']), 0)
+        self.assertIn("summer_collection_2024: 109 posts, 436 publications, $45.87/post", output.getvalue())
+        self.assertIn("  styling_tips: 4", output.getvalue())
+        print("[OK] CLI prints estimates")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Gyors parser tesztek - differenciális összevetés a Lark parserrel
+"""
+
+import io
+import random
+import time
+import unittest
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from parser import SocialMediaContentParser
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+PLATFORMS = ['instagram', 'facebook', 'twitter', 'tiktok', 'linkedin', 'youtube']
+UNITS = ['days', 'hours', 'minutes', 'weeks', 'months']
+TOKENS = ['{', '}', '(', ')', '[', ']', ',', ':', '"x"', '"12:00"', '"2024-07-01"', '$5',
+          '3', 'use', 'as', 'optional', 'at', 'every', 'until', 'daily', 'targeting', 'budget']
+
+
+def random_time(rng):
+    return f'"{rng.randrange(24):02d}:{rng.randrange(60):02d}"'
+
+
+def random_schedule(rng):
+    times = ', '.join(random_time(rng) for _ in range(rng.randint(1, 3)))
+    kind = rng.randrange(6)
+    if kind == 0:
+        return f'daily at({times})'
+    if kind == 1:
+        return f'every_day at({times})'
+    if kind == 2:
+        return f'weekly on("{rng.choice(["monday", "Friday", "sunday"])}") at({times})'
+    if kind == 3:
+        return f'at({times})'
+    schedule = f'every({rng.randint(1, 9)} {rng.choice(UNITS)})'
+    if rng.random() < 0.5:
+        schedule += f' at({times})'
+    if rng.random() < 0.5:
+        until = random_time(rng) if rng.random() < 0.5 else f'"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"'
+        schedule += f' until({until})'
+    return schedule
+
+
+def random_content(rng, name):
+    lines = [f'text: "Text of {name}"']
+    if rng.random() < 0.5:
+        lines.append(f'media: "{name}.jpg"' + (' optional' if rng.random() < 0.3 else ''))
+    if rng.random() < 0.5:
+        tags = ', '.join(f'"#{rng.choice(["summer", "sale", "fashion"])}"' for _ in range(rng.randint(1, 3)))
+        lines.append(f'hashtags: [{tags}]')
+    if rng.random() < 0.8:
+        lines.append(f'schedule: {random_schedule(rng)}')
+    body = '\n            '.join(lines)
+    kind = rng.choice(['post', 'story', 'reel', 'video', 'image'])
+    return f'{kind} "{name}" {{\n            {body}\n        }}'
+
+
+def random_targeting(rng):
+    rules = [f'age_range: {rng.randint(13, 30)} to {rng.randint(31, 65)}']
+    if rng.random() < 0.6:
+        rules.append('interests: ["fashion", "lifestyle"]')
+    if rng.random() < 0.6:
+        rules.append('location: ["US", "HU"]' + (' optional' if rng.random() < 0.5 else ''))
+    return '\n        '.join(rules)
+
+
+def random_budget(rng):
+    rules = [f'total: ${rng.randint(100, 9999)}' + ('.50' if rng.random() < 0.3 else '')]
+    if rng.random() < 0.6:
+        rules.append(f'daily_limit: ${rng.randint(10, 99)}' + (' optional' if rng.random() < 0.5 else ''))
+    if rng.random() < 0.6:
+        rules.append(f'auto_optimize: {rng.choice(["true", "false"])}')
+    return '\n        '.join(rules)
+
+
+def random_source(rng, module=False):
+    """A random valid campaign (or module) using most of the language"""
+    parts = []
+    if rng.random() < 0.3:
+        parts.append('import "shared.smp"')
+    if rng.random() < 0.3:
+        parts.append(f'define targeting "young" {{\n        {random_targeting(rng)}\n    }}')
+    if rng.random() < 0.3:
+        parts.append(f'define budget "small" {{\n        {random_budget(rng)}\n    }}')
+    if rng.random() < 0.3:
+        parts.append(f'define {random_content(rng, "shared")}')
+    if module and rng.random() < 0.5:
+        return '\n'.join(parts) + '\n'
+    platforms = ', '.join(rng.sample(PLATFORMS, rng.randint(1, 4)))
+    items = []
+    for n in range(rng.randint(1, 3)):
+        if rng.random() < 0.2:
+            items.append('use "shared"' + (f' as "copy_{n}"' if rng.random() < 0.5 else ''))
+        else:
+            items.append(random_content(rng, f"item_{n}"))
+    body = [f'platforms: [{platforms}]', 'content_types {\n        ' + '\n        '.join(items) + '\n    }']
+    optional = lambda: ' optional' if rng.random() < 0.3 else ''
+    if rng.random() < 0.2:
+        body.append('use targeting "young"' + optional())
+    elif rng.random() < 0.7:
+        body.append(f'targeting {{\n        {random_targeting(rng)}\n    }}' + optional())
+    if rng.random() < 0.2:
+        body.append('use budget "small"' + optional())
+    elif rng.random() < 0.7:
+        body.append(f'budget {{\n        {random_budget(rng)}\n    }}' + optional())
+    parts.append(f'// generated\ncampaign "c" duration({rng.randint(1, 60)} {rng.choice(UNITS)}) {{\n    '
+                 + '\n    '.join(body) + '\n}')
+    return '\n'.join(parts) + '\n'
+
+
+def mutate(rng, source):
+    """Delete, insert or replace a character or a token somewhere in ``source``"""
+    at = rng.randrange(len(source) + 1)
+    kind = rng.randrange(4)
+    if kind == 0:
+        return source[:at] + source[at + 1:]
+    if kind == 1:
+        return source[:at] + rng.choice('{}()[]",:$#x1 \n') + source[at:]
+    if kind == 2:
+        return source[:at] + ' ' + rng.choice(TOKENS) + ' ' + source[at:]
+    end = source.find(' ', at)
+    return source[:at] + rng.choice(TOKENS) + (source[end:] if end != -1 else '')
+
+
+def outcome(result):
+    """The comparable part of a parse_string() result"""
+    errors = [(e['type'], e.get('line'), e.get('column')) for e in result['errors']]
+    return result['success'], result['ast'], errors
+
+
+class TestFastParser(unittest.TestCase):
+    """A kézzel írt parser és a Lark parser egyezése"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.lark = SocialMediaContentParser()
+        cls.fast = SocialMediaContentParser(backend='fast')
+
+    def compare(self, source, start='start'):
+        with redirect_stdout(io.StringIO()):
+            expected = outcome(self.lark.parse_string(source, start=start))
+            actual = outcome(self.fast.parse_string(source, start=start))
+        self.assertEqual(actual, expected, f"Backends disagree on:\n{source}")
+        return expected
+
+    def test_examples(self):
+        """The example files parse to identical results"""
+        for path in sorted(EXAMPLES.glob("*.smp")):
+            with self.subTest(path=path.name):
+                self.compare(path.read_text(encoding='utf-8'))
+        print("[OK] Example files agree")
+
+    def test_generated_valid(self):
+        """Randomly generated valid campaigns and modules agree"""
+        rng = random.Random(32)
+        for n in range(150):
+            module = n % 3 == 0
+            source = random_source(rng, module)
+            success, _, _ = self.compare(source, 'module' if module else 'start')
+            self.assertTrue(success, source)
+        print("[OK] 150 generated sources agree")
+
+    def test_mutated(self):
+        """Mutated sources fail (or succeed) at the same position with the same error type"""
+        rng = random.Random(2024)
+        failures = 0
+        for n in range(400):
+            module = n % 4 == 0
+            source = random_source(rng, module)
+            for _ in range(rng.randint(1, 2)):
+                source = mutate(rng, source)
+            success, _, _ = self.compare(source, 'module' if module else 'start')
+            failures += not success
+        self.assertGreater(failures, 200)
+        print(f"[OK] 400 mutated sources agree ({failures} rejected)")
+
+    def test_invalid_date(self):
+        """Impossible dates are reported as value errors by both backends"""
+        source = (EXAMPLES / "basic_campaign.smp").read_text(encoding='utf-8')
+        source = source.replace('daily at("12:00")', 'every(1 days) until("2024-02-30")')
+        success, _, errors = self.compare(source)
+        self.assertFalse(success)
+        line = source[:source.index('until(')].count('\n') + 1
+        column = source.index('until(') + len('until(') - source.rfind('\n', 0, source.index('until('))
+        self.assertEqual(errors, [('ValueError', line, column)])
+        print("[OK] Invalid date rejected by both backends")
+
+    def test_unknown_backend(self):
+        """Unknown backend names are rejected"""
+        with self.assertRaises(ValueError):
+            SocialMediaContentParser(backend='yacc')
+        print("[OK] Unknown backend rejected")
+
+    def test_speed(self):
+        """The fast backend is much faster than Earley on a typical campaign"""
+        source = (EXAMPLES / "complex_campaign.smp").read_text(encoding='utf-8')
+        timings = {}
+        with redirect_stdout(io.StringIO()):
+            for name, parser in (('lark', self.lark), ('fast', self.fast)):
+                started = time.perf_counter()
+                for _ in range(20):
+                    self.assertTrue(parser.parse_string(source)['success'])
+                timings[name] = (time.perf_counter() - started) / 20
+        self.assertLess(timings['fast'] * 5, timings['lark'])
+        print(f"[OK] lark {timings['lark'] * 1000:.2f} ms, fast {timings['fast'] * 1000:.3f} ms per campaign")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Megvalósíthatósági szabály tesztek
+"""
+
+import time
+import unittest
+import sys
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from feasibility import RULES, FeasibilityBatch, check_feasibility
+from parser import SocialMediaContentParser
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+def campaign(name="c", days=30, unit='days', budget=None, schedules=()):
+    content = [{'type': 'post', 'name': f"item_{n}", 'properties': {'text': "t", 'schedule': schedule}}
+               for n, schedule in enumerate(schedules)]
+    body = {'platforms': ['instagram'], 'content': content}
+    if budget is not None:
+        body['budget'] = budget
+    return {'type': 'campaign', 'name': name, 'duration': {'value': days, 'unit': unit}, 'body': body}
+
+
+def budget(total, daily_limit=None, optional=False):
+    rules = {'total': Decimal(total)}
+    if daily_limit is not None:
+        rules['daily_limit'] = Decimal(daily_limit)
+        rules['daily_limit_optional'] = optional
+    return rules
+
+
+def interval(value, unit, until=None):
+    return {'type': 'interval', 'every': {'value': value, 'unit': unit}, 'times': [], 'until': until}
+
+
+def codes(findings):
+    return [(f['code'], f['index'], f['item']) for f in findings]
+
+
+class TestFeasibility(unittest.TestCase):
+    """Mezők közötti megvalósíthatósági szabályok"""
+
+    def test_daily_limit_shortfall(self):
+        """daily_limit * days below total is an error (a warning if the limit is optional)"""
+        findings = check_feasibility([
+            campaign(days=10, budget=budget("5000", "200")),
+            campaign(days=10, budget=budget("2000", "200")),
+            campaign(days=10, budget=budget("5000", "200", optional=True)),
+            campaign(days=36, unit='hours', budget=budget("500", "200")),
+            campaign(days=10, budget=budget("5000")),
+        ])
+        self.assertEqual(codes(findings), [('F101', 0, None), ('F101', 2, None), ('F101', 3, None)])
+        self.assertEqual([f['severity'] for f in findings], ['error', 'warning', 'error'])
+        self.assertIn("$2000", findings[0]['message'])
+        self.assertIn("2 day(s)", findings[2]['message'])
+        print("[OK] Daily limit shortfall detected")
+
+    def test_unknown_location(self):
+        """Locations without a time zone are an error (a warning if the locations are optional)"""
+        asts = [campaign(), campaign(), campaign()]
+        asts[0]['body']['targeting'] = {'location': ["US", "Europe/Budapest"], 'location_optional': False}
+        asts[1]['body']['targeting'] = {'location': ["New York", "CA"], 'location_optional': False}
+        asts[2]['body']['targeting'] = {'location': ["United States", "Canada"], 'location_optional': True}
+        findings = check_feasibility(asts)
+        self.assertEqual(codes(findings), [('F102', 1, None), ('F102', 2, None), ('F102', 2, None)])
+        self.assertEqual([f['severity'] for f in findings], ['error', 'warning', 'warning'])
+        self.assertIn("'New York'", findings[0]['message'])
+        print("[OK] Unknown locations reported")
+
+    def test_until_after_end(self):
+        """until dates after the last campaign day need a start date"""
+        asts = [campaign(days=7, schedules=[interval(1, 'days', until=date(2024, 7, 7)),
+                                            interval(1, 'days', until=date(2024, 7, 8)),
+                                            interval(1, 'days', until=600)])]
+        self.assertEqual(check_feasibility(asts), [])
+        findings = check_feasibility(asts, start=date(2024, 7, 1))
+        self.assertEqual(codes(findings), [('F201', 0, 'item_1')])
+        self.assertIn("2024-07-07", findings[0]['message'])
+        print("[OK] until after campaign end detected")
+
+    def test_weekly_and_interval(self):
+        """weekly on short campaigns and intervals longer than the campaign"""
+        weekly = {'type': 'weekly', 'day': 'friday', 'times': [600]}
+        findings = check_feasibility([
+            campaign(days=5, schedules=[weekly, interval(6, 'days')]),
+            campaign(days=7, schedules=[weekly, interval(1, 'weeks'), interval(2, 'months')]),
+        ])
+        self.assertEqual(codes(findings), [('F202', 0, 'item_0'), ('F203', 0, 'item_1'), ('F203', 1, 'item_2')])
+        self.assertTrue(all(f['severity'] == 'warning' for f in findings))
+        print("[OK] Weekly and interval rules detected")
+
+    def test_parsed_campaigns(self):
+        """Parsed examples are feasible; unresolved use references are skipped"""
+        parser = SocialMediaContentParser(backend='fast')
+        asts = [parser.parse_file(str(path))['ast'] for path in sorted(EXAMPLES.glob("*_campaign.smp"))]
+        self.assertEqual(check_feasibility(asts, start=date(2024, 7, 1)), [])
+        source = '''
+        campaign "short" duration(3 days) {
+            platforms: [instagram]
+            content_types {
+                use "shared"
+                post "p" { text: "t" schedule: every(1 weeks) until("2024-12-31") }
+            }
+            use budget "small"
+        }'''
+        ast = parser.parse_string(source)['ast']
+        findings = check_feasibility([ast], start=[date(2024, 7, 1)])
+        self.assertEqual([f['code'] for f in findings], ['F201', 'F203'])
+        print("[OK] Parsed campaigns checked")
+
+    def test_batch(self):
+        """A large batch is evaluated in one pass over its columns"""
+        asts = [campaign(name=f"c{n}", days=n % 14 + 1, budget=budget("1000", "100"),
+                         schedules=[{'type': 'weekly', 'day': 'monday', 'times': [600]}, interval(10, 'days')])
+                for n in range(20000)]
+        started = time.perf_counter()
+        batch = FeasibilityBatch(asts, start=date(2024, 7, 1))
+        findings = check_feasibility(batch)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(len(batch), 20000)
+        self.assertEqual(len(batch.campaign), 40000)
+        counts = {rule['code']: sum(f['code'] == rule['code'] for f in findings) for rule in RULES}
+        days = [n % 14 + 1 for n in range(20000)]
+        self.assertEqual(counts, {
+            'F101': sum(d * 100 < 1000 for d in days),
+            'F102': 0,
+            'F201': 0,
+            'F202': sum(d < 7 for d in days),
+            'F203': sum(d < 10 for d in days),
+        })
+        self.assertEqual([f['index'] for f in findings], sorted(f['index'] for f in findings))
+        self.assertLess(elapsed, 5)
+        print(f"[OK] {len(findings)} findings for 20000 campaigns in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
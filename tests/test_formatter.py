@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Formázó tesztek - visszaolvasás, kanonikus alak és duplikátumszűrés
+"""
+
+import io
+import random
+import unittest
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from parser import SocialMediaContentParser
+from formatter import Deduplicator, canonical_ast, canonical_hash, canonical_source, deduplicate, format_ast, main
+from test_fastparser import random_source
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+CAMPAIGN = '''campaign "launch" duration(14 days) {
+    platforms: [instagram, tiktok]
+    content_types {
+        post "teaser" {
+            text: "Soon"
+            hashtags: ["#Launch", "#new"]
+            schedule: daily at("18:00", "09:00")
+        }
+        reel "demo" {
+            text: "How it works"
+            schedule: weekly on("friday") at("12:00")
+        }
+    }
+    targeting {
+        age_range: 18 to 40
+        location: ["US", "HU"]
+    }
+    budget {
+        total: $1200.50
+        daily_limit: $100
+    }
+}
+'''
+
+# Same campaign: other layout, comments, order and case
+REWRITTEN = '''// hand-edited copy
+campaign "launch" duration(14 days) { platforms: [tiktok, instagram, tiktok]
+  content_types {
+    reel "demo" { schedule: weekly on("Friday") at("12:00") text: "How it works" }
+    // the teaser
+    post "teaser" { hashtags: ["#new", "#launch"] schedule: every_day at("09:00", "18:00") text: "Soon" }
+  }
+  targeting { location: ["HU", "US"] age_range: 18 to 40 }
+  budget { daily_limit: $100.00 total: $1200.5 }
+}
+'''
+
+
+class TestFormatter(unittest.TestCase):
+    """AST-ből generált DSL szöveg és kanonikus hash"""
+
+    @classmethod
+    def setUpClass(cls):
+        with redirect_stdout(io.StringIO()):
+            cls.parser = SocialMediaContentParser(backend='fast')
+
+    def parse(self, source, start='start'):
+        with redirect_stdout(io.StringIO()):
+            result = self.parser.parse_string(source, start=start)
+        self.assertTrue(result['success'], f"{result['errors']}\n{source}")
+        return result['ast']
+
+    def test_round_trip(self):
+        """Formatted ASTs parse back to the same AST"""
+        sources = [path.read_text(encoding='utf-8') for path in sorted(EXAMPLES.glob("*_campaign.smp"))]
+        rng = random.Random(39)
+        sources += [(random_source(rng, n % 3 == 0), n % 3 == 0) for n in range(150)]
+        for source in sources:
+            source, module = source if isinstance(source, tuple) else (source, False)
+            start = 'module' if module else 'start'
+            ast = self.parse(source, start)
+            self.assertEqual(self.parse(format_ast(ast), start), ast, source)
+        print(f"[OK] {len(sources)} sources round-trip through the formatter")
+
+    def test_canonical_equivalence(self):
+        """Layout, comments, ordering and case differences hash the same"""
+        original, rewritten = self.parse(CAMPAIGN), self.parse(REWRITTEN)
+        self.assertNotEqual(original, rewritten)
+        self.assertEqual(canonical_source(original), canonical_source(rewritten))
+        self.assertEqual(canonical_hash(original), canonical_hash(rewritten))
+        changed = self.parse(CAMPAIGN.replace('"09:00"', '"10:00"'))
+        self.assertNotEqual(canonical_hash(changed), canonical_hash(original))
+        print("[OK] Rewritten campaign has the same canonical hash")
+
+    def test_canonical_form_is_stable(self):
+        """The canonical form parses back to the canonical AST and is a fixed point"""
+        rng = random.Random(7)
+        for _ in range(50):
+            canonical = canonical_source(self.parse(random_source(rng)))
+            ast = self.parse(canonical)
+            self.assertEqual(ast, canonical_ast(ast))
+            self.assertEqual(canonical_source(ast), canonical)
+        self.assertEqual(canonical_hash(self.parse(CAMPAIGN)), "df73714e2d487a85b2184cd34d62265f")
+        print("[OK] Canonical form is a fixed point")
+
+    def test_deduplicate(self):
+        """A corpus is deduplicated with one hash lookup per campaign"""
+        rng = random.Random(1)
+        corpus = [self.parse(random_source(rng)) for _ in range(20)]
+        corpus += [self.parse(format_ast(ast).replace("\n", "\n  // copy\n")) for ast in corpus[:5]]
+        corpus.append(self.parse(REWRITTEN))
+        corpus.append(self.parse(CAMPAIGN))
+        unique, duplicates = deduplicate(corpus)
+        distinct = {canonical_source(ast) for ast in corpus}
+        self.assertEqual(len(unique), len(distinct))
+        self.assertEqual(len(unique) + len(duplicates), len(corpus))
+        for index in range(20, 25):
+            self.assertEqual(canonical_hash(corpus[duplicates[index]]), canonical_hash(corpus[index - 20]))
+        self.assertEqual(duplicates[len(corpus) - 1], len(corpus) - 2)
+        seen = Deduplicator()
+        self.assertIsNone(seen.add(corpus[-1], 'a.smp'))
+        self.assertEqual(seen.add(corpus[-2], 'b.smp'), 'a.smp')
+        self.assertIn(corpus[-2], seen)
+        self.assertEqual(len(seen), 1)
+        unkeyed = Deduplicator()
+        self.assertIsNone(unkeyed.add(corpus[-1]))
+        self.assertIsNone(unkeyed.add(corpus[0]))
+        self.assertEqual(unkeyed.add(corpus[-2]), 0)
+        print(f"[OK] {len(corpus)} campaigns deduplicated to {len(unique)}")
+
+    def test_cli(self):
+        """--dedupe reports copies and exits with 1"""
+        basic = str(EXAMPLES / "basic_campaign.smp")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(main([basic]), 0)
+        self.assertEqual(output.getvalue(), format_ast(self.parse(Path(basic).read_text(encoding='utf-8'))))
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(main(['--dedupe', basic, basic]), 1)
+        self.assertEqual(output.getvalue(), f"{basic} duplicates {basic}\n")
+        print("[OK] CLI formats and finds duplicates")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+iCalendar-export tesztek - RRULE-sorozatok összevetése a kibontással, sortördelés és folyamatos írás
+"""
+
+import io
+import random
+import tempfile
+import unittest
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from parser import SocialMediaContentParser
+from schedule import expand_campaign, expand_schedule
+from ical import calendar_lines, main, recurrences, write_calendar
+from generators import random_schedule
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+STAMP = datetime(2024, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+STEPS = {'DAILY': timedelta(days=1), 'WEEKLY': timedelta(weeks=1),
+         'HOURLY': timedelta(hours=1), 'MINUTELY': timedelta(minutes=1)}
+
+
+def rrule_moments(first, rrule):
+    """Occurrences of the simple RRULEs the exporter writes"""
+    parts = dict(part.split('=') for part in rrule.split(';'))
+    step = STEPS[parts['FREQ']] * int(parts.get('INTERVAL', 1))
+    return [first + step * k for k in range(int(parts['COUNT']))]
+
+
+def unfold(text):
+    return text.replace('\r\n ', '').split('\r\n')
+
+
+def events(text):
+    """(DTSTART, RRULE or None) of every VEVENT of a calendar"""
+    result = []
+    for line in unfold(text):
+        if line == 'BEGIN:VEVENT':
+            event = {}
+        elif line == 'END:VEVENT':
+            result.append(event)
+        elif ':' in line and line.split(':')[0].split(';')[0] in ('DTSTART', 'RRULE', 'SUMMARY', 'UID'):
+            name, value = line.split(':', 1)
+            event[name.split(';')[0]] = value
+    return result
+
+
+class TestICal(unittest.TestCase):
+    """Ütemezések naptárexportja"""
+
+    @classmethod
+    def setUpClass(cls):
+        with redirect_stdout(io.StringIO()):
+            cls.ast = SocialMediaContentParser(backend='fast').parse_file(EXAMPLES / "complex_campaign.smp")['ast']
+
+    def test_recurrences_match_expansion(self):
+        """RRULE series give exactly the expanded posts, to the second"""
+        rng = random.Random(46)
+        mapped = 0
+        for _ in range(2000):
+            schedule = random_schedule(rng)
+            start = datetime(2024, 1, 1) + timedelta(seconds=rng.randrange(86400 * 10),
+                                                     microseconds=rng.choice([0, rng.randrange(10 ** 6)]))
+            end = start + timedelta(seconds=rng.choice([0, 60, 3600, 86400, rng.randrange(86400 * 40)]))
+            expected = list(expand_schedule(schedule, start, end))
+            series = recurrences(schedule, start, end)
+            if series is None:
+                self.assertTrue(schedule['type'] == 'at' or isinstance(schedule.get('until'), int))
+                continue
+            mapped += 1
+            moments = sorted(m for first, rrule, _ in series for m in rrule_moments(first, rrule))
+            self.assertEqual(moments, expected, (schedule, start, end))
+            self.assertEqual(len({label for *_, label in series}), len(series))
+        self.assertGreater(mapped, 1200)
+        print(f"[OK] {mapped} random schedules exported as exact RRULEs")
+
+    def test_example_calendar(self):
+        """The example campaign becomes four daily series and a weekly one"""
+        text = ''.join(calendar_lines([self.ast], date(2024, 7, 1), stamp=STAMP, name="Summer"))
+        self.assertTrue(text.startswith('BEGIN:VCALENDAR\r\nVERSION:2.0\r\n'))
+        self.assertTrue(text.endswith('END:VCALENDAR\r\n'))
+        self.assertIn('X-WR-CALNAME:Summer\r\n', text)
+        found = events(text)
+        self.assertEqual([(e['DTSTART'], e.get('RRULE')) for e in found], [
+            ('20240701T090000', 'FREQ=DAILY;COUNT=30'),
+            ('20240701T150000', 'FREQ=DAILY;COUNT=30'),
+            ('20240701T200000', 'FREQ=DAILY;COUNT=30'),
+            ('20240701T140000', 'FREQ=DAILY;INTERVAL=2;COUNT=15'),
+            ('20240705T180000', 'FREQ=WEEKLY;BYDAY=FR;COUNT=4'),
+        ])
+        self.assertEqual(found[0]['SUMMARY'], 'summer_collection_2024: product_showcase')
+        self.assertEqual(len({e['UID'] for e in found}), len(found))
+        self.assertIn('CATEGORIES:post,instagram,facebook,twitter,tiktok\r\n', text)
+        self.assertIn('DTSTAMP:20240601T120000Z\r\n', text)
+        # "Discover ... - 40% off everything!" is longer than one line
+        self.assertIn('\r\n ', text)
+        for line in text.split('\r\n'):
+            self.assertLessEqual(len(line.encode('utf-8')), 75)
+
+        expanded = ''.join(calendar_lines([self.ast], date(2024, 7, 1), stamp=STAMP, expand=True))
+        moments = [e['DTSTART'] for e in events(expanded)]
+        self.assertNotIn('RRULE', expanded)
+        self.assertEqual(len(moments), 109)
+        self.assertEqual(sorted(moments), sorted(f"{m:%Y%m%dT%H%M%S}"
+                                                 for m, _ in expand_campaign(self.ast, datetime(2024, 7, 1))))
+        print(f"[OK] {len(found)} recurring events, {len(moments)} expanded")
+
+    def test_escaping_and_zones(self):
+        """Text is escaped, long UTF-8 lines fold on character boundaries, zones are kept"""
+        from zoneinfo import ZoneInfo
+        ast = {'name': 'tél, 2024; "hó"', 'duration': {'value': 2, 'unit': 'days'},
+               'body': {'platforms': ['instagram'], 'content': [
+                   {'type': 'post', 'name': 'a', 'properties': {
+                       'text': 'árvíztűrő tükörfúrógép\n' * 6,
+                       'schedule': {'type': 'at', 'times': [600]}}}]}}
+        start = datetime(2024, 1, 1, 8, 0, tzinfo=ZoneInfo('Europe/Budapest'))
+        text = ''.join(calendar_lines([ast], start, stamp=STAMP))
+        self.assertIn('SUMMARY:tél\\, 2024\\; "hó": a\r\n', text)
+        self.assertIn('DTSTART;TZID=Europe/Budapest:20240101T100000\r\n', text)
+        description = next(line for line in unfold(text) if line.startswith('DESCRIPTION:'))
+        self.assertEqual(description, 'DESCRIPTION:' + 'árvíztűrő tükörfúrógép\\n' * 6)
+        for line in text.split('\r\n'):
+            self.assertLessEqual(len(line.encode('utf-8')), 75)
+        utc = ''.join(calendar_lines([ast], datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=2))), stamp=STAMP))
+        self.assertIn('DTSTART:20240101T080000Z\r\n', utc)
+        print("[OK] Escaping, folding and time zones")
+
+    def test_streaming(self):
+        """Campaigns are consumed and written one at a time"""
+        consumed = []
+
+        def campaigns():
+            for n in range(3):
+                consumed.append(n)
+                yield dict(self.ast, name=f"c{n}")
+
+        lines = calendar_lines(campaigns(), date(2024, 7, 1), stamp=STAMP, expand=True)
+        for line in lines:
+            if line.startswith('UID:c1/'):
+                break
+        self.assertEqual(consumed, [0, 1])
+        stream = io.StringIO()
+        count = write_calendar(campaigns(), date(2024, 7, 1), stream, stamp=STAMP)
+        self.assertEqual(count, len(unfold(stream.getvalue())) - 1)
+        print(f"[OK] {count} lines streamed")
+
+    def test_unique_uids(self):
+        """UIDs carry a domain and tell equally named campaigns of different files apart"""
+        def uids(**options):
+            text = ''.join(calendar_lines([self.ast], date(2024, 7, 1), stamp=STAMP, **options))
+            return [line[4:] for line in unfold(text) if line.startswith('UID:')]
+
+        first = uids(sources=["/plans/a.smp"])
+        self.assertTrue(all(uid.endswith('@social-media-planner.invalid') for uid in first))
+        self.assertEqual(first, uids(sources=["/plans/a.smp"]))
+        self.assertFalse(set(first) & set(uids(sources=["/plans/b.smp"])))
+        # Without a source the campaign's content is hashed instead
+        self.assertEqual(uids(), uids())
+        self.assertFalse(set(uids()) & set(first))
+        self.assertTrue(all(uid.endswith('@example.com') for uid in uids(domain='example.com')))
+        print(f"[OK] {len(first)} UIDs unique per source")
+
+    def test_cli(self):
+        """The CLI writes a .ics file with CRLF line ends"""
+        with tempfile.TemporaryDirectory() as temp:
+            output = Path(temp) / "plan.ics"
+            with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+                status = main([str(EXAMPLES / "complex_campaign.smp"), str(EXAMPLES / "error_examples.smp"),
+                               '--start', '2024-07-01', '-o', str(output)])
+            data = output.read_bytes()
+        self.assertEqual(status, 1)
+        self.assertEqual(data.count(b'BEGIN:VEVENT'), 5)
+        self.assertEqual(data.count(b'\r\n'), data.count(b'\n'))
+        print("[OK] CLI writes the calendar")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
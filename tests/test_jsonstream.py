@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Folyamatos JSON író tesztek - azonos kimenet és állandó memória
+"""
+
+import copy
+import io
+import json
+import tempfile
+import tracemalloc
+import unittest
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from parser import SocialMediaContentParser
+from jsonstream import JSONStreamWriter, parse_records, write_json
+from cli import main
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+class NullStream:
+    """Discards everything, like a socket to a fast consumer"""
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, text):
+        self.size += len(text)
+
+    def flush(self):
+        pass
+
+
+class TestJSONStream(unittest.TestCase):
+    """JSON tömb és JSON Lines kiírás darabonként"""
+
+    @classmethod
+    def setUpClass(cls):
+        with redirect_stdout(io.StringIO()):
+            cls.parser = SocialMediaContentParser(backend='fast')
+            cls.ast = cls.parser.parse_file(EXAMPLES / "complex_campaign.smp")['ast']
+
+    def campaigns(self, count):
+        """Distinct campaign ASTs, built one at a time"""
+        for n in range(count):
+            ast = copy.deepcopy(self.ast)
+            ast['name'] = f"campaign_{n}"
+            yield ast
+
+    def test_same_output_as_json_dumps(self):
+        """Array output matches json.dumps byte for byte, JSON Lines one value per line"""
+        values = list(self.campaigns(3)) + [{'note': "line\nbreak", 'empty': [], 'nested': {}}]
+        for indent in (2, 4, None):
+            for count in (0, 1, len(values)):
+                output = io.StringIO()
+                with JSONStreamWriter(output, indent=indent) as writer:
+                    writer.write_all(values[:count])
+                expected = json.dumps(values[:count], indent=indent, ensure_ascii=False, default=str)
+                self.assertEqual(output.getvalue(), expected)
+        output = io.StringIO()
+        with JSONStreamWriter(output, lines=True) as writer:
+            self.assertEqual(writer.write_all(values), len(values))
+        self.assertEqual(output.getvalue().splitlines(),
+                         [json.dumps(value, ensure_ascii=False, default=str) for value in values])
+        output = io.StringIO()
+        write_json(self.ast, output)
+        self.assertEqual(output.getvalue(), json.dumps(self.ast, indent=2, ensure_ascii=False, default=str))
+        print("[OK] Streamed output equals json.dumps")
+
+    def test_constant_memory(self):
+        """Peak memory does not grow with the number of campaigns"""
+        peaks = []
+        for count in (50, 500):
+            tracemalloc.start()
+            with JSONStreamWriter(NullStream()) as writer:
+                writer.write_all(self.campaigns(count))
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        one = len(json.dumps(self.ast, indent=2, default=str))
+        self.assertLess(peaks[1], peaks[0] * 1.5)
+        self.assertLess(peaks[1], one * 50)
+        print(f"[OK] Peak memory {peaks[0]} B for 50 campaigns, {peaks[1]} B for 500")
+
+    def test_closed_writer(self):
+        """Writing after close is an error; closing twice is not"""
+        writer = JSONStreamWriter(io.StringIO())
+        writer.close()
+        writer.close()
+        with self.assertRaises(ValueError):
+            writer.write({})
+        print("[OK] Closed writer rejects values")
+
+    def test_parse_records_and_cli(self):
+        """Records are produced file by file and the CLI writes them as JSON Lines"""
+        paths = [EXAMPLES / "basic_campaign.smp", EXAMPLES / "missing.smp"]
+        with redirect_stdout(io.StringIO()):
+            records = list(parse_records(self.parser, paths, validate=True))
+        self.assertEqual([record['success'] for record in records], [True, False])
+        self.assertEqual(records[0]['warnings'], [])
+        self.assertEqual(records[1]['errors'][0]['type'], 'IOError')
+        with tempfile.TemporaryDirectory() as temp:
+            output = Path(temp) / "results.jsonl"
+            with redirect_stdout(io.StringIO()):
+                self.assertEqual(main([str(path) for path in paths] + ['--validate', '--jsonl', str(output)]), 1)
+            lines = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+        self.assertEqual([line['path'] for line in lines], [str(path) for path in paths])
+        self.assertEqual(lines[0]['ast']['name'], "basic_promo")
+        self.assertEqual(lines[0]['warnings'], [])
+        self.assertIsNone(lines[1]['ast'])
+        print("[OK] CLI writes one JSON record per file")
+
+    def test_cli_closes_jsonl_on_error(self):
+        """The --jsonl file is closed, with the records so far, when a run is interrupted"""
+        from unittest import mock
+        parse_file = SocialMediaContentParser.parse_file
+        calls = []
+
+        def interrupted(parser, path, start='start'):
+            calls.append(path)
+            if len(calls) > 1:
+                raise KeyboardInterrupt
+            return parse_file(parser, path, start)
+
+        with tempfile.TemporaryDirectory() as temp:
+            output = Path(temp) / "results.jsonl"
+            with mock.patch.object(SocialMediaContentParser, 'parse_file', interrupted), \
+                    redirect_stdout(io.StringIO()), self.assertRaises(KeyboardInterrupt):
+                main([str(EXAMPLES / "basic_campaign.smp")] * 2 + ['--jsonl', str(output)])
+            lines = output.read_text(encoding='utf-8').splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['ast']['name'], "basic_promo")
+        print("[OK] JSON Lines output closed on interruption")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Erőforrás-korlát tesztek
+"""
+
+import io
+import signal
+import time
+import unittest
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from limits import ResourceLimitExceeded, ResourceLimits, resource_guard
+from parser import SocialMediaContentParser
+
+
+def campaign(items=3, tags=2):
+    hashtags = ', '.join(f'"#tag{n}"' for n in range(tags))
+    content = '\n'.join(f'post "p{n}" {{ text: "a [post], with (commas)" hashtags: [{hashtags}] '
+                        f'schedule: daily at("12:00") }}' for n in range(items))
+    return (f'// story, reel, [video]\ncampaign "c" duration(7 days) {{\n'
+            f'    platforms: [instagram]\n    content_types {{\n{content}\n    }}\n}}\n')
+
+
+class TestResourceLimits(unittest.TestCase):
+    """Erőforrás-korlátok a parse során"""
+
+    def parse(self, source, backend='lark', **limits):
+        parser = SocialMediaContentParser(backend=backend, limits=ResourceLimits(**limits))
+        with redirect_stdout(io.StringIO()):
+            return parser.parse_string(source)
+
+    def assertLimit(self, result, limit):
+        self.assertFalse(result['success'])
+        self.assertIsNone(result['ast'])
+        self.assertEqual(len(result['errors']), 1)
+        error = result['errors'][0]
+        self.assertEqual(error['type'], 'ResourceLimitExceeded')
+        self.assertEqual(error['limit'], limit)
+        self.assertGreater(error['value'], error['maximum'])
+        return error
+
+    def test_defaults_allow_normal_campaigns(self):
+        """Default limits do not get in the way of ordinary input"""
+        self.assertTrue(self.parse(campaign())['success'])
+        self.assertTrue(self.parse(campaign(), max_memory_bytes=50_000_000)['success'])
+        print("[OK] Ordinary campaign within default limits")
+
+    def test_input_size(self):
+        """Oversized input is rejected before parsing"""
+        error = self.assertLimit(self.parse(campaign(), max_input_bytes=100), 'max_input_bytes')
+        self.assertEqual(error['value'], len(campaign().encode('utf-8')))
+        print("[OK] Input size limit enforced")
+
+    def test_item_and_list_counts(self):
+        """Item and list counts ignore keywords and brackets inside strings and comments"""
+        error = self.assertLimit(self.parse(campaign(items=5), max_content_items=4), 'max_content_items')
+        self.assertEqual(error['value'], 5)
+        self.assertTrue(self.parse(campaign(items=5), max_content_items=5)['success'])
+        error = self.assertLimit(self.parse(campaign(tags=6), max_list_length=5), 'max_list_length')
+        self.assertEqual(error['value'], 6)
+        self.assertTrue(self.parse(campaign(tags=6), max_list_length=6)['success'])
+        print("[OK] Item and list limits enforced")
+
+    def test_parse_time_interrupts(self):
+        """A slow Earley parse is interrupted at its wall-clock budget"""
+        started = time.perf_counter()
+        result = self.parse(campaign(items=400), max_parse_seconds=0.1, interrupt=True)
+        elapsed = time.perf_counter() - started
+        self.assertLimit(result, 'max_parse_seconds')
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(signal.getsignal(signal.SIGALRM), signal.SIG_DFL)
+        self.assertEqual(signal.getitimer(signal.ITIMER_REAL)[0], 0)
+        print(f"[OK] Parse interrupted after {elapsed:.2f}s")
+
+    def test_parse_time_checked_after(self):
+        """By default no timer is armed; the time budget is checked when the parse returns"""
+        with resource_guard(ResourceLimits()):
+            self.assertEqual(signal.getsignal(signal.SIGALRM), signal.SIG_DFL)
+            self.assertEqual(signal.getitimer(signal.ITIMER_REAL)[0], 0)
+        self.assertLimit(self.parse(campaign(items=20), max_parse_seconds=1e-6), 'max_parse_seconds')
+        print("[OK] Parse time checked without a timer")
+
+    def test_memory_budget(self):
+        """Both backends report an exhausted memory budget"""
+        for backend in ('lark', 'fast'):
+            with self.subTest(backend=backend):
+                self.assertLimit(self.parse(campaign(items=200), backend, max_memory_bytes=10_000),
+                                 'max_memory_bytes')
+        print("[OK] Memory limit enforced")
+
+    def test_guard_outside_parser(self):
+        """resource_guard can wrap any block of work"""
+        with self.assertRaises(ResourceLimitExceeded):
+            with resource_guard(ResourceLimits(max_parse_seconds=0.05, interrupt=True)):
+                while True:
+                    pass
+        with resource_guard(ResourceLimits.unlimited()):
+            pass
+        print("[OK] Guard interrupts busy loop")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Médiaellenőrzés tesztek - hiányzó, túl nagy és gyökéren kívüli fájlok, stat-gyorsítótár
+"""
+
+import io
+import tempfile
+import threading
+import time
+import unittest
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from parser import SocialMediaContentParser
+from media import MB, MediaVerifier, StatCache, main
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+def campaign(name, platforms, items):
+    return {
+        'type': 'campaign',
+        'name': name,
+        'duration': {'value': 7, 'unit': 'days'},
+        'body': {
+            'platforms': platforms,
+            'content': [{'type': 'post', 'name': item, 'properties': {'media': media, 'optional': optional}}
+                        for item, media, optional in items]
+        }
+    }
+
+
+class TestMedia(unittest.TestCase):
+    """Médiafájlok létezése és platformkorlátai"""
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp.name)
+        (self.root / "banner.jpg").write_bytes(b'\0' * (6 * MB))
+        (self.root / "clips").mkdir()
+        (self.root / "clips" / "teaser.mp4").write_bytes(b'\0' * 1000)
+        (self.root / "notes.txt").write_text("hello")
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_findings(self):
+        """Missing, oversized, escaping and unknown-type media; optional ones are warnings"""
+        asts = [
+            campaign("ok", ['facebook'], [("a", "banner.jpg", False), ("b", "clips/teaser.mp4", False)]),
+            campaign("big", ['instagram', 'twitter', 'linkedin'], [("banner", "banner.jpg", False)]),
+            campaign("gone", ['tiktok'], [("lost", "lost.png", False), ("maybe", "clips/maybe.mp4", True),
+                                          ("dir", "clips", False)]),
+            campaign("odd", ['tiktok'], [("up", "../secret.jpg", False), ("notes", "notes.txt", False)]),
+        ]
+        findings = MediaVerifier(self.root).verify(asts)
+        summary = [(f['campaign'], f['item'], f['code'], f['severity']) for f in findings]
+        self.assertEqual(summary, [
+            ("big", "banner", 'M102', 'error'),
+            ("gone", "lost", 'M101', 'error'),
+            ("gone", "maybe", 'M101', 'warning'),
+            ("gone", "dir", 'M101', 'error'),
+            ("odd", "up", 'M103', 'error'),
+            ("odd", "notes", 'M104', 'warning'),
+        ])
+        self.assertIn("twitter (5 MB)", findings[0]['message'])
+        self.assertNotIn("instagram", findings[0]['message'])
+        self.assertEqual(findings[1]['media'], "lost.png")
+        print(f"[OK] {len(findings)} media findings")
+
+    def test_symlinks_leaving_root(self):
+        """Links inside the root that lead outside it are reported, links within it are followed"""
+        with tempfile.TemporaryDirectory() as outside:
+            (Path(outside) / "secret.jpg").write_bytes(b'x')
+            (self.root / "leak.jpg").symlink_to(Path(outside) / "secret.jpg")
+            (self.root / "linked").symlink_to(outside, target_is_directory=True)
+            (self.root / "alias.jpg").symlink_to(self.root / "banner.jpg")
+            asts = [campaign("links", ['facebook'], [("leak", "leak.jpg", False), ("dir", "linked/secret.jpg", False),
+                                                     ("alias", "alias.jpg", False)])]
+            findings = MediaVerifier(self.root).verify(asts)
+        self.assertEqual([(f['item'], f['code']) for f in findings], [("leak", 'M103'), ("dir", 'M103')])
+        print("[OK] Symbolic links out of the root rejected")
+
+    def test_prefetch_releases_lock(self):
+        """Files are looked up without holding the cache lock"""
+        cache = StatCache(workers=1)
+        banner = str(self.root / "banner.jpg")
+        cache.size(banner)
+        started, release = threading.Event(), threading.Event()
+
+        def slow_stat(path):
+            started.set()
+            release.wait(5)
+            return 1
+
+        with mock.patch('media._stat_size', slow_stat):
+            worker = threading.Thread(target=cache.prefetch, args=(["a.jpg", "b.jpg"],))
+            worker.start()
+            self.assertTrue(started.wait(5))
+            self.assertTrue(cache._lock.acquire(timeout=1))
+            cache._lock.release()
+            self.assertEqual(cache.size(banner), 6 * MB)
+            release.set()
+            worker.join()
+        self.assertEqual((cache.size("a.jpg"), cache.stats), (1, 3))
+        print("[OK] Cache readable during lookups")
+
+    def test_example_campaign(self):
+        """The example campaign's banner and video are checked on its four platforms"""
+        with redirect_stdout(io.StringIO()):
+            ast = SocialMediaContentParser(backend='fast').parse_file(EXAMPLES / "complex_campaign.smp")['ast']
+        (self.root / "summer_collection_banner.jpg").write_bytes(b'\0' * 1024)
+        findings = MediaVerifier(self.root).verify([ast])
+        self.assertEqual([(f['item'], f['code']) for f in findings], [("behind_scenes", 'M101')])
+        print("[OK] Example campaign media verified")
+
+    def test_stat_cache(self):
+        """Each distinct file is looked up once across campaigns and verifier runs"""
+        cache = StatCache(workers=8)
+        names = [f"img{n}.jpg" for n in range(200)]
+        for name in names[::2]:
+            (self.root / name).write_bytes(b'x')
+        asts = [campaign(f"c{n}", ['instagram', 'facebook'], [(f"i{k}", names[(n * 7 + k) % 200], k % 3 == 0)
+                                                              for k in range(5)])
+                for n in range(3000)]
+        started = time.perf_counter()
+        findings = MediaVerifier(self.root, cache=cache).verify(asts)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(cache.stats, 200)
+        self.assertEqual(len(findings), 3000 * 5 // 2)
+        self.assertTrue(all(f['code'] == 'M101' for f in findings))
+        # A second verifier sharing the cache does not touch the file system
+        (self.root / names[1]).write_bytes(b'x')
+        self.assertEqual(len(MediaVerifier(self.root, cache=cache).verify(asts)), len(findings))
+        self.assertEqual(cache.stats, 200)
+        cache.clear()
+        self.assertLess(len(MediaVerifier(self.root, cache=cache).verify(asts)), len(findings))
+        self.assertLess(elapsed, 2.0)
+        print(f"[OK] 15000 references in 3000 campaigns verified in {elapsed:.2f}s")
+
+    def test_cli(self):
+        """The CLI reports missing media and exits with 1"""
+        output = io.StringIO()
+        with redirect_stdout(output), redirect_stderr(io.StringIO()):
+            self.assertEqual(main([str(self.root), str(EXAMPLES / "complex_campaign.smp")]), 1)
+        self.assertIn("M101 media 'summer_collection_banner.jpg' not found", output.getvalue())
+        self.assertIn("(behind_scenes)", output.getvalue())
+        print("[OK] CLI reports missing media")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Import és template rendszer tesztek
+"""
+
+import os
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from modules import ModuleLoader
+
+SHARED = '''
+define targeting "young_fashion" {
+    age_range: 18 to 35
+    interests: ["fashion"]
+}
+
+define budget "standard" {
+    total: $1000
+    daily_limit: $50
+}
+
+define post "promo" {
+    text: "Shared promo text"
+    hashtags: ["#promo"]
+    schedule: daily at("12:00")
+}
+'''
+
+CAMPAIGN = '''
+import "shared.smp"
+
+campaign "summer" duration(7 days) {
+    platforms: [instagram]
+    content_types {
+        use "promo"
+        use "promo" as "promo_evening"
+        story "own" {
+            text: "Own story"
+            schedule: at("20:00")
+        }
+    }
+    use targeting "young_fashion" optional
+    use budget "standard"
+}
+'''
+
+
+class TestModuleLoader(unittest.TestCase):
+    """Import/use feloldás és cache tesztek"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.loader = ModuleLoader()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, content):
+        path = self.dir / name
+        path.write_text(content, encoding='utf-8')
+        # Make sure the stamp changes even on coarse mtime filesystems
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + self.loader.parse_count + 1))
+        return path
+
+    def test_resolves_shared_blocks(self):
+        """use references are replaced by the imported blocks"""
+        self.write("shared.smp", SHARED)
+        path = self.write("summer.smp", CAMPAIGN)
+        result = self.loader.load(path)
+        self.assertTrue(result['success'], result['errors'])
+        body = result['ast']['body']
+        self.assertEqual([item['name'] for item in body['content']],
+                         ['promo', 'promo_evening', 'own'])
+        self.assertEqual(body['content'][1]['properties']['text'], "Shared promo text")
+        self.assertEqual(body['targeting']['age_range'], {'min': 18, 'max': 35})
+        self.assertTrue(body['targeting']['optional'])
+        self.assertEqual(body['budget']['total'], 1000)
+        self.assertNotIn('imports', result['ast'])
+        self.assertEqual(result['dependencies'], [str((self.dir / "shared.smp").resolve())])
+        print("[OK] Shared blocks resolved")
+
+    def test_only_changed_module_reparsed(self):
+        """Changing a shared module re-parses it and re-resolves its dependents only"""
+        self.write("shared.smp", SHARED)
+        self.write("other.smp", SHARED.replace('"standard"', '"other"'))
+        summer = self.write("summer.smp", CAMPAIGN)
+        solo = self.write("solo.smp", 'import "other.smp"\n' + CAMPAIGN.replace(
+            'import "shared.smp"', '').replace('"standard"', '"other"').replace(
+            'use targeting "young_fashion" optional', ''))
+        self.assertTrue(self.loader.load(summer)['success'])
+        self.assertTrue(self.loader.load(solo)['success'])
+        self.assertEqual(self.loader.parse_count, 4)
+
+        # Nothing changed: everything comes from the cache
+        first = self.loader.load(summer)
+        self.assertIs(first, self.loader.load(summer))
+        self.assertEqual(self.loader.parse_count, 4)
+
+        self.write("shared.smp", SHARED.replace("$1000", "$2000"))
+        self.assertEqual(self.loader.refresh(), sorted([
+            str((self.dir / "shared.smp").resolve()), str(summer.resolve())]))
+        solo_result = self.loader.load(solo)
+        summer_result = self.loader.load(summer)
+        self.assertEqual(summer_result['ast']['body']['budget']['total'], 2000)
+        self.assertTrue(solo_result['success'])
+        # Only shared.smp was parsed again
+        self.assertEqual(self.loader.parse_count, 5)
+        print("[OK] Only the changed module was re-parsed")
+
+    def test_change_detected_on_load(self):
+        """load() notices a changed import without an explicit refresh()"""
+        self.write("shared.smp", SHARED)
+        path = self.write("summer.smp", CAMPAIGN)
+        self.loader.load(path)
+        self.write("shared.smp", SHARED.replace("Shared promo text", "Updated"))
+        result = self.loader.load(path)
+        self.assertEqual(result['ast']['body']['content'][0]['properties']['text'], "Updated")
+        self.assertEqual(self.loader.dependents(self.dir / "shared.smp"), {str(path.resolve())})
+        print("[OK] Changed import picked up on load")
+
+    def test_import_errors(self):
+        """Missing files, cycles and unknown blocks are reported as ImportError"""
+        path = self.write("summer.smp", CAMPAIGN)
+        result = self.loader.load(path)
+        self.assertFalse(result['success'])
+        self.assertEqual(result['errors'][0]['type'], 'ImportError')
+
+        self.write("shared.smp", 'import "summer.smp"\n' + SHARED.replace('"promo"', '"other"'))
+        self.loader.refresh()
+        result = self.loader.load(path)
+        self.assertIn("Import cycle", result['errors'][0]['message'])
+
+        self.write("shared.smp", SHARED.replace('"promo"', '"other"'))
+        result = self.loader.load(path)
+        self.assertEqual([error['message'] for error in result['errors']],
+                         ["Unknown content block: promo", "Unknown content block: promo"])
+        print("[OK] Import errors reported")
+
+
+    def test_removed_import_edge(self):
+        """A dropped import stops invalidating its former importer"""
+        self.write("shared.smp", SHARED)
+        path = self.write("summer.smp", CAMPAIGN)
+        self.assertTrue(self.loader.load(path)['success'])
+        shared = str((self.dir / "shared.smp").resolve())
+        self.assertEqual(self.loader.dependents(shared), {str(path.resolve())})
+
+        self.write("summer.smp", CAMPAIGN.replace('import "shared.smp"', '').replace(
+            'use "promo"\n', '').replace('use "promo" as "promo_evening"', '').replace(
+            'use targeting "young_fashion" optional', '').replace('use budget "standard"', ''))
+        self.assertEqual(self.loader.refresh(), [str(path.resolve())])
+        self.assertEqual(self.loader.dependents(shared), set())
+        result = self.loader.load(path)
+        self.assertTrue(result['success'], result['errors'])
+        self.write("shared.smp", SHARED.replace("$1000", "$2000"))
+        self.assertEqual(self.loader.refresh(), [shared])
+        self.assertIs(self.loader.load(path), result)
+        print("[OK] Removed import edges dropped")
+
+    def test_diamond_imports(self):
+        """Shared imports in a diamond-shaped graph are collected once per load"""
+        levels = 24
+        self.write(f"l{levels}.smp", SHARED)
+        for level in range(levels - 1, -1, -1):
+            for side in "ab":
+                self.write(f"l{level}{side}.smp", f'import "l{level + 1}.smp"\n')
+            self.write(f"l{level}.smp", f'import "l{level}a.smp"\nimport "l{level}b.smp"\n')
+        path = self.write("summer.smp", CAMPAIGN.replace('"shared.smp"', '"l0.smp"'))
+        calls = []
+        collect = self.loader._collect
+        self.loader._collect = lambda *args: calls.append(args[0]) or collect(*args)
+        result = self.loader.load(path)
+        self.assertTrue(result['success'], result['errors'])
+        self.assertEqual(len(calls), len(set(calls)) + levels)
+        print(f"[OK] {len(set(calls))} modules of a {levels}-level diamond collected once each")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
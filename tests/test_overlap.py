@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Célközönség-átfedés tesztek a Social Media Content Planner-hez
+"""
+
+import random
+import time
+import unittest
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from parser import SocialMediaContentParser
+from overlap import AudienceOverlapIndex
+
+CAMPAIGN_TEMPLATE = '''
+campaign "{name}" duration(7 days) {{
+    platforms: [instagram]
+    content_types {{
+        post "p" {{
+            text: "Hello"
+            schedule: daily at("12:00")
+        }}
+    }}
+    {targeting}
+}}
+'''
+
+
+def make_ast(name, age=None, interests=None, location=None):
+    """Build a campaign AST dict the way the transformer does"""
+    targeting = {}
+    if age:
+        targeting['age_range'] = {'min': age[0], 'max': age[1]}
+    if interests:
+        targeting['interests'] = list(interests)
+    if location:
+        targeting['location'] = list(location)
+    body = {'platforms': ['instagram'], 'content': []}
+    if targeting:
+        body['targeting'] = targeting
+    return {'type': 'campaign', 'name': name, 'duration': {'value': 7, 'unit': 'days'}, 'body': body}
+
+
+def naive_overlap(a, b):
+    """Reference implementation over plain Python sets"""
+    ta = a['body'].get('targeting', {})
+    tb = b['body'].get('targeting', {})
+    ra = ta.get('age_range', {'min': 0, 'max': 130})
+    rb = tb.get('age_range', {'min': 0, 'max': 130})
+    common = min(ra['max'], rb['max']) - max(ra['min'], rb['min']) + 1
+    if common <= 0:
+        return 0.0
+    score = common / min(ra['max'] - ra['min'] + 1, rb['max'] - rb['min'] + 1)
+    for key in ('interests', 'location'):
+        sa = {v.casefold() for v in ta.get(key, [])}
+        sb = {v.casefold() for v in tb.get(key, [])}
+        if sa and sb:
+            score *= len(sa & sb) / min(len(sa), len(sb))
+    return score
+
+
+class TestAudienceOverlap(unittest.TestCase):
+    """Átfedési mátrix tesztek"""
+
+    def test_parsed_campaigns(self):
+        """Overlap is computed from targeting blocks of parsed campaigns"""
+        parser = SocialMediaContentParser()
+        sources = [
+            CAMPAIGN_TEMPLATE.format(name="a", targeting='''targeting {
+                age_range: 18 to 35
+                interests: ["fashion", "music"]
+                location: ["US", "CA"]
+            }'''),
+            CAMPAIGN_TEMPLATE.format(name="b", targeting='''targeting {
+                age_range: 25 to 44
+                interests: ["music"]
+                location: ["us"]
+            }'''),
+            CAMPAIGN_TEMPLATE.format(name="c", targeting='''targeting {
+                age_range: 50 to 65
+            }'''),
+            CAMPAIGN_TEMPLATE.format(name="d", targeting=''),
+        ]
+        asts = [parser.parse_string(source)['ast'] for source in sources]
+        index = AudienceOverlapIndex.from_asts(asts)
+
+        self.assertEqual(index.names, ['a', 'b', 'c', 'd'])
+        self.assertAlmostEqual(index.overlap(0, 1), 11 / 18)
+        self.assertEqual(index.overlap(0, 2), 0.0)
+        # An untargeted campaign competes with everybody
+        self.assertEqual(index.overlap(2, 3), 1.0)
+        self.assertEqual(index.top_k(1, idx=0), [(3, 1.0)])
+
+        matrix = index.matrix()
+        self.assertEqual(matrix[1][0], matrix[0][1])
+        self.assertEqual(matrix[2][2], 1.0)
+        print("[OK] Overlap of parsed campaigns computed")
+
+    def test_matches_naive_pairwise(self):
+        """Bitset engine agrees with a naive nested-loop computation"""
+        rng = random.Random(26)
+        interests = [f"interest_{i}" for i in range(40)]
+        locations = ["US", "CA", "UK", "DE", "FR", "HU", "JP"]
+        asts = []
+        for n in range(150):
+            low = rng.randint(13, 60)
+            asts.append(make_ast(
+                f"c{n}",
+                age=(low, low + rng.randint(0, 30)) if rng.random() < 0.8 else None,
+                interests=rng.sample(interests, rng.randint(1, 4)) if rng.random() < 0.8 else None,
+                location=rng.sample(locations, rng.randint(1, 3)) if rng.random() < 0.7 else None,
+            ))
+        index = AudienceOverlapIndex.from_asts(asts)
+        matrix = index.matrix()
+        for i in range(len(asts)):
+            for j in range(len(asts)):
+                if i != j:
+                    self.assertAlmostEqual(matrix[i][j], naive_overlap(asts[i], asts[j]))
+
+        expected = sorted(
+            ((i, j, naive_overlap(asts[i], asts[j]))
+             for i in range(len(asts)) for j in range(i + 1, len(asts))),
+            key=lambda item: item[2], reverse=True)[:10]
+        self.assertEqual([(i, j, round(s, 9)) for i, j, s in index.top_k(10)],
+                         [(i, j, round(s, 9)) for i, j, s in expected])
+        for idx in (0, 17, 149):
+            competitors = sorted(((j, naive_overlap(asts[idx], asts[j])) for j in range(len(asts)) if j != idx),
+                                 key=lambda item: item[1], reverse=True)
+            competitors = [(j, round(s, 9)) for j, s in competitors if s > 0][:7]
+            self.assertEqual([(j, round(s, 9)) for j, s in index.top_k(7, idx=idx)], competitors)
+        print("[OK] Bitset overlap matches naive computation")
+
+    def test_invalid_age_range(self):
+        """Inverted or out-of-range ages are rejected instead of being clamped or swapped"""
+        index = AudienceOverlapIndex()
+        for age in ((140, 150), (35, 18), (-1, 20)):
+            with self.assertRaises(ValueError):
+                index.add(make_ast("bad", age=age))
+        self.assertEqual(len(index), 0)
+        index.add(make_ast("edge", age=(0, 130)))
+        self.assertEqual(index.age_ranges, [(0, 130)])
+        errors = SocialMediaContentParser(backend='fast').validate_semantic(make_ast("bad", age=(140, 150)))
+        self.assertTrue(any("age_range" in error for error in errors))
+        print("[OK] Invalid age ranges rejected")
+
+    def test_thousands_of_campaigns(self):
+        """Top-k over thousands of sparse campaigns stays fast"""
+        rng = random.Random(7)
+        interests = [f"interest_{i}" for i in range(500)]
+        locations = [f"L{i}" for i in range(50)]
+        asts = []
+        for n in range(3000):
+            low = rng.randint(13, 60)
+            asts.append(make_ast(f"c{n}", age=(low, low + 10),
+                                 interests=rng.sample(interests, 3),
+                                 location=rng.sample(locations, 2)))
+        start = time.perf_counter()
+        index = AudienceOverlapIndex.from_asts(asts)
+        top = index.top_k(5)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(top), 5)
+        self.assertLess(elapsed, 10.0)
+        print(f"[OK] Top-k over 3000 campaigns in {elapsed:.2f}s")
+
+    def test_broad_targeting(self):
+        """Broad targeting, where every campaign is a candidate, is scored without per-pair calls"""
+        rng = random.Random(3)
+        interests = [f"interest_{i}" for i in range(30)]
+        asts = [make_ast(f"c{n}", age=(18, 65), interests=rng.sample(interests, 4),
+                         location=rng.sample(["US", "CA", "UK"], rng.randint(1, 3)))
+                for n in range(3000)]
+        start = time.perf_counter()
+        index = AudienceOverlapIndex.from_asts(asts)
+        top = index.top_k(5)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(top), 5)
+        for i, j, score in top:
+            self.assertAlmostEqual(score, naive_overlap(asts[i], asts[j]))
+        self.assertLess(elapsed, 2.0)
+        print(f"[OK] Top-k over 3000 broadly targeted campaigns in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
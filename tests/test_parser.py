@@ -7,6 +7,8 @@ Minimum 10 teszteset helyes és hibás bemenetekkel
 import unittest
 import sys
 import os
+from datetime import date
+from decimal import Decimal
 from pathlib import Path
 
 # Add src to path so we can import our modules
@@ -354,6 +356,108 @@ class TestSocialMediaContentParser(unittest.TestCase):
         else:
             self.fail("Basic semantic test should parse successfully")
 
+    def test_14b_ast_structure(self):
+        """Test 14b: Transformer produces plain data for every block"""
+        content = '''
+        campaign "ast_test" duration(30 days) {
+            platforms: [instagram, tiktok]
+            
+            content_types {
+                story "bts" {
+                    text: "Behind the scenes"
+                    media: "bts.mp4" optional
+                    schedule: every(2 days) at("14:00") until("2024-07-01")
+                }
+                
+                reel "tips" {
+                    text: "Styling tips"
+                    schedule: weekly on("friday") at("18:00")
+                }
+            }
+            
+            targeting {
+                age_range: 18 to 35
+                location: ["US", "CA"] optional
+            }
+            
+            budget {
+                total: $5000
+                auto_optimize: false
+            }
+        }
+        '''
+        result = self.parser.parse_string(content)
+        self.assertTrue(result['success'], f"Parsing failed: {result['errors']}")
+        ast = result['ast']
+        self.assertEqual(ast['name'], 'ast_test')
+        self.assertEqual(ast['duration'], {'value': 30, 'unit': 'days'})
+        body = ast['body']
+        self.assertEqual(body['platforms'], ['instagram', 'tiktok'])
+        story, reel = body['content']
+        self.assertEqual(story['type'], 'story')
+        self.assertEqual(story['name'], 'bts')
+        self.assertTrue(story['properties']['optional'])
+        self.assertEqual(story['properties']['schedule'], {
+            'type': 'interval',
+            'every': {'value': 2, 'unit': 'days'},
+            'times': [14 * 60],
+            'until': date(2024, 7, 1)
+        })
+        self.assertEqual(reel['properties']['schedule'],
+                         {'type': 'weekly', 'day': 'friday', 'times': [18 * 60]})
+        self.assertEqual(body['targeting']['age_range'], {'min': 18, 'max': 35})
+        self.assertTrue(body['targeting']['location_optional'])
+        self.assertEqual(body['budget']['total'], Decimal('5000'))
+        self.assertFalse(body['budget']['auto_optimize'])
+        print("[OK] Test 14b: AST structure is fully transformed")
+    
+    def test_14c_typed_terminals(self):
+        """Test 14c: Times, dates, money and hashtags are validated by the lexer"""
+        template = '''
+        campaign "typed" duration(7 days) {{
+            platforms: [twitter]
+            
+            content_types {{
+                post "p" {{
+                    text: "Typed values"
+                    hashtags: [{hashtags}]
+                    schedule: {schedule}
+                }}
+            }}
+            
+            budget {{
+                total: {total}
+            }}
+        }}
+        '''
+        result = self.parser.parse_string(template.format(
+            hashtags='"#a", "#b_2"', schedule='every(2 hours) at("09:30") until("17:00")',
+            total='$1250.75'))
+        self.assertTrue(result['success'], f"Parsing failed: {result['errors']}")
+        properties = result['ast']['body']['content'][0]['properties']
+        self.assertEqual(properties['hashtags'], ['#a', '#b_2'])
+        self.assertEqual(properties['schedule']['times'], [9 * 60 + 30])
+        self.assertEqual(properties['schedule']['until'], 17 * 60)
+        self.assertEqual(result['ast']['body']['budget']['total'], Decimal('1250.75'))
+        
+        invalid = [
+            ('"#a"', 'daily at("25:99")', '$100'),
+            ('"#a"', 'daily at("9:00")', '$100'),
+            ('"no_hash"', 'daily at("09:00")', '$100'),
+            ('"#a"', 'daily at("09:00")', '$1.5.0'),
+            ('"#a"', 'every(1 days) until("2024-13-01")', '$100'),
+        ]
+        for hashtags, schedule, total in invalid:
+            result = self.parser.parse_string(template.format(
+                hashtags=hashtags, schedule=schedule, total=total))
+            self.assertFalse(result['success'], f"Should reject {hashtags} {schedule} {total}")
+        
+        result = self.parser.parse_string(template.format(
+            hashtags='"#a"', schedule='every(1 days) until("2024-02-30")', total='$100'))
+        self.assertFalse(result['success'])
+        self.assertEqual(result['errors'][0]['type'], 'ValueError')
+        print("[OK] Test 14c: Typed terminals validated and converted")
+
 class TestParserFileHandling(unittest.TestCase):
     """Test file I/O functionality"""
     
@@ -371,6 +475,35 @@ class TestParserFileHandling(unittest.TestCase):
         else:
             self.skipTest(f"Example file not found: {file_path}")
 
+    def test_16_parse_files_quietly(self):
+        """Test 16: parse_files yields every path; unreadable files become IOError results"""
+        import io
+        from contextlib import redirect_stdout
+        parser = SocialMediaContentParser(backend='fast', verbose=False)
+        missing = self.examples_dir / "missing.smp"
+        output = io.StringIO()
+        with redirect_stdout(output):
+            results = list(parser.parse_files([self.examples_dir / "basic_campaign.smp", missing]))
+        self.assertEqual(output.getvalue(), "")
+        self.assertEqual([path for path, _ in results], [self.examples_dir / "basic_campaign.smp", missing])
+        self.assertTrue(results[0][1]['success'])
+        self.assertFalse(results[1][1]['success'])
+        self.assertEqual(results[1][1]['errors'][0]['type'], 'IOError')
+        print("[OK] Test 16: Files parsed without progress output")
+
+    def test_17_import_as_package(self):
+        """Test 17: The README import, from src.parser, works from the project root"""
+        import subprocess
+        code = ("from src.parser import SocialMediaContentParser, print_failure\n"
+                "for backend in ('lark', 'fast'):\n"
+                "    parser = SocialMediaContentParser(backend=backend, verbose=False)\n"
+                "    assert parser.parse_file('examples/basic_campaign.smp')['success']\n"
+                "    assert not parser.parse_string('campaign')['success']")
+        run = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                             cwd=Path(__file__).parent.parent)
+        self.assertEqual(run.returncode, 0, run.stderr)
+        print("[OK] Test 17: Importable as src.parser")
+
 def run_test_suite():
     """Run the complete test suite with detailed output"""
     print("="*60)
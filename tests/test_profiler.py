@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Nyelvtan-profilozó tesztek
+"""
+
+import io
+import json
+import unittest
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from lark import Token, Tree
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from profiler import GrammarProfiler, format_report, main
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+MODULE = '''
+define targeting "young" {
+    age_range: 18 to 25
+}
+'''
+
+
+class TestGrammarProfiler(unittest.TestCase):
+    """Szabályonkénti kétértelműség- és költségprofil"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.profiler = GrammarProfiler()
+        for path in sorted(EXAMPLES.glob("*.smp")):
+            cls.profiler.profile_file(path)
+        cls.profiler.profile_source(MODULE, "module.smp")
+        cls.report = cls.profiler.report()
+
+    def test_rule_counts_and_costs(self):
+        """Node counts, isolated parse times and transformer times per rule"""
+        rules = self.report['rules']
+        self.assertEqual(self.report['files'], 4)
+        self.assertEqual(self.report['parsed'], 3)
+        self.assertEqual(rules['content_item']['nodes'], 4)
+        self.assertEqual(rules['platform_name']['nodes'], 6)
+        self.assertEqual(rules['targeting_template']['nodes'], 1)
+        self.assertEqual(rules['platform_name']['parse_samples'], 6)
+        self.assertGreater(rules['campaign_body']['parse_seconds'], rules['platform_name']['parse_seconds'])
+        self.assertGreater(rules['content_item']['transform_seconds'], 0)
+        self.assertEqual(self.profiler.files[-1]['start'], 'module')
+        print("[OK] Per-rule counts and costs collected")
+
+    def test_no_ambiguity_or_raw_trees(self):
+        """The grammar and transformer leave no _ambig nodes or raw Trees on the corpus"""
+        self.assertEqual(self.report['ambiguities'], [])
+        self.assertEqual(self.report['raw_trees'], [])
+        self.assertTrue(self.report['lalr']['builds'])
+        self.assertEqual(self.report['lalr']['same'], 3)
+        self.assertEqual(self.report['lalr']['mismatches'], [])
+        self.assertEqual(len(self.report['errors']), 1)
+        print("[OK] No ambiguity, raw trees or LALR mismatches")
+
+    def test_transform_errors_recorded(self):
+        """A value the transformer rejects is recorded and the corpus run goes on"""
+        profiler = GrammarProfiler(isolate=False, lalr=False)
+        source = (EXAMPLES / "basic_campaign.smp").read_text(encoding='utf-8')
+        invalid = source.replace('schedule: daily', 'schedule: every(1 days) until("2024-02-30") //', 1)
+        self.assertNotEqual(invalid, source)
+        profiler.profile_source(invalid, "invalid_date.smp")
+        profiler.profile_source(source, "basic_campaign.smp")
+        report = profiler.report()
+        self.assertEqual((report['files'], report['parsed']), (2, 1))
+        self.assertEqual([error['file'] for error in report['errors']], ["invalid_date.smp"])
+        self.assertIn("VisitError", report['errors'][0]['error'])
+        self.assertIn("ERROR invalid_date.smp", format_report(report))
+        print("[OK] Transformer errors recorded per file")
+
+    def test_detects_ambiguity_and_leaks(self):
+        """_ambig nodes and leaked Trees/Tokens are attributed to their rules"""
+        profiler = GrammarProfiler(isolate=False, lalr=False)
+        tree = Tree('start', [Tree('_ambig', [Tree('daily_schedule', []), Tree('interval_schedule', [])])])
+        profiler._walk(tree, '', 'synthetic', {'nodes': 0})
+        profiler._find_raw({'body': {'content': [Tree('content_item', [])]},
+                            'name': Token('STRING', '"x"')}, 'synthetic', ())
+        report = profiler.report()
+        self.assertEqual(report['ambiguities'][0]['parent'], 'start')
+        self.assertEqual(report['ambiguities'][0]['alternatives'], ['daily_schedule', 'interval_schedule'])
+        self.assertEqual(report['rules']['daily_schedule']['ambiguous'], 1)
+        self.assertEqual([(raw['rule'], raw['path']) for raw in report['raw_trees']],
+                         [('content_item', ['body', 'content', 0]), ('Token(STRING)', ['name'])])
+        text = format_report(report)
+        self.assertIn("AMBIGUOUS synthetic", text)
+        self.assertIn("RAW TREE synthetic", text)
+        print("[OK] Ambiguities and leaks reported")
+
+    def test_cli(self):
+        """The CLI prints a table or JSON and exits 0 for a clean corpus"""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            status = main([str(EXAMPLES / "basic_campaign.smp"), "--json", "--no-isolate"])
+        self.assertEqual(status, 0)
+        report = json.loads(output.getvalue())
+        self.assertEqual(report['rules']['campaign_definition']['nodes'], 1)
+        with redirect_stdout(io.StringIO()) as text:
+            main([str(EXAMPLES), "--top", "3"])
+        self.assertIn("LALR: builds", text.getvalue())
+        print("[OK] Profiler CLI works")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Ütemezés-kibontás tesztek
+"""
+
+import unittest
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from parser import SocialMediaContentParser
+from schedule import expand_schedule, expand_campaign
+
+START = datetime(2024, 7, 1, 8, 0)  # a Monday
+
+
+def hm(text):
+    hours, minutes = text.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+class TestScheduleExpansion(unittest.TestCase):
+    """Ütemezési formák kibontása"""
+
+    def expand(self, schedule, days=7):
+        end = datetime(2024, 7, 1 + days, 8, 0)
+        return list(expand_schedule(schedule, START, end))
+
+    def test_daily(self):
+        """daily at(...) posts every day inside the window"""
+        moments = self.expand({'type': 'daily', 'times': [hm("07:00"), hm("12:00")]}, days=2)
+        self.assertEqual(moments, [
+            datetime(2024, 7, 1, 12, 0),
+            datetime(2024, 7, 2, 7, 0), datetime(2024, 7, 2, 12, 0),
+            datetime(2024, 7, 3, 7, 0),
+        ])
+        print("[OK] Daily schedule expanded")
+
+    def test_weekly(self):
+        """weekly on(day) posts once a week on that day"""
+        moments = self.expand({'type': 'weekly', 'day': 'Friday', 'times': [hm("18:00")]}, days=14)
+        self.assertEqual(moments, [datetime(2024, 7, 5, 18, 0), datetime(2024, 7, 12, 18, 0)])
+        print("[OK] Weekly schedule expanded")
+
+    def test_at(self):
+        """at(...) posts once, the first time the clock reaches each time"""
+        moments = self.expand({'type': 'at', 'times': [hm("07:30"), hm("09:00")]})
+        self.assertEqual(moments, [datetime(2024, 7, 1, 9, 0), datetime(2024, 7, 2, 7, 30)])
+        print("[OK] One-shot schedule expanded")
+
+    def test_interval(self):
+        """every(N unit) with anchors, until times and until dates"""
+        hourly = self.expand({'type': 'interval', 'every': {'value': 2, 'unit': 'hours'},
+                              'times': [hm("09:00")], 'until': hm("13:00")}, days=1)
+        self.assertEqual(hourly, [datetime(2024, 7, 1, 9, 0), datetime(2024, 7, 1, 11, 0),
+                                  datetime(2024, 7, 1, 13, 0)])
+        every_other_day = self.expand({'type': 'interval', 'every': {'value': 2, 'unit': 'days'},
+                                       'times': [hm("14:00")], 'until': date(2024, 7, 5)})
+        self.assertEqual(every_other_day, [datetime(2024, 7, 1, 14, 0), datetime(2024, 7, 3, 14, 0),
+                                           datetime(2024, 7, 5, 14, 0)])
+        continuous = self.expand({'type': 'interval', 'every': {'value': 90, 'unit': 'minutes'},
+                                  'times': [], 'until': None}, days=1)
+        self.assertEqual(len(continuous), 16)
+        self.assertEqual(continuous[1], datetime(2024, 7, 1, 9, 30))
+        print("[OK] Interval schedules expanded")
+
+    def test_campaign_merge(self):
+        """expand_campaign merges all content items in time order"""
+        parser = SocialMediaContentParser()
+        ast = parser.parse_file(str(Path(__file__).parent.parent / "examples" / "complex_campaign.smp"))['ast']
+        moments = list(expand_campaign(ast, START))
+        self.assertEqual([m for m, _ in moments], sorted(m for m, _ in moments))
+        names = [item['name'] for _, item in moments]
+        self.assertEqual(names.count('product_showcase'), 90)
+        self.assertEqual(names.count('behind_scenes'), 15)
+        self.assertEqual(names.count('styling_tips'), 4)
+        print("[OK] Campaign schedules merged")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Szilánkolt ellenőrzés tesztek - particionálás, folytatás és összefésülés
+"""
+
+import io
+import json
+import random
+import tempfile
+import unittest
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from shards import ShardWorker, main, merge_reports, partition
+from test_fastparser import random_source
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+class TestShards(unittest.TestCase):
+    """Manifest szilánkokra bontása, ellenőrzőpontok és egyesített jelentés"""
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp.name)
+        corpus = self.root / "corpus"
+        corpus.mkdir()
+        rng = random.Random(40)
+        self.manifest = []
+        for n in range(60):
+            path = corpus / f"c{n:02d}.smp"
+            source = random_source(rng)
+            if n % 10 == 3:
+                source = source.replace("campaign", "campain", 1)
+            path.write_text(source, encoding='utf-8')
+            self.manifest.append(str(path))
+        self.manifest.append(str(corpus / "missing.smp"))
+        self.manifest.append(str(EXAMPLES / "complex_campaign.smp"))
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def run_all(self, out_dir, shards, **options):
+        for shard in range(shards):
+            ShardWorker(self.manifest, shard, shards, out_dir, **options).run()
+        return merge_reports(out_dir)
+
+    def test_partition(self):
+        """Every file lands in exactly one shard, independent of the other files"""
+        parts = partition(self.manifest, 4)
+        self.assertEqual(sorted(sum(parts, [])), sorted(self.manifest))
+        self.assertTrue(all(parts))
+        self.assertEqual(partition(self.manifest[:10], 4)[0], [p for p in parts[0] if p in self.manifest[:10]])
+        print("[OK] Manifest partitioned into 4 shards")
+
+    def test_merged_report(self):
+        """Merged shard outputs equal a single-shard run"""
+        single = self.run_all(self.root / "one", 1)
+        sharded = self.run_all(self.root / "four", 4, checkpoint_every=5)
+        self.assertTrue(single['complete'])
+        self.assertEqual(single['files'], len(self.manifest))
+        # 6 syntax errors, the missing file and 6 campaigns with infeasible budgets
+        self.assertEqual(sum(bool(record['errors']) for record in single['failures']), 7)
+        self.assertEqual(single['failed'], 13)
+        self.assertTrue(all(record['findings'] for record in single['failures'] if not record['errors']))
+        self.assertEqual({key: value for key, value in sharded.items() if key != 'shards'},
+                         {key: value for key, value in single.items() if key != 'shards'})
+        print(f"[OK] 4 shards merge to the single-run report ({single['failed']} failures)")
+
+    def test_resume(self):
+        """An interrupted shard resumes after its last checkpoint without duplicates"""
+        out_dir = self.root / "resume"
+        expected = self.run_all(self.root / "reference", 2)
+        worker = ShardWorker(self.manifest, 0, 2, out_dir, checkpoint_every=4)
+        checkpoint = worker.run(max_files=10)
+        self.assertEqual(checkpoint['done'], 10)
+        self.assertFalse(checkpoint['complete'])
+        # A crash after the checkpoint leaves a torn record behind
+        with open(worker.results_path, 'ab') as f:
+            f.write(b'{"path": "torn')
+        partial = merge_reports(out_dir)
+        self.assertEqual((partial['files'], partial['missing'], partial['incomplete']), (10, [1], [0]))
+        self.assertFalse(partial['complete'])
+
+        resumed = ShardWorker(self.manifest, 0, 2, out_dir, checkpoint_every=4)
+        resumed.check_batch = lambda paths, check=resumed.check_batch: self.assertNotIn(
+            worker.paths[0], paths) or check(paths)
+        self.assertTrue(resumed.run()['complete'])
+        ShardWorker(self.manifest, 1, 2, out_dir).run()
+        self.assertEqual(merge_reports(out_dir), expected)
+        lines = worker.results_path.read_text(encoding='utf-8').splitlines()
+        self.assertEqual(len(lines), len(worker.paths))
+        self.assertEqual([json.loads(line)['path'] for line in lines], worker.paths)
+        print("[OK] Interrupted shard resumed from its checkpoint")
+
+    def test_missing_shards(self):
+        """Shards that wrote nothing are detected, also in an empty or absent directory"""
+        for out_dir in (self.root / "absent", self.root / "empty"):
+            report = merge_reports(out_dir)
+            self.assertEqual((report['shards'], report['complete']), (0, False))
+        (self.root / "empty").mkdir()
+        report = merge_reports(self.root / "empty", shards=3)
+        self.assertEqual((report['missing'], report['complete']), ([0, 1, 2], False))
+
+        out_dir = self.root / "started"
+        ShardWorker(self.manifest, 1, 3, out_dir).run(max_files=0)
+        report = merge_reports(out_dir)
+        self.assertEqual((report['shards'], report['missing'], report['incomplete']), (3, [0, 2], [1]))
+        with self.assertRaises(ValueError):
+            merge_reports(out_dir, shards=2)
+        with redirect_stdout(io.StringIO()) as output:
+            self.assertEqual(main(['merge', str(self.root / "absent")]), 1)
+            self.assertEqual(main(['merge', str(self.root / "empty"), '--shards', '3']), 1)
+        self.assertIn("INCOMPLETE: no shard checkpoints found", output.getvalue())
+        self.assertIn("INCOMPLETE: missing shards [0, 1, 2]", output.getvalue())
+        print("[OK] Missing shards reported")
+
+    def test_changed_manifest(self):
+        """A checkpoint of another manifest is not resumed"""
+        out_dir = self.root / "changed"
+        ShardWorker(self.manifest, 0, 1, out_dir).run(max_files=3)
+        with self.assertRaises(ValueError):
+            ShardWorker(self.manifest[1:], 0, 1, out_dir).run()
+        print("[OK] Changed manifest rejected")
+
+    def test_interrupts_by_default(self):
+        """Workers interrupt over-budget parses unless --no-interrupt is given"""
+        from unittest import mock
+        self.assertTrue(ShardWorker(self.manifest, 0, 1, self.root / "default").limits.interrupt)
+        manifest = self.root / "manifest.txt"
+        manifest.write_text("\n".join(self.manifest[:2]), encoding='utf-8')
+        with mock.patch('shards.ShardWorker', wraps=ShardWorker) as worker, redirect_stdout(io.StringIO()):
+            main(['run', str(manifest), str(self.root / "plain"), '--no-interrupt'])
+        self.assertFalse(worker.call_args.kwargs['limits'].interrupt)
+        print("[OK] Shard workers interrupt by default")
+
+    def test_cli(self):
+        """run and merge subcommands"""
+        manifest = self.root / "manifest.txt"
+        manifest.write_text("# nightly\n" + "\n".join(self.manifest[:5]) + "\n\n", encoding='utf-8')
+        out_dir = str(self.root / "cli")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            for shard in ('0', '1'):
+                self.assertEqual(main(['run', str(manifest), out_dir, '--shard', shard, '--shards', '2']), 0)
+            status = main(['merge', out_dir])
+        self.assertEqual(status, 1)
+        self.assertIn("5 files checked in 2 shard(s): 4 ok, 1 failed", output.getvalue())
+        self.assertIn("[FAILED] " + self.manifest[3], output.getvalue())
+        print("[OK] CLI runs shards and merges them")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
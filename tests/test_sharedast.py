@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Megosztott memóriás AST-átadás tesztek - kódolás, lusta nézetek és folyamatkészlet
+"""
+
+import io
+import random
+import tempfile
+import unittest
+import sys
+from contextlib import redirect_stdout
+from datetime import date
+from decimal import Decimal
+from multiprocessing import shared_memory
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from parser import SocialMediaContentParser
+import sharedast
+from sharedast import EncodedBatch, LazyDict, LazyList, SharedParseResults, encode, parse_shared
+from test_fastparser import random_source
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+class TestSharedAST(unittest.TestCase):
+    """Tömör kódolás, zéró-másolásos olvasás és több folyamat"""
+
+    @classmethod
+    def setUpClass(cls):
+        with redirect_stdout(io.StringIO()):
+            cls.parser = SocialMediaContentParser(backend='fast')
+        rng = random.Random(43)
+        cls.asts = []
+        for n in range(100):
+            start = 'module' if n % 4 == 0 else 'start'
+            with redirect_stdout(io.StringIO()):
+                cls.asts.append(cls.parser.parse_string(random_source(rng, start == 'module'), start=start)['ast'])
+
+    def test_round_trip(self):
+        """Decoding gives back equal ASTs, including dates, amounts and None"""
+        odd = {'until': date(2024, 2, 29), 'total': Decimal('12.50'), 'big': 2 ** 40, 'negative': -1,
+               'flags': [True, False, None], 'text': "árvíztűrő ☃", 'empty': {}, 'none': []}
+        values = self.asts + [odd, None]
+        batch = EncodedBatch(encode(values))
+        self.assertEqual(len(batch), len(values))
+        for index, value in enumerate(values):
+            self.assertEqual(batch.decode(index), value)
+        decoded = batch.decode(len(values) - 2)
+        self.assertIsInstance(decoded['total'], Decimal)
+        self.assertEqual(str(decoded['total']), "12.50")
+        self.assertIsNone(batch[-1])
+        self.assertEqual(batch.decode(-len(values)), values[0])
+        for index in (len(values), -len(values) - 1):
+            with self.assertRaises(IndexError):
+                batch.decode(index)
+        with self.assertRaises(IndexError):
+            EncodedBatch(encode([])).decode(0)
+        with self.assertRaises(TypeError):
+            encode([{'value': object()}])
+        print(f"[OK] {len(values)} values round-trip")
+
+    def test_lazy_views(self):
+        """Lazy views read single fields from the buffer and compare equal to the AST"""
+        batch = EncodedBatch(encode(self.asts))
+        for index, ast in enumerate(self.asts):
+            view = batch[index]
+            self.assertIsInstance(view, LazyDict)
+            self.assertEqual(view, ast)
+            self.assertEqual(view.decode(), ast)
+            self.assertEqual(sorted(view), sorted(ast))
+        campaign = next(ast for ast in self.asts if ast.get('type') == 'campaign')
+        view = batch[self.asts.index(campaign)]
+        self.assertIsInstance(view['body']['platforms'], LazyList)
+        self.assertEqual(view['body']['platforms'][-1], campaign['body']['platforms'][-1])
+        self.assertEqual(view['body']['content'][:1], campaign['body']['content'][:1])
+        self.assertEqual(view.get('missing', 'default'), 'default')
+        with self.assertRaises(KeyError):
+            view['missing']
+        batch.release()
+        print("[OK] Lazy views match the ASTs")
+
+    def test_parse_shared(self):
+        """A process pool returns the same results through shared memory and frees it"""
+        with tempfile.TemporaryDirectory() as temp:
+            paths = []
+            rng = random.Random(7)
+            for n in range(40):
+                path = Path(temp) / f"c{n}.smp"
+                source = random_source(rng)
+                path.write_text(source if n % 9 else source[:-3], encoding='utf-8')
+                paths.append(path)
+            paths.append(EXAMPLES / "missing.smp")
+            with redirect_stdout(io.StringIO()):
+                expected = [self.parser.parse_file(path) if path.exists() else None for path in paths]
+            with parse_shared(paths, processes=2, chunk_size=8) as results:
+                names = results.names
+                records = list(results)
+                self.assertEqual([record['path'] for record in records], [str(path) for path in paths])
+                for record, result in zip(records, expected):
+                    if result is None:
+                        self.assertEqual(record['errors'][0]['type'], 'IOError')
+                        continue
+                    self.assertEqual(record['success'], result['success'])
+                    self.assertEqual(record['errors'], result['errors'])
+                    self.assertEqual(record['ast'].decode() if record['ast'] else None, result['ast'])
+        self.assertEqual(len(names), 6)
+        for name in names:
+            with self.assertRaises(FileNotFoundError):
+                shared_memory.SharedMemory(name=name)
+        print(f"[OK] {len(paths)} files parsed in 2 processes through {len(names)} segments")
+
+    def test_failures_free_memory(self):
+        """A failed chunk leaves no segment; a failed attach frees every segment"""
+        class BrokenParser:
+            def parse_files(self, paths, start='start'):
+                raise RuntimeError("disk gone")
+
+        example = [str(EXAMPLES / "basic_campaign.smp")]
+        sharedast._WORKER['parser'] = SocialMediaContentParser(backend='fast', verbose=False)
+        try:
+            chunks = [sharedast._parse_chunk(example, 'start') for _ in range(3)]
+            sharedast._WORKER['parser'] = BrokenParser()
+            failed = sharedast._parse_chunk(['a.smp', 'b.smp'], 'start')
+        finally:
+            sharedast._WORKER.clear()
+        self.assertIsNone(failed[0])
+        self.assertEqual([status[:2] for status in failed[1]], [('a.smp', False), ('b.smp', False)])
+
+        with SharedParseResults([chunks[0], failed]) as results:
+            records = list(results)
+            self.assertEqual(records[0]['ast']['name'], 'basic_promo')
+            self.assertIsNone(records[1]['ast'])
+            self.assertEqual(records[2]['errors'][0]['message'], "Unexpected error: RuntimeError: disk gone")
+
+        with self.assertRaises(FileNotFoundError):
+            SharedParseResults([chunks[1], ('smp_no_such_segment', failed[1]), chunks[2]])
+        for name, _ in chunks:
+            with self.assertRaises(FileNotFoundError):
+                shared_memory.SharedMemory(name=name)
+        print("[OK] Failed chunks and attaches leave no shared memory behind")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
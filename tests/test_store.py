@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+SQLite kampánytár tesztek
+"""
+
+import copy
+import io
+import tempfile
+import time
+import unittest
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from parser import SocialMediaContentParser
+from store import CampaignStore, content_hash, main
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+
+class TestCampaignStore(unittest.TestCase):
+    """Normalizált kampánytár"""
+
+    @classmethod
+    def setUpClass(cls):
+        parser = SocialMediaContentParser(backend='fast')
+        with redirect_stdout(io.StringIO()):
+            cls.results = parser.parse_many([(EXAMPLES / name).read_text(encoding='utf-8') for name in
+                                             ("basic_campaign.smp", "complex_campaign.smp", "error_examples.smp")])
+
+    def setUp(self):
+        self.store = CampaignStore()
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_ingest_and_skip_unchanged(self):
+        """A batch is stored once; unchanged campaigns are skipped on re-ingest"""
+        self.assertEqual(self.store.ingest(self.results),
+                         {'inserted': 2, 'updated': 0, 'skipped': 0, 'failed': 1, 'conflicts': 0})
+        self.assertEqual(self.store.ingest(self.results),
+                         {'inserted': 0, 'updated': 0, 'skipped': 2, 'failed': 1, 'conflicts': 0})
+        self.assertEqual(len(self.store), 2)
+        changed = copy.deepcopy(self.results[1]['ast'])
+        changed['body']['content'][0]['properties']['hashtags'].append("#new")
+        self.assertNotEqual(content_hash(changed), content_hash(self.results[1]['ast']))
+        self.assertEqual(self.store.ingest([changed])['updated'], 1)
+        self.assertEqual(self.store.campaigns(hashtag="#new"), ['summer_collection_2024'])
+        counts = {table: self.store.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ('content_items', 'schedules', 'schedule_times', 'hashtags', 'targeting_values')}
+        self.assertEqual(counts, {'content_items': 4, 'schedules': 4, 'schedule_times': 6,
+                                  'hashtags': 10, 'targeting_values': 6})
+        print("[OK] Bulk ingest skips unchanged campaigns")
+
+    def test_same_name_in_different_sources(self):
+        """Equally named campaigns of different files are kept apart; clashes in a batch are rejected"""
+        original = self.results[1]['ast']
+        other = copy.deepcopy(original)
+        other['body']['content'][0]['properties']['hashtags'] = ["#other"]
+        self.assertEqual(self.store.ingest([original, other], ['a.smp', 'b.smp'])['inserted'], 2)
+        self.assertEqual(self.store.campaigns(hashtag="#other"), ['summer_collection_2024'])
+        self.assertEqual(self.store.campaigns(hashtag="#summer"), ['summer_collection_2024'] * 2)
+        self.assertEqual(len(self.store), 2)
+
+        changed = copy.deepcopy(other)
+        changed['body']['content'][0]['properties']['hashtags'] = ["#changed"]
+        stats = self.store.ingest([original, changed], ['a.smp', 'b.smp'])
+        self.assertEqual((stats['skipped'], stats['updated']), (1, 1))
+        self.assertEqual(self.store.campaigns(hashtag="#other"), [])
+        self.assertEqual(len(self.store), 2)
+
+        stats = self.store.ingest([original, other])
+        self.assertEqual((stats['inserted'], stats['conflicts']), (1, 1))
+        self.assertEqual(len(self.store), 3)
+        self.assertTrue(self.store.remove('summer_collection_2024', 'b.smp'))
+        self.assertEqual(self.store.campaigns(hashtag="#changed"), [])
+        self.assertEqual(len(self.store), 2)
+        print("[OK] Campaigns keyed by source and name")
+
+    def test_queries(self):
+        """Platform, hashtag and time-window queries, alone and combined"""
+        self.store.ingest(self.results)
+        self.assertEqual(self.store.campaigns(platform='instagram'), ['basic_promo', 'summer_collection_2024'])
+        self.assertEqual(self.store.campaigns(platform='tiktok'), ['summer_collection_2024'])
+        self.assertEqual(self.store.campaigns(hashtag='#summer', between=('18:00', '23:59')),
+                         ['summer_collection_2024'])
+        self.assertEqual(self.store.campaigns(platform='facebook', between=(11 * 60, 13 * 60)), ['basic_promo'])
+        self.assertEqual(self.store.content(hashtag='#fashion'), [
+            {'campaign': 'summer_collection_2024', 'item': 'product_showcase', 'type': 'post'},
+            {'campaign': 'summer_collection_2024', 'item': 'styling_tips', 'type': 'reel'}])
+        self.assertEqual(self.store.content(platform='twitter', between=('14:00', '18:00')), [
+            {'campaign': 'summer_collection_2024', 'item': 'product_showcase', 'type': 'post', 'time': '15:00'},
+            {'campaign': 'summer_collection_2024', 'item': 'behind_scenes', 'type': 'story', 'time': '14:00'},
+            {'campaign': 'summer_collection_2024', 'item': 'styling_tips', 'type': 'reel', 'time': '18:00'}])
+        self.assertTrue(self.store.remove('basic_promo'))
+        self.assertEqual(self.store.campaigns(platform='facebook'), ['summer_collection_2024'])
+        self.assertEqual(self.store.connection.execute("SELECT COUNT(*) FROM hashtags").fetchone()[0], 7)
+        print("[OK] Indexed queries answered")
+
+    def test_indexes_used(self):
+        """Lookups by hashtag, platform and time use their indexes"""
+        plans = [
+            self.store.explain("SELECT content_id FROM hashtags WHERE hashtag = ?", ('#x',)),
+            self.store.explain("SELECT campaign_id FROM platforms WHERE platform = ?", ('x',)),
+            self.store.explain("SELECT schedule_id FROM schedule_times WHERE minutes BETWEEN ? AND ?", (1, 2)),
+        ]
+        for plan, index in zip(plans, ('hashtags_by_tag', 'platforms_by_platform', 'times_by_minutes')):
+            self.assertTrue(any(index in line for line in plan), plan)
+        print("[OK] Queries use indexes")
+
+    def test_persistent_bulk(self):
+        """Thousands of campaigns are ingested in one transaction and persist on disk"""
+        template = self.results[1]['ast']
+        batch = []
+        for n in range(2000):
+            ast = copy.deepcopy(template)
+            ast['name'] = f"campaign_{n}"
+            ast['body']['content'][0]['properties']['hashtags'] = [f"#tag{n % 50}"]
+            batch.append(ast)
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(Path(directory) / "campaigns.sqlite")
+            started = time.perf_counter()
+            with CampaignStore(path) as store:
+                self.assertEqual(store.ingest(batch)['inserted'], 2000)
+            elapsed = time.perf_counter() - started
+            with CampaignStore(path) as store:
+                self.assertEqual(len(store), 2000)
+                self.assertEqual(len(store.campaigns(hashtag="#tag7")), 40)
+                started = time.perf_counter()
+                self.assertEqual(store.ingest(batch)['skipped'], 2000)
+                skipped = time.perf_counter() - started
+        self.assertLess(elapsed, 30)
+        print(f"[OK] 2000 campaigns ingested in {elapsed:.2f}s, re-ingest skipped in {skipped:.2f}s")
+
+    def test_cli(self):
+        """ingest and query subcommands"""
+        with tempfile.TemporaryDirectory() as directory:
+            database = str(Path(directory) / "db.sqlite")
+            with redirect_stdout(io.StringIO()) as output:
+                self.assertEqual(main([database, 'ingest', str(EXAMPLES / "basic_campaign.smp")]), 0)
+                self.assertEqual(main([database, 'query', '--hashtag', '#promo']), 0)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], "1 inserted, 0 updated, 0 skipped, 0 failed, 0 conflicts")
+        self.assertEqual(lines[1], "basic_promo\tdaily_update\tpost")
+        print("[OK] Store CLI works")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
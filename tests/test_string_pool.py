@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+String pool tesztek a Social Media Content Planner parser-hez
+Memória- és összehasonlítás-mérés szintetikus korpuszon
+"""
+
+import random
+import time
+import tracemalloc
+import unittest
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from parser import SocialMediaContentParser, SocialMediaContentTransformer, StringPool
+
+PLATFORMS = ["instagram", "facebook", "twitter", "tiktok", "linkedin", "youtube"]
+CONTENT_TYPES = ["post", "story", "reel", "video", "image"]
+HASHTAGS = [f"#tag{i}" for i in range(30)]
+TIMES = [f"{h:02d}:{m:02d}" for h in range(8, 22) for m in (0, 30)]
+
+
+def synthetic_campaign(rng, n):
+    """Generate one campaign with repeated platforms, hashtags and times"""
+    items = []
+    for i in range(8):
+        hashtags = ", ".join(f'"{h}"' for h in rng.sample(HASHTAGS, 4))
+        times = ", ".join(f'"{t}"' for t in rng.sample(TIMES, 3))
+        items.append(f'''
+        {rng.choice(CONTENT_TYPES)} "item_{i}" {{
+            text: "Content {n}-{i}"
+            hashtags: [{hashtags}]
+            schedule: daily at({times})
+        }}''')
+    platforms = ", ".join(rng.sample(PLATFORMS, 3))
+    return f'''
+    campaign "campaign_{n}" duration(30 days) {{
+        platforms: [{platforms}]
+        content_types {{{"".join(items)}
+        }}
+    }}
+    '''
+
+
+def collect_literals(ast):
+    """All pooled-kind string values of an AST"""
+    values = list(ast['body']['platforms'])
+    for item in ast['body']['content']:
+        values.append(item['type'])
+        values.extend(item['properties'].get('hashtags', []))
+    return values
+
+
+class TestStringPool(unittest.TestCase):
+    """String interning tesztek"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.parser = SocialMediaContentParser()
+        rng = random.Random(27)
+        cls.trees = [cls.parser.parser.parse(synthetic_campaign(rng, n), start='start') for n in range(60)]
+
+    def test_pool_basics(self):
+        """Equal values map to one shared instance"""
+        pool = StringPool()
+        a = pool.intern("".join(["#sum", "mer"]))
+        b = pool.intern("".join(["#su", "mmer"]))
+        self.assertIs(a, b)
+        self.assertEqual(len(pool), 1)
+        self.assertEqual((pool.hits, pool.misses), (1, 1))
+        self.assertIn("#summer", pool)
+        print("[OK] String pool returns shared instances")
+
+    def test_batch_shares_literals(self):
+        """parse_many shares hashtags and times across campaigns"""
+        parser = SocialMediaContentParser()
+        results = parser.parse_many([
+            synthetic_campaign(random.Random(1), 0),
+            synthetic_campaign(random.Random(1), 1),
+        ])
+        first = collect_literals(results[0]['ast'])
+        second = collect_literals(results[1]['ast'])
+        self.assertEqual(first, second)
+        for a, b in zip(first, second):
+            self.assertIs(a, b)
+        self.assertGreater(parser.string_pool.hits, 0)
+        # Minute values are plain ints and stay out of the pool
+        self.assertTrue(all(isinstance(value, str) for value in parser.string_pool._strings))
+        size = len(parser.string_pool)
+        parser.parse_many([synthetic_campaign(random.Random(2), 2)])
+        self.assertLessEqual(len(parser.string_pool), size)
+        shared = StringPool()
+        SocialMediaContentParser(string_pool=shared, backend='fast').parse_many([synthetic_campaign(random.Random(1), 0)])
+        kept = len(shared)
+        SocialMediaContentParser(string_pool=shared, backend='fast').parse_many([synthetic_campaign(random.Random(1), 0)])
+        self.assertEqual(len(shared), kept)
+        self.assertGreater(kept, 0)
+        print("[OK] Batch shares literal instances")
+
+    def test_memory_saved(self):
+        """Interned ASTs retain less memory than un-interned ones"""
+        def retained(transformer):
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            asts = [transformer.transform(tree) for tree in self.trees]
+            size = sum(stat.size_diff for stat in
+                       tracemalloc.take_snapshot().compare_to(before, 'filename'))
+            tracemalloc.stop()
+            return asts, size
+
+        plain_asts, plain_size = retained(SocialMediaContentTransformer())
+        pooled_asts, pooled_size = retained(SocialMediaContentTransformer(StringPool()))
+        self.assertEqual(plain_asts, pooled_asts)
+        self.assertLess(pooled_size, plain_size)
+        print(f"[OK] AST memory: {plain_size} B plain, {pooled_size} B interned "
+              f"({100 * (plain_size - pooled_size) / plain_size:.0f}% saved)")
+
+    def test_identity_equality(self):
+        """Pooled values compare by identity, which short-circuits =="""
+        pool = StringPool()
+        transformer = SocialMediaContentTransformer(pool)
+        pooled = [v for tree in self.trees for v in collect_literals(transformer.transform(tree))]
+        plain = [v for tree in self.trees
+                 for v in collect_literals(SocialMediaContentTransformer().transform(tree))]
+        probe = "#tag7"
+
+        def count(values, target):
+            start = time.perf_counter()
+            for _ in range(20):
+                hits = sum(1 for v in values if v == target)
+            return hits, time.perf_counter() - start
+
+        pooled_hits, pooled_time = count(pooled, pool.intern(probe))
+        plain_hits, plain_time = count(plain, "".join(["#tag", "7"]))
+        self.assertEqual(pooled_hits, plain_hits)
+        self.assertTrue(all(v is pool.intern(v) for v in pooled))
+        print(f"[OK] Equality scan: {plain_time * 1000:.1f} ms plain, "
+              f"{pooled_time * 1000:.1f} ms interned")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Időzóna-szétosztás tesztek
+"""
+
+import time
+import unittest
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from parser import SocialMediaContentParser
+from schedule import expand_schedule
+from timezones import (LOCATION_ZONES, ZoneCache, expand_campaign_localized, expand_localized,
+                       location_zone)
+
+UTC = timezone.utc
+START = datetime(2024, 3, 1, tzinfo=UTC)
+END = datetime(2024, 4, 10, tzinfo=UTC)
+
+
+def reference(schedule, start, end, locations):
+    """One zoneinfo conversion per location and occurrence"""
+    occurrences = {}
+    for location in locations:
+        zone = ZoneInfo(location_zone(location))
+        local_start = start.astimezone(zone).replace(tzinfo=None)
+        local_end = end.astimezone(zone).replace(tzinfo=None) + timedelta(hours=3)
+        for local in expand_schedule(schedule, local_start, local_end):
+            moment = local.replace(tzinfo=zone).astimezone(UTC)
+            if start <= moment < end:
+                # A skipped local time posts once, with the next existing one
+                occurrences.setdefault((moment, location), local)
+    return {(moment, local, location) for (moment, location), local in occurrences.items()}
+
+
+def flatten(groups):
+    return {(moment, local, location) for moment, local, locations in groups for location in locations}
+
+
+class TestTimezoneFanout(unittest.TestCase):
+    """Helyi idejű kibontás helyszínenként"""
+
+    def test_to_utc_matches_zoneinfo(self):
+        """Cached offsets convert like zoneinfo, including DST gaps and repeats"""
+        cache = ZoneCache()
+        for key in ('America/New_York', 'Europe/Budapest', 'Australia/Sydney', 'Africa/Cairo',
+                    'America/Santiago', 'Asia/Kolkata'):
+            local = datetime(2024, 1, 1)
+            while local.year == 2024:
+                expected = local.replace(tzinfo=ZoneInfo(key)).astimezone(UTC)
+                self.assertEqual(cache.to_utc(key, local), expected, (key, local))
+                local += timedelta(minutes=20)
+        self.assertEqual(cache.probes, 6 * 366)
+        print("[OK] Cached conversion matches zoneinfo")
+
+    def test_bounded_cache(self):
+        """A bounded cache keeps the most recently used days"""
+        cache = ZoneCache(max_days=10)
+        for day in range(1, 31):
+            cache.to_utc('Europe/Budapest', datetime(2024, 3, day, 12))
+            cache.to_utc('Europe/Budapest', datetime(2024, 3, 1, 12))
+        self.assertEqual(len(cache), 10)
+        self.assertEqual(cache.probes, 30)
+        cache.to_utc('Europe/Budapest', datetime(2024, 3, 30, 12))
+        cache.to_utc('Europe/Budapest', datetime(2024, 3, 1, 12))
+        self.assertEqual(cache.probes, 30)
+        cache.to_utc('Europe/Budapest', datetime(2024, 3, 2, 12))
+        self.assertEqual(cache.probes, 31)
+        print("[OK] Cache bounded to its most recent days")
+
+    def test_dst_shift(self):
+        """A 09:00 post in New York moves from 14:00 to 13:00 UTC across the March change"""
+        schedule = {'type': 'daily', 'times': [9 * 60]}
+        moments = [moment for moment, _, _ in expand_localized(
+            schedule, datetime(2024, 3, 9), datetime(2024, 3, 12), ['US'])]
+        self.assertEqual([m.hour for m in moments], [14, 13, 13])
+        gap = {'type': 'daily', 'times': [2 * 60 + 30, 3 * 60]}
+        moments = [moment for moment, _, _ in expand_localized(
+            gap, datetime(2024, 3, 10), datetime(2024, 3, 11), ['US'])]
+        self.assertEqual(moments, sorted(moments))
+        print("[OK] DST change handled")
+
+    def test_fanout_matches_reference(self):
+        """Grouped fan-out gives exactly the per-location zoneinfo result, in UTC order"""
+        locations = sorted(LOCATION_ZONES) + ['Europe/Budapest', 'Asia/Kathmandu']
+        schedules = [
+            {'type': 'daily', 'times': [30, 9 * 60, 23 * 60 + 45]},
+            {'type': 'weekly', 'day': 'sunday', 'times': [2 * 60 + 30]},
+            {'type': 'interval', 'every': {'value': 5, 'unit': 'hours'}, 'times': [60], 'until': 20 * 60},
+            {'type': 'at', 'times': [12 * 60]},
+        ]
+        for schedule in schedules:
+            with self.subTest(schedule=schedule['type']):
+                groups = list(expand_localized(schedule, START, END, locations))
+                self.assertEqual([g[0] for g in groups], sorted(g[0] for g in groups))
+                self.assertEqual(flatten(groups), reference(schedule, START, END, locations))
+        print("[OK] Fan-out matches per-location reference")
+
+    def test_cost_scales_with_profiles(self):
+        """Thousands of locations cost about as much as their distinct offset profiles"""
+        schedule = {'type': 'interval', 'every': {'value': 1, 'unit': 'hours'}, 'times': [], 'until': None}
+        few = ['US', 'UK', 'HU']
+        many = (few * 2000)[:6000]
+        timings = {}
+        for name, locations in (('few', few), ('many', many)):
+            started = time.perf_counter()
+            groups = list(expand_localized(schedule, START, END, locations))
+            timings[name] = time.perf_counter() - started
+            self.assertEqual(sum(len(g[2]) for g in groups), len(locations) * 40 * 24)
+        self.assertLess(timings['many'], timings['few'] * 5 + 0.5)
+        print(f"[OK] 3 locations {timings['few'] * 1000:.0f} ms, 6000 locations {timings['many'] * 1000:.0f} ms")
+
+    def test_campaign(self):
+        """Campaign occurrences fan out over the targeting locations"""
+        parser = SocialMediaContentParser(backend='fast')
+        path = Path(__file__).parent.parent / "examples" / "complex_campaign.smp"
+        ast = parser.parse_file(str(path))['ast']
+        occurrences = list(expand_campaign_localized(ast, datetime(2024, 7, 1, tzinfo=UTC)))
+        self.assertEqual([o[0] for o in occurrences], sorted(o[0] for o in occurrences))
+        posts = sum(len(locations) for _, _, locations, _ in occurrences)
+        first = [o for o in occurrences if o[3]['name'] == 'product_showcase'][:3]
+        self.assertEqual([(o[0].hour, o[2]) for o in first], [(0, ('US', 'CA')), (8, ('UK',)), (13, ('US', 'CA'))])
+        self.assertGreater(posts, len(occurrences))
+        with self.assertRaises(ValueError):
+            location_zone("Atlantis")
+        print(f"[OK] {posts} localized posts from {len(occurrences)} grouped occurrences")
+
+    def test_unresolved_locations(self):
+        """Locations without a time zone are skipped and reported; none left means UTC"""
+        schedule = {'type': 'daily', 'times': [9 * 60]}
+        unresolved = []
+        mixed = list(expand_localized(schedule, START, END, ['US', 'New York'], unresolved=unresolved))
+        self.assertEqual(mixed, list(expand_localized(schedule, START, END, ['US'])))
+        self.assertEqual(unresolved, ['New York'])
+        fallback = list(expand_localized(schedule, START, END, ['United States', 'Canada']))
+        self.assertEqual(fallback, list(expand_localized(schedule, START, END, [])))
+
+        parser = SocialMediaContentParser(backend='fast', verbose=False)
+        path = Path(__file__).parent.parent / "examples" / "complex_campaign.smp"
+        ast = parser.parse_file(str(path))['ast']
+        ast['body']['targeting'].update(location=["New York", "Los Angeles"], location_optional=True)
+        unresolved = []
+        occurrences = list(expand_campaign_localized(ast, datetime(2024, 7, 1, tzinfo=UTC), unresolved=unresolved))
+        self.assertEqual(unresolved, ["New York", "Los Angeles"])
+        self.assertEqual({o[2] for o in occurrences}, {('UTC',)})
+        print("[OK] Unresolved locations skipped")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)